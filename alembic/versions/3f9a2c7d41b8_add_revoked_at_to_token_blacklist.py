@@ -0,0 +1,30 @@
+"""Add revoked_at to token blacklist
+
+Revision ID: 3f9a2c7d41b8
+Revises: ebacd1e52421
+Create Date: 2026-10-18 09:12:40.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a2c7d41b8'
+down_revision: Union[str, Sequence[str], None] = 'ebacd1e52421'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('token_blacklist', sa.Column('revoked_at', sa.DateTime(), nullable=False, server_default=sa.func.now()))
+    op.create_index(op.f('ix_token_blacklist_revoked_at'), 'token_blacklist', ['revoked_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_token_blacklist_revoked_at'), table_name='token_blacklist')
+    op.drop_column('token_blacklist', 'revoked_at')
@@ -0,0 +1,28 @@
+"""Index token blacklist expires_at
+
+Revision ID: 8c41e5f0a6d2
+Revises: 3f9a2c7d41b8
+Create Date: 2026-10-18 10:03:17.204511
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41e5f0a6d2'
+down_revision: Union[str, Sequence[str], None] = '3f9a2c7d41b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_token_blacklist_expires_at'), 'token_blacklist', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_token_blacklist_expires_at'), table_name='token_blacklist')
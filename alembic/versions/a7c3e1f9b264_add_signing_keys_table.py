@@ -0,0 +1,39 @@
+"""Add signing keys table
+
+Revision ID: a7c3e1f9b264
+Revises: 5d7e9b2a0c13
+Create Date: 2026-10-18 14:02:47.318206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c3e1f9b264'
+down_revision: Union[str, Sequence[str], None] = '5d7e9b2a0c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('signing_keys',
+    sa.Column('kid', sa.String(), nullable=False),
+    sa.Column('generation', sa.Integer(), nullable=False),
+    sa.Column('algorithm', sa.String(), nullable=False),
+    sa.Column('private_key', sa.Text(), nullable=False),
+    sa.Column('public_jwk', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('activates_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('kid'),
+    sa.UniqueConstraint('generation')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('signing_keys')
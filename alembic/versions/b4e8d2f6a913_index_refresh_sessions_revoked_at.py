@@ -0,0 +1,28 @@
+"""Index refresh_sessions revoked_at
+
+Revision ID: b4e8d2f6a913
+Revises: f3c6a8e1d945
+Create Date: 2026-10-18 23:41:06.518207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e8d2f6a913'
+down_revision: Union[str, Sequence[str], None] = 'f3c6a8e1d945'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_refresh_sessions_revoked_at'), 'refresh_sessions', ['revoked_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_refresh_sessions_revoked_at'), table_name='refresh_sessions')
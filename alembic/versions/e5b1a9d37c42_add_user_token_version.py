@@ -0,0 +1,30 @@
+"""Add user token version
+
+Revision ID: e5b1a9d37c42
+Revises: c2d8f4a61e37
+Create Date: 2026-10-18 18:02:44.107315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b1a9d37c42'
+down_revision: Union[str, Sequence[str], None] = 'c2d8f4a61e37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('refresh_sessions', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('refresh_sessions', 'token_version')
+    op.drop_column('users', 'token_version')
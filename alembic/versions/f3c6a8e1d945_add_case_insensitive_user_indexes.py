@@ -0,0 +1,47 @@
+"""Add case-insensitive unique indexes on username and email
+
+Revision ID: f3c6a8e1d945
+Revises: e5b1a9d37c42
+Create Date: 2026-10-18 21:14:52.630418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c6a8e1d945'
+down_revision: Union[str, Sequence[str], None] = 'e5b1a9d37c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    for column in ('username', 'email'):
+        clashes = bind.execute(sa.text(
+            f'SELECT lower({column}) FROM users GROUP BY lower({column}) HAVING count(*) > 1 LIMIT 5'
+        )).scalars().all()
+        if clashes:
+            raise RuntimeError(f'Users differing only in {column} case must be merged or renamed first: {clashes}')
+    # Logins match either column, so a username may never look like an email
+    email_like = bind.execute(sa.text(
+        "SELECT username FROM users WHERE username LIKE '%@%' LIMIT 5"
+    )).scalars().all()
+    if email_like:
+        raise RuntimeError(f'Usernames containing "@" must be renamed first: {email_like}')
+
+    # Build without blocking writes to a large users table (Postgres); needs to run outside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index('ux_users_username_lower', 'users', [sa.text('lower(username)')], unique=True, postgresql_concurrently=True)
+        op.create_index('ux_users_email_lower', 'users', [sa.text('lower(email)')], unique=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ux_users_email_lower', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ux_users_username_lower', table_name='users', postgresql_concurrently=True)
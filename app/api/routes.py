@@ -1,15 +1,21 @@
-# API routes for login, signup, logout, refresh token, and user info
-from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException, status
+# API routes for login, signup, logout, refresh token, sessions, introspection, and user info
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
 from app.db.database import get_db
-from app.services.auth import signup, login, refresh_access_token
-from app.utils.security import get_current_user, decode_token, oauth2_scheme
-from app.schemas.user import UserCreate, UserLogin, TokenRefresh, Token, UserResponse
-from app.crud.user import get_user_by_id
-from app.crud.token import add_token_to_blacklist
+from app.services.auth import signup, login, logout, refresh_access_token
+from app.utils.security import get_current_user, decode_token_wrapper, oauth2_scheme, require_internal_api_key
+from app.schemas.user import UserCreate, UserLogin, TokenRefresh, Token, UserResponse, UserImportResult, SessionResponse
+from app.schemas.user import TokenIntrospectionRequest, TokenIntrospectionResponse
+from app.services.bulk_import import bulk_user_importer, parse_records
+from app.services.introspection import introspect_tokens
+from app.services.sessions import list_sessions, revoke_all_sessions, revoke_session
+from app.services.user_cache import get_user_profile
+from app.services.tokens import token_engine
 
 router = APIRouter()
+well_known_router = APIRouter()
 
 # Routes
 @router.post("/signup", response_model=UserResponse)
@@ -18,9 +24,10 @@ async def signup_route(user: UserCreate, db: AsyncSession = Depends(get_db)):
     return await signup(db, user.username, user.email, user.password)
 
 @router.post("/login", response_model=Token)
-async def login_route(user: UserLogin, db: AsyncSession = Depends(get_db)):
+async def login_route(user: UserLogin, request: Request, db: AsyncSession = Depends(get_db)):
     """User login endpoint."""
-    return await login(db, user.username, user.password)
+    client_ip = request.client.host if request.client else None
+    return await login(db, user.username, user.password, client_ip)
 
 @router.post("/refresh", response_model=Token)
 async def refresh_token_route(token_data: TokenRefresh, db: AsyncSession = Depends(get_db)):
@@ -30,19 +37,59 @@ async def refresh_token_route(token_data: TokenRefresh, db: AsyncSession = Depen
 @router.post("/logout")
 async def logout_route(db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)):
     """User logout endpoint."""
-    payload = decode_token(token)
-    jti = payload.get("jti")
-    exp = payload.get("exp")
-    if jti and exp:
-        expires_at = datetime.fromtimestamp(exp, tz=timezone.utc)
-        await add_token_to_blacklist(db, jti, expires_at)
+    payload = decode_token_wrapper(token)
+    await logout(db, payload)
     return {"message": "Logout successful"}
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_route(db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
     """Get current user endpoint."""
     user_id = current_user.get("user_id")
-    user = await get_user_by_id(db, user_id)
+    user = await get_user_profile(db, user_id)
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
\ No newline at end of file
+    return user
+
+@router.get("/sessions", response_model=List[SessionResponse])
+async def list_sessions_route(db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    """List the current user's active sessions."""
+    return await list_sessions(db, current_user["user_id"], current_user.get("sid"))
+
+@router.post("/sessions/revoke-all")
+async def revoke_all_sessions_route(db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    """Revoke every session and token of the current user, including this one."""
+    await revoke_all_sessions(db, current_user["user_id"])
+    return {"message": "All sessions revoked"}
+
+@router.delete("/sessions/{session_id}")
+async def revoke_session_route(session_id: str, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    """Revoke one of the current user's sessions."""
+    await revoke_session(db, current_user["user_id"], session_id)
+    return {"message": "Session revoked"}
+
+@router.post("/admin/users/import", response_model=UserImportResult, dependencies=[Depends(require_internal_api_key)])
+async def import_users_route(request: Request):
+    """Bulk user import endpoint; streams NDJSON, or CSV when sent as text/csv."""
+    fmt = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    return await bulk_user_importer.run(parse_records(request.stream(), fmt))
+
+@router.post(
+    "/introspect",
+    response_model=TokenIntrospectionResponse,
+    response_model_exclude_none=True,
+    dependencies=[Depends(require_internal_api_key)],
+)
+async def introspect_route(request: TokenIntrospectionRequest, db: AsyncSession = Depends(get_db)):
+    """Batch token introspection endpoint for gateways."""
+    return {"results": await introspect_tokens(db, request.tokens)}
+
+@well_known_router.get("/.well-known/jwks.json")
+async def jwks_route(request: Request):
+    """Public signing keys for verifying tokens locally."""
+    etag = token_engine.jwks_etag
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}"}
+    if_none_match = request.headers.get("if-none-match", "")
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if etag in candidates or "*" in candidates:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=token_engine.jwks_body, media_type="application/json", headers=headers)
@@ -1 +1,111 @@
 # Configuration settings (env variables, secrets)
+from typing import Optional
+from shared_libs.settings import SharedSettings
+
+
+class Settings(SharedSettings):
+    """Auth-service settings layered on top of the shared settings."""
+
+    # Database engine and connection pool
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 500
+    DB_POOL_WARMUP_CONNECTIONS: int = 5
+
+    # Concurrent point lookups (user by id, blacklisted JTI) merged into one IN query of at most this many keys
+    DB_LOADER_MAX_BATCH_SIZE: int = 500
+
+    # Graceful shutdown: how long to wait for in-flight requests, then for pending outbox events and blacklist writes
+    SHUTDOWN_DRAIN_SECONDS: float = 20.0
+    SHUTDOWN_OUTBOX_DRAIN_SECONDS: float = 5.0
+    SHUTDOWN_BLACKLIST_FLUSH_SECONDS: float = 5.0
+
+    # Read replicas (comma-separated URLs) for lag-tolerant read-only lookups
+    DATABASE_REPLICA_URLS: Optional[str] = None
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_CHECK_SECONDS: float = 5.0
+    DB_REPLICA_RETRY_SECONDS: float = 30.0
+
+    # Password hashing executor ("process" or "thread")
+    PASSWORD_HASH_EXECUTOR: str = "process"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
+    # Password hashing policy ("bcrypt" or "argon2" for Argon2id). Costs are a
+    # floor; with a target set, startup raises them to fit that latency budget.
+    PASSWORD_HASH_SCHEME: str = "bcrypt"
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_ARGON2_TIME_COST: int = 2
+    PASSWORD_ARGON2_MEMORY_KIB: int = 19456
+    PASSWORD_ARGON2_PARALLELISM: int = 1
+    PASSWORD_HASH_TARGET_SECONDS: Optional[float] = None
+
+    # Login rate limiting (attempts per client IP, failures per username)
+    LOGIN_RATE_LIMIT_IP_ATTEMPTS: int = 30
+    LOGIN_RATE_LIMIT_IP_WINDOW_SECONDS: float = 60.0
+    LOGIN_RATE_LIMIT_USERNAME_FAILURES: int = 5
+    LOGIN_RATE_LIMIT_USERNAME_WINDOW_SECONDS: float = 300.0
+    RATE_LIMIT_MAX_KEYS: int = 100000
+
+    # Revoked-token cache
+    REVOCATION_CACHE_REFRESH_SECONDS: float = 5.0
+    REVOCATION_CACHE_COHERENT_REFRESH_SECONDS: float = 60.0
+    REVOCATION_BUCKET_SECONDS: int = 3600
+    REVOCATION_BLOOM_CAPACITY: int = 10000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.01
+
+    # Write-behind blacklist inserts (0 writes each revocation in its own request)
+    BLACKLIST_WRITE_BEHIND_SECONDS: float = 0.005
+    BLACKLIST_WRITE_BATCH_SIZE: int = 500
+    BLACKLIST_WRITE_MAX_PENDING: int = 100000
+
+    # Token signing keys for asymmetric algorithms (PEM files; HMAC uses SECRET_KEY)
+    JWT_PRIVATE_KEY_PATH: Optional[str] = None
+    JWT_PUBLIC_KEY_PATH: Optional[str] = None
+
+    # Managed key ring (asymmetric algorithms without a key file) and JWKS caching
+    JWT_KEY_ROTATION_SECONDS: float = 7 * 24 * 3600
+    JWT_KEY_CHECK_SECONDS: float = 60.0
+    JWKS_MAX_AGE_SECONDS: int = 300
+    # Comma-separated Fernet keys; the first encrypts stored private keys, any of them decrypts
+    JWT_KEY_ENCRYPTION_KEYS: Optional[str] = None
+
+    # Verified-token memo
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: float = 30.0
+
+    # Per-user token version cache (bounds how long a revoke-all on another worker goes unseen)
+    TOKEN_VERSION_CACHE_TTL_SECONDS: float = 5.0
+    TOKEN_VERSION_CACHE_MAX_SIZE: int = 100000
+
+    # Internal endpoints (bulk import, token introspection); disabled while unset
+    INTERNAL_API_KEY: Optional[str] = None
+    BULK_IMPORT_BATCH_SIZE: int = 1000
+    INTROSPECTION_MAX_TOKENS: int = 100
+
+    # User profile cache for /auth/me
+    USER_CACHE_TTL_SECONDS: float = 60.0
+    USER_CACHE_MAX_SIZE: int = 10000
+
+    # Expired blacklist compaction (interval 0 disables the in-app job)
+    BLACKLIST_COMPACTION_INTERVAL_SECONDS: float = 3600.0
+    BLACKLIST_COMPACTION_BATCH_SIZE: int = 5000
+
+    # Transactional outbox relay
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_SECONDS: float = 1.0
+    OUTBOX_MAX_BACKOFF_SECONDS: float = 300.0
+
+    # Batched message queue publishing
+    MQ_PUBLISH_BATCH_SIZE: int = 100
+    MQ_PUBLISH_FLUSH_SECONDS: float = 0.005
+    MQ_PUBLISH_MAX_IN_FLIGHT: int = 1000
+    MQ_PUBLISH_CHANNEL_POOL_SIZE: int = 4
+
+
+# Load settings
+settings = Settings()
@@ -0,0 +1,62 @@
+# In-flight request tracking so shutdown can drain before tearing down resources
+import asyncio
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class InFlightRequests:
+    """Counts HTTP requests being served and lets shutdown wait for them.
+
+    Once ``drain`` starts, new requests are turned away with 503 and
+    ``Connection: close`` so a load balancer retries them on another worker,
+    while the ones already running finish against live resources.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.draining = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def enter(self):
+        self.count += 1
+        self._idle.clear()
+
+    def exit(self):
+        self.count -= 1
+        if self.count == 0:
+            self._idle.set()
+
+    async def drain(self, timeout: float) -> bool:
+        """Stop admitting requests and wait for running ones; False if the timeout expired first."""
+        self.draining = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class RequestDrainMiddleware:
+    """Pure ASGI middleware that feeds an InFlightRequests tracker."""
+
+    def __init__(self, app: ASGIApp, tracker: InFlightRequests):
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.tracker.draining:
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [(b"connection", b"close"), (b"retry-after", b"1"), (b"content-length", b"0")],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+        self.tracker.enter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.tracker.exit()
@@ -0,0 +1,250 @@
+# Prometheus metrics shared across the service
+from prometheus_client import Counter, Gauge, Histogram
+
+# Password hashing executor
+PASSWORD_HASH_SECONDS = Histogram(
+    "auth_password_hash_seconds",
+    "Time spent computing a password hash or verification in the worker pool.",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+PASSWORD_HASH_WAIT_SECONDS = Histogram(
+    "auth_password_hash_wait_seconds",
+    "Time a password hashing call spent queued before a worker picked it up.",
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+PASSWORD_HASH_IN_FLIGHT = Gauge(
+    "auth_password_hash_in_flight",
+    "Password hashing calls currently running or queued.",
+)
+PASSWORD_REHASHES = Counter(
+    "auth_password_rehashes_total",
+    "Stored password hashes upgraded to the current policy at login, by new scheme.",
+    ["scheme"],
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "auth_password_hash_rejected_total",
+    "Password hashing calls rejected because the worker pool was saturated.",
+    ["operation"],
+)
+
+# Token revocation cache
+REVOCATION_LOOKUPS = Counter(
+    "auth_revocation_lookups_total",
+    "Token revocation checks, by whether they were answered from memory or the database.",
+    ["source"],
+)
+REVOCATION_CACHE_FILTERS = Gauge(
+    "auth_revocation_cache_filters",
+    "Bloom filters currently held by the revocation cache.",
+)
+
+# Token blacklist compaction
+BLACKLIST_ROWS_PURGED = Counter(
+    "auth_blacklist_rows_purged_total",
+    "Expired token_blacklist rows deleted by the compaction job.",
+)
+BLACKLIST_COMPACTION_SECONDS = Histogram(
+    "auth_blacklist_compaction_seconds",
+    "Duration of a full token_blacklist compaction run.",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+BLACKLIST_LAST_COMPACTION = Gauge(
+    "auth_blacklist_last_compaction_timestamp_seconds",
+    "Unix time the last successful compaction run finished.",
+)
+
+# Transactional outbox relay
+OUTBOX_EVENTS_PUBLISHED = Counter(
+    "auth_outbox_events_published_total",
+    "Outbox events confirmed by the broker and removed from the outbox.",
+    ["event_type"],
+)
+OUTBOX_PUBLISH_FAILURES = Counter(
+    "auth_outbox_publish_failures_total",
+    "Outbox events whose publish was not confirmed and were rescheduled.",
+    ["event_type"],
+)
+OUTBOX_DELIVERY_LAG_SECONDS = Histogram(
+    "auth_outbox_delivery_lag_seconds",
+    "Time from an outbox event being written to its publish being confirmed.",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 60.0, 300.0, 3600.0),
+)
+
+# Message queue publish buffer
+MQ_PUBLISH_QUEUE_DEPTH = Gauge(
+    "auth_mq_publish_queue_depth",
+    "Events waiting in the publish buffer to be flushed.",
+)
+MQ_PUBLISH_IN_FLIGHT = Gauge(
+    "auth_mq_publish_in_flight",
+    "Published messages awaiting a broker confirm.",
+)
+MQ_PUBLISH_FLUSH_SECONDS = Histogram(
+    "auth_mq_publish_flush_seconds",
+    "Time to publish one batch and receive all of its confirms.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+MQ_PUBLISH_BATCH_SIZE = Histogram(
+    "auth_mq_publish_batch_size",
+    "Messages per publish buffer flush.",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+MQ_PUBLISH_CONFIRM_FAILURES = Counter(
+    "auth_mq_publish_confirm_failures_total",
+    "Messages the broker nacked or that failed before being confirmed.",
+)
+
+# Database connection pool
+DB_POOL_CHECKED_OUT = Gauge(
+    "auth_db_pool_checked_out",
+    "Database connections currently checked out of the pool.",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "auth_db_pool_overflow",
+    "Connections open beyond the configured pool size.",
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "auth_db_pool_wait_seconds",
+    "Time spent obtaining a connection from the pool, including connecting if needed.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
+# User profile cache
+USER_CACHE_REQUESTS = Counter(
+    "auth_user_cache_requests_total",
+    "User profile lookups, by whether they were served from the cache.",
+    ["result"],
+)
+
+# Token verification memo
+TOKEN_VERIFY_CACHE_REQUESTS = Counter(
+    "auth_token_verify_cache_requests_total",
+    "Token verifications, by whether they were served from the verified-token memo.",
+    ["result"],
+)
+
+# Bulk user import
+BULK_IMPORT_ROWS = Counter(
+    "auth_bulk_import_rows_total",
+    "Bulk import rows, by outcome (created, conflict or invalid).",
+    ["result"],
+)
+BULK_IMPORT_BATCH_SECONDS = Histogram(
+    "auth_bulk_import_batch_seconds",
+    "Time to hash, insert and commit one bulk import batch.",
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+
+# Login rate limiting
+LOGIN_RATE_LIMITED = Counter(
+    "auth_login_rate_limited_total",
+    "Login attempts rejected by the rate limiter, by the limit that tripped (ip or username).",
+    ["scope"],
+)
+
+# Request path latency
+_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+HTTP_REQUEST_SECONDS = Histogram(
+    "auth_http_request_seconds",
+    "HTTP request latency, by method, route template and status code.",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+DB_QUERY_SECONDS = Histogram(
+    "auth_db_query_seconds",
+    "Time spent in each CRUD function, including waiting for a connection.",
+    ["operation"],
+    buckets=_LATENCY_BUCKETS,
+)
+JWT_SECONDS = Histogram(
+    "auth_jwt_seconds",
+    "Time to encode or decode (verify) a JWT.",
+    ["operation"],
+    buckets=(0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05),
+)
+REVOCATION_LOOKUP_SECONDS = Histogram(
+    "auth_revocation_lookup_seconds",
+    "Time to check whether a token is revoked, by whether memory or the database answered.",
+    ["source"],
+    buckets=(0.00001, 0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5),
+)
+MQ_PUBLISH_SECONDS = Histogram(
+    "auth_mq_publish_seconds",
+    "Time from queueing an event for publish until the broker confirmed or rejected it.",
+    buckets=_LATENCY_BUCKETS,
+)
+
+# Refresh-token sessions
+REFRESH_TOKEN_REUSE = Counter(
+    "auth_refresh_token_reuse_total",
+    "Already-rotated refresh tokens presented again; each one revokes its session.",
+)
+TOKEN_VERSION_CACHE_REQUESTS = Counter(
+    "auth_token_version_cache_requests_total",
+    "Per-user token version lookups, by whether they were served from the cache.",
+    ["result"],
+)
+
+# Read replicas
+DB_READS = Counter(
+    "auth_db_reads_total",
+    "Routed read-only lookups on a replica, or on the primary and why.",
+    ["target"],
+)
+DB_REPLICA_LAG_SECONDS = Gauge(
+    "auth_db_replica_lag_seconds",
+    "Replication lag last measured on each read replica.",
+    ["replica"],
+)
+
+# Process lifecycle
+APP_STARTUP_SECONDS = Gauge(
+    "auth_app_startup_seconds",
+    "Time the lifespan startup took before the app accepted traffic.",
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "auth_http_requests_in_flight",
+    "HTTP requests currently being served.",
+)
+
+# Token introspection
+INTROSPECTION_TOKENS = Counter(
+    "auth_introspection_tokens_total",
+    "Tokens checked by batch introspection, by result.",
+    ["result"],
+)
+INTROSPECTION_BATCH_SIZE = Histogram(
+    "auth_introspection_batch_size",
+    "Number of tokens per introspection request.",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+)
+
+# Lookup coalescing
+DB_LOADER_LOADS = Counter(
+    "auth_db_loader_loads_total",
+    "Coalesced point lookups, by whether they joined an in-flight fetch of the same key or went into a batch.",
+    ["loader", "result"],
+)
+DB_LOADER_BATCH_KEYS = Histogram(
+    "auth_db_loader_batch_keys",
+    "Distinct keys fetched per coalesced query.",
+    ["loader"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+
+# Write-behind blacklist inserts
+BLACKLIST_WRITE_PENDING = Gauge(
+    "auth_blacklist_write_pending",
+    "Revocations enforced locally but not yet committed to token_blacklist.",
+)
+BLACKLIST_WRITE_BATCH_SIZE = Histogram(
+    "auth_blacklist_write_batch_size",
+    "Revocations written per multi-row blacklist insert.",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+BLACKLIST_WRITE_FAILURES = Counter(
+    "auth_blacklist_write_failures_total",
+    "Blacklist inserts that failed and were queued again.",
+)
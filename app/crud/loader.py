@@ -0,0 +1,105 @@
+# Request coalescing for hot point lookups (single-flight plus per-tick batching)
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Iterable, List, Optional, Tuple, TypeVar
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.metrics import DB_LOADER_BATCH_KEYS, DB_LOADER_LOADS
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# Handed to waiters whose leader was cancelled before its query finished; they retry
+_RETRY = object()
+
+
+class BatchLoader(Generic[K, V]):
+    """Merges concurrent lookups of the same kind into as few queries as possible.
+
+    A lookup for a key that is already being fetched waits for that fetch
+    instead of running its own query (single-flight). Distinct keys requested
+    in the same event-loop tick are collected into one batch: the first caller
+    yields once, then loads every key with a single ``batch_fn(db, keys)`` call
+    (typically ``WHERE key IN (...)``) on its own session, and hands each
+    waiter its value.
+
+    Callers therefore see rows committed by others, or written earlier in the
+    leading caller's transaction, but not their own uncommitted changes, so
+    only use this for lookups that never depend on those. Batches are kept
+    per database engine, so a lookup routed to a replica never answers one
+    meant for the primary.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[AsyncSession, List[K]], Awaitable[Dict[K, V]]],
+        default: Optional[V] = None,
+        max_batch_size: int = 500,
+    ):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.default = default
+        self.max_batch_size = max_batch_size
+        self._inflight: Dict[Tuple[object, K], asyncio.Future] = {}
+        self._pending: Dict[object, List[K]] = {}
+        self._loads = {result: DB_LOADER_LOADS.labels(name, result) for result in ("batched", "coalesced")}
+        self._batch_keys = DB_LOADER_BATCH_KEYS.labels(name)
+
+    async def load(self, db: AsyncSession, key: K) -> V:
+        """Return the value for key, sharing the query with concurrent lookups."""
+        bind = db.bind
+        while True:
+            future = self._inflight.get((bind, key))
+            if future is not None:
+                self._loads["coalesced"].inc()
+                # Shielded, so one waiter giving up doesn't cancel the lookup for the others
+                value = await asyncio.shield(future)
+            else:
+                self._loads["batched"].inc()
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[(bind, key)] = future
+                batch = self._pending.get(bind)
+                if batch is None:
+                    value = await self._lead(db, bind, key, future)
+                else:
+                    batch.append(key)
+                    if len(batch) >= self.max_batch_size:
+                        self._close(bind, batch)
+                    value = await asyncio.shield(future)
+            if value is not _RETRY:
+                return value
+
+    def _close(self, bind, batch: List[K]):
+        # Later keys start a new batch; this one is only read from here on
+        if self._pending.get(bind) is batch:
+            del self._pending[bind]
+
+    async def _lead(self, db: AsyncSession, bind, key: K, future: asyncio.Future):
+        batch = [key]
+        self._pending[bind] = batch
+        try:
+            # Let every coroutine that is ready in this tick add its key first
+            await asyncio.sleep(0)
+            self._close(bind, batch)
+            self._batch_keys.observe(len(batch))
+            values = await self.batch_fn(db, batch)
+        except asyncio.CancelledError:
+            self._close(bind, batch)
+            self._settle(bind, batch, {}, retry=True)
+            raise
+        except Exception as e:
+            self._settle(bind, batch, {}, error=e)
+            raise
+        self._settle(bind, batch, values)
+        return future.result()
+
+    def _settle(self, bind, keys: Iterable[K], values: Dict[K, V], retry: bool = False, error: Optional[Exception] = None):
+        for k in keys:
+            f = self._inflight.pop((bind, k), None)
+            if f is None or f.done():
+                continue
+            if error is not None:
+                f.set_exception(error)
+                # Mark it retrieved; the waiters, if any, re-raise it themselves
+                f.exception()
+            else:
+                f.set_result(_RETRY if retry else values.get(k, self.default))
@@ -0,0 +1,45 @@
+# CRUD operations for the transactional outbox
+import datetime
+from typing import Any, Dict, List, Sequence
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.instrumentation import timed_query
+from app.models.outbox import OutboxEvent
+
+
+def add_outbox_event(db: AsyncSession, event_type: str, routing_key: str, payload: Dict[str, Any]) -> OutboxEvent:
+    """Stage an event in the current transaction; it is relayed once the caller commits."""
+    event = OutboxEvent(event_type=event_type, routing_key=routing_key, payload=payload)
+    db.add(event)
+    return event
+
+
+@timed_query
+async def add_outbox_events(db: AsyncSession, event_type: str, routing_key: str, payloads: Sequence[Dict[str, Any]]):
+    """Stage many events of one type with a single executemany (the caller commits)."""
+    if payloads:
+        await db.execute(
+            insert(OutboxEvent),
+            [{"event_type": event_type, "routing_key": routing_key, "payload": payload} for payload in payloads],
+        )
+
+
+@timed_query
+async def claim_outbox_events(db: AsyncSession, now: datetime.datetime, limit: int) -> List[OutboxEvent]:
+    """Lock up to limit due events, oldest first, skipping rows another relay holds."""
+    result = await db.execute(
+        select(OutboxEvent)
+        .where(OutboxEvent.available_at <= now)
+        .order_by(OutboxEvent.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return list(result.scalars().all())
+
+
+@timed_query
+async def delete_outbox_events(db: AsyncSession, event_ids: Sequence[int]):
+    """Delete relayed events (the caller commits)."""
+    if event_ids:
+        await db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(event_ids)))
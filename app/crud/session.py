@@ -0,0 +1,121 @@
+# CRUD operations for refresh-token sessions
+import datetime
+import uuid
+from typing import Iterable, List, Optional, Set, Tuple
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.instrumentation import timed_query
+from app.models.session import RefreshSession
+
+
+@timed_query
+async def create_refresh_session(
+    db: AsyncSession, user_id: int, expires_at: datetime.datetime, token_version: int = 0
+) -> RefreshSession:
+    """Start a new session at generation 0."""
+    session = RefreshSession(
+        id=uuid.uuid4().hex, user_id=user_id, generation=0, token_version=token_version, expires_at=expires_at
+    )
+    db.add(session)
+    await db.commit()
+    return session
+
+
+@timed_query
+async def rotate_refresh_session(
+    db: AsyncSession, session_id: str, generation: int, now: datetime.datetime, expires_at: datetime.datetime
+) -> bool:
+    """Advance a live session from generation to generation + 1 with one conditional UPDATE.
+
+    Returns False, changing nothing, if the session is revoked, expired or
+    already past that generation.
+    """
+    result = await db.execute(
+        update(RefreshSession)
+        .where(
+            RefreshSession.id == session_id,
+            RefreshSession.generation == generation,
+            RefreshSession.revoked_at.is_(None),
+            RefreshSession.expires_at > now,
+        )
+        .values(generation=generation + 1, last_used_at=now, expires_at=expires_at)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+@timed_query
+async def revoke_refresh_session(
+    db: AsyncSession, session_id: str, now: datetime.datetime, user_id: Optional[int] = None
+) -> bool:
+    """Revoke a session by id, optionally only if it belongs to user_id.
+
+    Returns False if it was already revoked or does not exist.
+    """
+    query = update(RefreshSession).where(RefreshSession.id == session_id, RefreshSession.revoked_at.is_(None))
+    if user_id is not None:
+        query = query.where(RefreshSession.user_id == user_id)
+    result = await db.execute(query.values(revoked_at=now))
+    await db.commit()
+    return result.rowcount == 1
+
+
+@timed_query
+async def get_refresh_session(db: AsyncSession, session_id: str) -> RefreshSession:
+    """Get a session by id."""
+    result = await db.execute(select(RefreshSession).where(RefreshSession.id == session_id))
+    return result.scalar_one_or_none()
+
+
+@timed_query
+async def get_revoked_session_ids(db: AsyncSession, session_ids: Iterable[str]) -> Set[str]:
+    """Return the revoked sessions among session_ids, with one IN query."""
+    result = await db.execute(
+        select(RefreshSession.id).where(RefreshSession.id.in_(list(session_ids)), RefreshSession.revoked_at.is_not(None))
+    )
+    return set(result.scalars().all())
+
+
+@timed_query
+async def get_revoked_sessions(
+    db: AsyncSession, revoked_after: datetime.datetime, revoked_since: Optional[datetime.datetime] = None
+) -> List[Tuple[str, datetime.datetime]]:
+    """Get (id, revoked_at) for sessions revoked after revoked_after, optionally only since revoked_since."""
+    query = select(RefreshSession.id, RefreshSession.revoked_at).where(RefreshSession.revoked_at > revoked_after)
+    if revoked_since is not None:
+        query = query.where(RefreshSession.revoked_at >= revoked_since)
+    result = await db.execute(query)
+    return [tuple(row) for row in result.all()]
+
+
+@timed_query
+async def get_active_refresh_sessions(
+    db: AsyncSession, user_id: int, token_version: int, now: datetime.datetime
+) -> List[RefreshSession]:
+    """List a user's live sessions: unrevoked, unexpired and issued under the current token version."""
+    result = await db.execute(
+        select(RefreshSession)
+        .where(
+            RefreshSession.user_id == user_id,
+            RefreshSession.token_version == token_version,
+            RefreshSession.revoked_at.is_(None),
+            RefreshSession.expires_at > now,
+        )
+        .order_by(RefreshSession.last_used_at.desc())
+    )
+    return list(result.scalars().all())
+
+
+@timed_query
+async def delete_expired_refresh_sessions(db: AsyncSession, now: datetime.datetime, batch_size: int) -> int:
+    """Delete up to batch_size sessions that expired before now and return how many went."""
+    expired = (
+        select(RefreshSession.id)
+        .where(RefreshSession.expires_at <= now)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(delete(RefreshSession).where(RefreshSession.id.in_(expired)))
+    await db.commit()
+    return result.rowcount
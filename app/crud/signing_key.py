@@ -0,0 +1,49 @@
+# CRUD operations for the JWT signing key ring
+import datetime
+from typing import List
+from sqlalchemy import delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.instrumentation import timed_query
+from app.models.signing_key import SigningKey
+
+
+@timed_query
+async def get_signing_keys(db: AsyncSession, now: datetime.datetime) -> List[SigningKey]:
+    """Get every key that has not expired yet, oldest generation first."""
+    result = await db.execute(
+        select(SigningKey)
+        .where(or_(SigningKey.expires_at.is_(None), SigningKey.expires_at > now))
+        .order_by(SigningKey.generation)
+    )
+    return list(result.scalars().all())
+
+
+@timed_query
+async def add_signing_key(db: AsyncSession, key: SigningKey, previous_expires_at: datetime.datetime) -> bool:
+    """Insert the next key and schedule the expiry of every older one.
+
+    Returns False if another worker already added a key for this generation.
+    """
+    try:
+        db.add(key)
+        await db.flush()
+        await db.execute(
+            update(SigningKey)
+            .where(SigningKey.generation < key.generation, SigningKey.expires_at.is_(None))
+            .values(expires_at=previous_expires_at)
+        )
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return False
+    return True
+
+
+@timed_query
+async def delete_expired_signing_keys(db: AsyncSession, now: datetime.datetime) -> int:
+    """Delete keys past their expiry and return how many were removed."""
+    result = await db.execute(delete(SigningKey).where(SigningKey.expires_at <= now))
+    await db.commit()
+    return result.rowcount
@@ -1,9 +1,22 @@
 # app/crud/token.py
+from typing import Collection, Dict, List, Optional, Sequence, Set, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, insert
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.future import select
+from app.config import settings
+from app.core.instrumentation import timed_query
+from app.crud.loader import BatchLoader
 from app.models.token import TokenBlacklist
 import datetime
 
+# Dialects that support INSERT ... ON CONFLICT DO NOTHING
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+@timed_query
 async def add_token_to_blacklist(db: AsyncSession, jti: str, expires_at: datetime.datetime):
     """Add a token to the blacklist."""
     blacklist_entry = TokenBlacklist(jti=jti, expires_at=expires_at)
@@ -12,7 +25,67 @@ async def add_token_to_blacklist(db: AsyncSession, jti: str, expires_at: datetim
     await db.refresh(blacklist_entry)
     return blacklist_entry
 
+@timed_query
+async def add_tokens_to_blacklist(db: AsyncSession, entries: Sequence[Tuple[str, datetime.datetime]]):
+    """Blacklist many tokens with one multi-row insert and commit; already blacklisted JTIs are skipped."""
+    if not entries:
+        return
+    rows = [{"jti": jti, "expires_at": expires_at} for jti, expires_at in entries]
+    dialect_insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is not None:
+        await db.execute(dialect_insert(TokenBlacklist).values(rows).on_conflict_do_nothing())
+    else:
+        existing = await get_blacklisted_jtis(db, [row["jti"] for row in rows])
+        rows = [row for row in rows if row["jti"] not in existing]
+        if rows:
+            await db.execute(insert(TokenBlacklist).values(rows))
+    await db.commit()
+
+async def _fetch_blacklisted(db: AsyncSession, jtis: List[str]) -> Dict[str, bool]:
+    result = await db.execute(select(TokenBlacklist.jti).where(TokenBlacklist.jti.in_(jtis)))
+    return dict.fromkeys(result.scalars(), True)
+
+# Revocation checks that miss the in-memory cache share one query per tick
+_blacklist_loader = BatchLoader(
+    "blacklisted_jti", _fetch_blacklisted, default=False, max_batch_size=settings.DB_LOADER_MAX_BATCH_SIZE
+)
+
+@timed_query
 async def is_token_blacklisted(db: AsyncSession, jti: str) -> bool:
-    """Check if a token is blacklisted."""
-    result = await db.execute(select(TokenBlacklist).where(TokenBlacklist.jti == jti))
-    return result.scalar_one_or_none() is not None
+    """Check if a token is blacklisted, coalesced with concurrent checks."""
+    return await _blacklist_loader.load(db, jti)
+
+@timed_query
+async def get_blacklisted_jtis(db: AsyncSession, jtis: Collection[str]) -> Set[str]:
+    """Return which of the given JTIs are blacklisted, with a single IN query."""
+    if not jtis:
+        return set()
+    result = await db.execute(select(TokenBlacklist.jti).where(TokenBlacklist.jti.in_(list(jtis))))
+    return set(result.scalars().all())
+
+@timed_query
+async def get_blacklisted_tokens(
+    db: AsyncSession, now: datetime.datetime, revoked_since: Optional[datetime.datetime] = None
+) -> List[Tuple[str, datetime.datetime, datetime.datetime]]:
+    """Get (jti, expires_at, revoked_at) for unexpired blacklist entries, optionally only recent ones."""
+    query = select(TokenBlacklist.jti, TokenBlacklist.expires_at, TokenBlacklist.revoked_at).where(
+        TokenBlacklist.expires_at > now
+    )
+    if revoked_since is not None:
+        query = query.where(TokenBlacklist.revoked_at >= revoked_since)
+    result = await db.execute(query)
+    return [tuple(row) for row in result.all()]
+
+@timed_query
+async def delete_expired_tokens(db: AsyncSession, now: datetime.datetime, batch_size: int) -> int:
+    """Delete up to batch_size blacklist entries that expired before now and return how many went."""
+    expired = (
+        select(TokenBlacklist.jti)
+        .where(TokenBlacklist.expires_at <= now)
+        .limit(batch_size)
+        # Let concurrent compactors on other instances take different rows
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(delete(TokenBlacklist).where(TokenBlacklist.jti.in_(expired)))
+    await db.commit()
+    return result.rowcount
@@ -1,43 +1,226 @@
 # CRUD operations for User model
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import String, bindparam, func, insert, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import IntegrityError
-from fastapi import HTTPException
+from fastapi import HTTPException, status
+from app.config import settings
+from app.core.instrumentation import timed_query
+from app.crud.loader import BatchLoader
 from app.models.user import User
-from app.utils.security import hash_password
+from app.services.hashing import password_hasher
 
+# Dialects that support INSERT ... ON CONFLICT DO NOTHING ... RETURNING
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
 
-async def get_user_by_id(db: AsyncSession, user_id: int) -> User:
-    """Get a user by ID."""
-    result = await db.execute(select(User).where(User.id == user_id))
-    return result.scalar_one_or_none()
+
+@dataclass(frozen=True, slots=True)
+class UserRecord:
+    """Read-only snapshot of a users row.
+
+    Lookups return these instead of ORM ``User`` objects: nothing is added to
+    the session's identity map and no attribute instrumentation is set up.
+    """
+    id: int
+    username: str
+    email: str
+    hashed_password: str
+    is_active: bool
+    token_version: int
+
+
+# Lookup statements are built once; each call only binds its parameter, and
+# the compiled form comes straight from SQLAlchemy's statement cache.
+_USER_RECORD_COLUMNS = (User.id, User.username, User.email, User.hashed_password, User.is_active, User.token_version)
+_USER_BY_ID = select(*_USER_RECORD_COLUMNS).where(User.id == bindparam("value"))
+_USER_BY_USERNAME = select(*_USER_RECORD_COLUMNS).where(User.username == bindparam("value"))
+_USER_BY_EMAIL = select(*_USER_RECORD_COLUMNS).where(User.email == bindparam("value"))
+# Username or email, ignoring case: each side matches one of the lower() indexes.
+# Usernames cannot contain "@", so at most one user matches.
+_LOGIN_VALUE = func.lower(bindparam("value", type_=String))
+_USER_BY_LOGIN = (
+    select(*_USER_RECORD_COLUMNS)
+    .where(or_(func.lower(User.username) == _LOGIN_VALUE, func.lower(User.email) == _LOGIN_VALUE))
+    .limit(1)
+)
+_USERS_BY_IDS = select(*_USER_RECORD_COLUMNS).where(User.id.in_(bindparam("values", expanding=True)))
+
+
+async def _fetch_user_record(db: AsyncSession, statement, value) -> Optional[UserRecord]:
+    # Core execution on the session's connection skips ORM result processing.
+    # It does not autoflush, so callers must not rely on pending ORM changes.
+    conn = await db.connection()
+    row = (await conn.execute(statement, {"value": value})).first()
+    return None if row is None else UserRecord(*row)
+
+
+async def _fetch_user_records_by_id(db: AsyncSession, user_ids: List[int]) -> Dict[int, UserRecord]:
+    conn = await db.connection()
+    rows = await conn.execute(_USERS_BY_IDS, {"values": user_ids})
+    return {row.id: UserRecord(*row) for row in rows}
+
+
+# Concurrent /auth/me requests share one query per tick instead of one each
+_user_by_id_loader = BatchLoader("user_by_id", _fetch_user_records_by_id, max_batch_size=settings.DB_LOADER_MAX_BATCH_SIZE)
 
 
-async def get_user_by_username(db: AsyncSession, username: str) -> User:
+@timed_query
+async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[UserRecord]:
+    """Get a user by ID, coalesced with concurrent lookups."""
+    return await _user_by_id_loader.load(db, user_id)
+
+
+@timed_query
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[UserRecord]:
     """Get a user by username."""
-    result = await db.execute(select(User).where(User.username == username))
-    return result.scalar_one_or_none()
+    return await _fetch_user_record(db, _USER_BY_USERNAME, username)
 
 
-async def get_user_by_email(db: AsyncSession, email: str) -> User:
+@timed_query
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[UserRecord]:
     """Get a user by email."""
-    result = await db.execute(select(User).where(User.email == email))
+    return await _fetch_user_record(db, _USER_BY_EMAIL, email)
+
+
+@timed_query
+async def get_user_by_login(db: AsyncSession, login: str) -> Optional[UserRecord]:
+    """Get a user by username or email, ignoring case and surrounding whitespace, in one query."""
+    return await _fetch_user_record(db, _USER_BY_LOGIN, login.strip())
+
+
+@timed_query
+async def get_token_version(db: AsyncSession, user_id: int) -> Optional[int]:
+    """Get a user's current token version, or None if the user does not exist."""
+    result = await db.execute(select(User.token_version).where(User.id == user_id))
     return result.scalar_one_or_none()
 
 
-async def create_user(db: AsyncSession, username: str, email: str, password: str) -> User:
-    """Create a new user."""
-    hashed_password = hash_password(password)
-    db_user = User(
-        username=username,
-        email=email,
-        hashed_password=hashed_password
+@timed_query
+async def get_token_versions(db: AsyncSession, user_ids: Sequence[int]) -> Dict[int, int]:
+    """Get the token versions of many users in one query; missing users are left out."""
+    if not user_ids:
+        return {}
+    result = await db.execute(select(User.id, User.token_version).where(User.id.in_(list(user_ids))))
+    return {row.id: row.token_version for row in result.all()}
+
+
+@timed_query
+async def bump_token_version(db: AsyncSession, user_id: int) -> Optional[int]:
+    """Increment a user's token version with one UPDATE and return the new value."""
+    result = await db.execute(
+        update(User).where(User.id == user_id).values(token_version=User.token_version + 1).returning(User.token_version)
     )
-    db.add(db_user)
+    version = result.scalar_one_or_none()
+    await db.commit()
+    return version
+
+
+@timed_query
+async def update_password_hash(db: AsyncSession, user_id: int, old_hash: str, new_hash: str) -> bool:
+    """Replace a user's password hash, unless it was changed since old_hash was read."""
+    result = await db.execute(
+        update(User).where(User.id == user_id, User.hashed_password == old_hash).values(hashed_password=new_hash)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+@timed_query
+async def _raise_duplicate_user(db: AsyncSession, username: str, email: str):
+    """Work out which unique field collided and raise the matching 400."""
+    result = await db.execute(
+        select(func.lower(User.username)).where(
+            or_(func.lower(User.username) == func.lower(username), func.lower(User.email) == func.lower(email))
+        ).limit(2)
+    )
+    usernames = result.scalars().all()
+    field = "Username" if username.lower() in usernames else "Email" if usernames else "Email or username"
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"{field} already registered"
+    )
+
+
+async def create_user(db: AsyncSession, username: str, email: str, password: str) -> User:
+    """Create a new user with a single INSERT, raising 400 if the username or email is taken.
+
+    The insert is left uncommitted so callers can stage related rows (such as
+    outbox events) in the same transaction before committing.
+    """
+    hashed_password = await password_hasher.hash(password)
+    return await _insert_user(db, {"username": username, "email": email, "hashed_password": hashed_password})
+
+
+@timed_query
+async def _insert_user(db: AsyncSession, values: Dict[str, Any]) -> User:
+    username, email = values["username"], values["email"]
+    dialect_insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is not None:
+        # Let the unique indexes detect duplicates instead of checking first
+        result = await db.execute(
+            dialect_insert(User).values(**values).on_conflict_do_nothing().returning(User.id, User.is_active)
+        )
+        row = result.first()
+        if row is None:
+            await db.rollback()
+            await _raise_duplicate_user(db, username, email)
+        return User(id=row.id, is_active=row.is_active, **values)
+
+    # Generic fallback: rely on the IntegrityError from the unique constraint
     try:
-        await db.commit()
-        await db.refresh(db_user)
+        result = await db.execute(insert(User).values(**values).returning(User.id, User.is_active))
+        row = result.first()
     except IntegrityError:
         await db.rollback()
-        raise HTTPException(status_code=400, detail="Email or username already registered")
-    return db_user
+        await _raise_duplicate_user(db, username, email)
+    return User(id=row.id, is_active=row.is_active, **values)
+
+
+@timed_query
+async def create_users(db: AsyncSession, rows: List[Dict[str, Any]]) -> list:
+    """Insert many users, skipping any whose username or email is already taken.
+
+    Rows are sent as one executemany, which SQLAlchemy batches into multi-row
+    INSERT ... ON CONFLICT DO NOTHING RETURNING statements. Returns
+    (id, username, email, is_active) for the rows actually inserted, left
+    uncommitted like create_user.
+    """
+    if not rows:
+        return []
+    returning = (User.id, User.username, User.email, User.is_active)
+    dialect_insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is not None:
+        result = await db.execute(dialect_insert(User).on_conflict_do_nothing().returning(*returning), rows)
+        return result.all()
+
+    # Generic fallback: one savepoint per row so a conflict only skips that row
+    created = []
+    for values in rows:
+        try:
+            async with db.begin_nested():
+                result = await db.execute(insert(User).values(**values).returning(*returning))
+            created.append(result.first())
+        except IntegrityError:
+            pass
+    return created
+
+
+@timed_query
+async def get_taken_usernames_and_emails(
+    db: AsyncSession, usernames: Sequence[str], emails: Sequence[str]
+) -> Tuple[Set[str], Set[str]]:
+    """Return which of the given usernames and emails already belong to a user, lowercased."""
+    lower_username, lower_email = func.lower(User.username), func.lower(User.email)
+    result = await db.execute(
+        select(lower_username, lower_email).where(
+            or_(lower_username.in_([u.lower() for u in usernames]), lower_email.in_([e.lower() for e in emails]))
+        )
+    )
+    rows = result.all()
+    return {row[0] for row in rows}, {row[1] for row in rows}
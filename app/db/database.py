@@ -1,15 +1,80 @@
 # DB connection and session management
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import asyncio
+import time
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from shared_libs.settings import SharedSettings
-import os
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.config import settings
+from app.core.metrics import DB_POOL_CHECKED_OUT, DB_POOL_OVERFLOW, DB_POOL_WAIT_SECONDS
 
-# Load settings
-settings = SharedSettings()
 
-DATABASE_URL = settings.DATABASE_URL
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that records how long checkouts wait for a connection."""
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - start)
+
+
+def create_engine_from_settings(settings, url: Optional[str] = None) -> AsyncEngine:
+    """Build the async engine with pool, statement cache and logging taken from settings.
+
+    ``url`` overrides DATABASE_URL, e.g. for a read replica; only the
+    primary engine reports pool metrics.
+    """
+    primary = url is None
+    url = make_url(settings.DATABASE_URL if primary else url)
+    engine_kwargs = {"echo": settings.DB_ECHO}
+
+    # In-memory SQLite uses a single static connection; there is no pool to tune
+    if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+        engine_kwargs.update(
+            poolclass=InstrumentedAsyncQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    if url.get_driver_name() == "asyncpg":
+        engine_kwargs["connect_args"] = {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+
+    engine = create_async_engine(url, **engine_kwargs)
+    pool = engine.pool
+    if primary and isinstance(pool, InstrumentedAsyncQueuePool):
+        # Read at scrape time, so there is no per-checkout cost
+        DB_POOL_CHECKED_OUT.set_function(pool.checkedout)
+        DB_POOL_OVERFLOW.set_function(lambda: max(pool.overflow(), 0))
+    return engine
+
+
+async def warm_up_pool(engine: AsyncEngine, connections: int) -> int:
+    """Open up to ``connections`` pooled connections concurrently so early requests skip the connect.
+
+    Returns how many connections were opened; they go back to the pool idle.
+    """
+    pool_size = engine.pool.size() if isinstance(engine.pool, QueuePool) else 1
+    connections = min(connections, pool_size)
+    if connections <= 0:
+        return 0
+    held = []
+    try:
+        for conn in await asyncio.gather(*(engine.connect() for _ in range(connections))):
+            held.append(conn)
+            await conn.execute(text("SELECT 1"))
+    finally:
+        for conn in held:
+            await conn.close()
+    return len(held)
+
+
+engine = create_engine_from_settings(settings)
 AsyncSessionLocal = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
 Base = declarative_base()
@@ -17,4 +82,4 @@ Base = declarative_base()
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
-# This code sets up the database connection using SQLAlchemy's async capabilities.
\ No newline at end of file
+# This code sets up the database connection using SQLAlchemy's async capabilities.
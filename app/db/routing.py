@@ -0,0 +1,158 @@
+# Routing of read-only lookups to read replicas, with fallback to the primary
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.core.metrics import DB_READS, DB_REPLICA_LAG_SECONDS
+from app.db.database import create_engine_from_settings
+from app.utils.tasks import cancel_task, run_forever
+
+logger = logging.getLogger(__name__)
+
+# Zero when the standby has replayed everything it received; otherwise the
+# age of the last replayed transaction (which alone would grow while idle)
+_POSTGRES_LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class Replica:
+    """A read replica and what the router last learned about it."""
+
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        self.lag: float = 0.0
+        self.down_until: float = 0.0
+
+    async def measure_lag(self) -> float:
+        async with self.engine.connect() as conn:
+            if self.engine.dialect.name == "postgresql":
+                return float((await conn.execute(_POSTGRES_LAG_QUERY)).scalar() or 0.0)
+            await conn.execute(text("SELECT 1"))
+            return 0.0
+
+
+class ReadRouter:
+    """Sends lag-tolerant, read-only lookups to replicas.
+
+    Only lookups that can tolerate slightly stale data are routed, via
+    ``read``; writes and anything that must see the latest state (token
+    revocations, token versions) keep using the primary session. Without
+    configured replicas ``read`` simply runs on the primary session. A replica
+    is skipped while its measured lag exceeds ``max_lag`` or for
+    ``retry_after`` seconds after a connection failure. With no replica
+    available the lookup runs on the primary.
+    """
+
+    def __init__(
+        self,
+        replicas: List[Replica],
+        max_lag: float = 5.0,
+        check_interval: float = 5.0,
+        retry_after: float = 30.0,
+    ):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.retry_after = retry_after
+        self._next = itertools.cycle(replicas) if replicas else None
+        self._task: Optional[asyncio.Task] = None
+
+    def pick(self) -> Optional[Replica]:
+        """Return the next healthy replica in round-robin order, or None."""
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            replica = next(self._next)
+            if replica.down_until <= now and replica.lag <= self.max_lag:
+                return replica
+        return None
+
+    def mark_down(self, replica: Replica):
+        replica.down_until = time.monotonic() + self.retry_after
+
+    async def read(
+        self, db: AsyncSession, query: Callable[..., Awaitable[Any]], *args, retry_missing: bool = True
+    ) -> Any:
+        """Run ``query(session, *args)`` on a replica, falling back to ``db``, the caller's primary session.
+
+        The primary is used when no replica is healthy, the replica fails,
+        or (with ``retry_missing``) the replica returns None because it may
+        not have caught up with a recent insert.
+        """
+        if not self.replicas:
+            return await query(db, *args)
+
+        replica = self.pick()
+        if replica is None:
+            DB_READS.labels("primary_no_replica").inc()
+            return await query(db, *args)
+        try:
+            async with replica.session_factory() as replica_db:
+                result = await query(replica_db, *args)
+        except (DBAPIError, OSError) as e:
+            logger.warning("Read replica %s failed, using the primary for %ds: %s", replica.name, self.retry_after, e)
+            self.mark_down(replica)
+            DB_READS.labels("primary_replica_failed").inc()
+            return await query(db, *args)
+        if result is None and retry_missing:
+            DB_READS.labels("primary_missing_on_replica").inc()
+            return await query(db, *args)
+        DB_READS.labels("replica").inc()
+        return result
+
+    async def check_replicas(self):
+        """Measure every replica's lag, marking unreachable ones down."""
+        for replica in self.replicas:
+            try:
+                replica.lag = await replica.measure_lag()
+                replica.down_until = 0.0
+            except Exception as e:
+                logger.warning("Read replica %s health check failed: %s", replica.name, e)
+                self.mark_down(replica)
+                continue
+            DB_REPLICA_LAG_SECONDS.labels(replica.name).set(replica.lag)
+            if replica.lag > self.max_lag:
+                logger.info("Read replica %s is %.1fs behind; reading from the primary", replica.name, replica.lag)
+
+    async def start(self):
+        """Start monitoring replica lag in the background."""
+        if self._task is None and self.replicas:
+            self._task = asyncio.create_task(
+                run_forever(self.check_replicas, lambda: self.check_interval, logger, "Read replica check failed: %s")
+            )
+
+    async def stop(self):
+        """Stop monitoring and close the replica engines."""
+        await cancel_task(self._task)
+        self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+def create_read_router(settings) -> ReadRouter:
+    """Build the router from DATABASE_REPLICA_URLS; with none configured every read uses the primary."""
+    urls = [url.strip() for url in (settings.DATABASE_REPLICA_URLS or "").split(",") if url.strip()]
+    replicas = [
+        Replica(make_url(url).render_as_string(hide_password=True), create_engine_from_settings(settings, url))
+        for url in urls
+    ]
+    return ReadRouter(
+        replicas,
+        max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+        check_interval=settings.DB_REPLICA_CHECK_SECONDS,
+        retry_after=settings.DB_REPLICA_RETRY_SECONDS,
+    )
+
+
+# Global instance
+read_router = create_read_router(settings)
@@ -1,22 +1,153 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.api.routes import router as auth_router
+from fastapi.middleware.asyncexitstack import AsyncExitStackMiddleware
+from app.api.routes import router as auth_router, well_known_router
+from app.config import settings
+from app.core.instrumentation import RequestMetricsMiddleware, metrics_response
+from app.core.lifecycle import InFlightRequests, RequestDrainMiddleware
+from app.core.metrics import APP_STARTUP_SECONDS, HTTP_REQUESTS_IN_FLIGHT
+from app.crud.user import get_token_version, get_user_by_id, get_user_by_login
+from app.db.database import AsyncSessionLocal, engine, warm_up_pool
+from app.db.routing import read_router
 from app.services.message_queue import message_queue_client
+from app.services.hashing import password_hasher
+from app.services.password_policy import calibrate_policy
+from app.services.revocation import blacklist_writer, revocation_cache
+from app.services.compaction import blacklist_compactor
+from app.services.outbox import outbox_relay
+from app.services.signing_keys import signing_key_ring
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
 
-# Include the authentication routes
-app.include_router(auth_router, prefix="/auth", tags=["auth"])
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize the message queue connection on startup."""
+async def _prime(app: FastAPI):
+    """Run the lazily initialised parts of the request path once, before real traffic.
+
+    The first routed request builds per-route state and compiles path
+    regexes, and the first use of each query compiles it; doing both here
+    keeps that work out of the first user's request.
+    """
+    async with AsyncSessionLocal() as db:
+        await get_user_by_id(db, 0)
+        await get_user_by_login(db, "")
+        await get_token_version(db, 0)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/", "raw_path": b"/", "root_path": "", "query_string": b"", "headers": [], "app": app,
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    # Skip the user middleware (metrics, drain), but keep the exit stack routes expect in the scope
+    await AsyncExitStackMiddleware(app.router)(scope, receive, send)
+
+
+async def _startup(app: FastAPI):
+    """Warm the connection pools and load keys and caches before taking traffic."""
+    if settings.PASSWORD_HASH_TARGET_SECONDS:
+        policy = await asyncio.to_thread(
+            calibrate_policy, password_hasher.policy, settings.PASSWORD_HASH_TARGET_SECONDS
+        )
+        password_hasher.use_policy(policy)
+        logger.info("Calibrated password hashing policy: %s", policy)
+
+    engines = [engine] + [replica.engine for replica in read_router.replicas]
+    results = await asyncio.gather(
+        *(warm_up_pool(e, settings.DB_POOL_WARMUP_CONNECTIONS) for e in engines), return_exceptions=True
+    )
+    for e, result in zip(engines, results):
+        if isinstance(result, BaseException):
+            logger.warning("Connection pool warm-up failed for %s: %s", e.url.render_as_string(hide_password=True), result)
+
+    await read_router.start()
+    await signing_key_ring.start()
+    # Load the blacklist now so the first authenticated requests are answered from memory
+    try:
+        async with AsyncSessionLocal() as db:
+            await revocation_cache.refresh(db, full=True)
+    except Exception as e:
+        logger.warning("Initial revocation cache load failed: %s", e)
+    message_queue_client.add_revocation_listener(revocation_cache)
+    await revocation_cache.start()
+    await blacklist_compactor.start()
     await message_queue_client.connect()
+    await outbox_relay.start()
+    try:
+        await _prime(app)
+    except Exception as e:
+        logger.warning("Request path priming failed: %s", e)
+
+
+async def _shutdown(in_flight: InFlightRequests):
+    """Drain requests, then pending writes and events, then release resources in reverse order."""
+    if not await in_flight.drain(settings.SHUTDOWN_DRAIN_SECONDS):
+        logger.warning("Shutting down with %d requests still in flight", in_flight.count)
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Close the message queue connection on shutdown."""
+    try:
+        await asyncio.wait_for(blacklist_writer.flush(), settings.SHUTDOWN_BLACKLIST_FLUSH_SECONDS)
+    except Exception as e:
+        logger.error("%d revocations were not written to the blacklist on shutdown: %r", blacklist_writer.pending, e)
+    await blacklist_writer.stop()
+
+    await outbox_relay.stop()
+    try:
+        await asyncio.wait_for(outbox_relay.drain(), settings.SHUTDOWN_OUTBOX_DRAIN_SECONDS)
+    except Exception as e:
+        logger.warning("Outbox not fully drained on shutdown; the next instance will relay the rest: %s", e)
+    await signing_key_ring.stop()
+    await blacklist_compactor.stop()
+    await revocation_cache.stop()
     await message_queue_client.close()
+    await read_router.stop()
+    await engine.dispose()
+    password_hasher.shutdown()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start = time.perf_counter()
+    await _startup(app)
+    startup_seconds = time.perf_counter() - start
+    APP_STARTUP_SECONDS.set(startup_seconds)
+    logger.info("Startup complete in %.3fs", startup_seconds)
+    try:
+        yield
+    finally:
+        await _shutdown(app.state.in_flight)
+
+
+def create_app() -> FastAPI:
+    """Build the application. Settings, engines and clients are process-wide and shared."""
+    app = FastAPI(lifespan=lifespan)
+    app.state.in_flight = InFlightRequests()
+    HTTP_REQUESTS_IN_FLIGHT.set_function(lambda: app.state.in_flight.count)
+
+    # Metrics wrap the drain check so turned-away requests are counted too
+    app.add_middleware(RequestDrainMiddleware, tracker=app.state.in_flight)
+    app.add_middleware(RequestMetricsMiddleware)
+
+    # Include the authentication routes
+    app.include_router(auth_router, prefix="/auth", tags=["auth"])
+    app.include_router(well_known_router, tags=["keys"])
+
+    @app.get("/")
+    def read_root():
+        return {"Hello": "World"}
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Prometheus scrape endpoint."""
+        return metrics_response()
+
+    return app
+
 
-@app.get("/")
-def read_root():
-    return {"Hello": "World"}
\ No newline at end of file
+app = create_app()
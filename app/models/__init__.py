@@ -1,2 +1,5 @@
 from .user import User
 from .token import TokenBlacklist
+from .outbox import OutboxEvent
+from .signing_key import SigningKey
+from .session import RefreshSession
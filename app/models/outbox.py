@@ -0,0 +1,21 @@
+# app/models/outbox.py
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from app.db.database import Base
+from app.utils.time import utcnow
+
+
+class OutboxEvent(Base):
+    """An event waiting to be relayed to the message queue.
+
+    Rows are written in the same transaction as the change they describe and
+    deleted once the broker has confirmed the publish.
+    """
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String, nullable=False)
+    routing_key = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=utcnow)
+    available_at = Column(DateTime, nullable=False, default=utcnow, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
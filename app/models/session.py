@@ -0,0 +1,25 @@
+# app/models/session.py
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from app.db.database import Base
+from app.utils.time import utcnow
+
+
+class RefreshSession(Base):
+    """A login session and its family of refresh tokens.
+
+    Every refresh token carries the session id and the generation it was
+    issued at. Rotating bumps ``generation``, so only the newest token of the
+    family is accepted; presenting an older one means the family leaked and
+    the whole session is revoked. ``token_version`` is the user's token
+    version at login; bumping the user's version ends every session at once.
+    """
+    __tablename__ = "refresh_sessions"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    generation = Column(Integer, nullable=False, default=0)
+    token_version = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=utcnow)
+    last_used_at = Column(DateTime, nullable=False, default=utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=True, index=True)
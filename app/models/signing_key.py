@@ -0,0 +1,24 @@
+# app/models/signing_key.py
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
+from app.db.database import Base
+from app.utils.time import utcnow
+
+
+class SigningKey(Base):
+    """A JWT signing key in the rotation ring.
+
+    A key is published in the JWKS from creation, signs tokens from
+    ``activates_at`` until a newer key activates, and is deleted at
+    ``expires_at``, once every token it signed has expired. ``generation`` is
+    unique so concurrent rotations from several workers settle on one key.
+    """
+    __tablename__ = "signing_keys"
+
+    kid = Column(String, primary_key=True)
+    generation = Column(Integer, nullable=False, unique=True)
+    algorithm = Column(String, nullable=False)
+    private_key = Column(Text, nullable=False)
+    public_jwk = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=utcnow)
+    activates_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=True)
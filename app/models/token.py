@@ -1,10 +1,13 @@
 # app/models/token.py
 from sqlalchemy import Column, String, DateTime
 from app.db.database import Base
+from app.utils.time import utcnow
 import datetime
 
+
 class TokenBlacklist(Base):
     __tablename__ = "token_blacklist"
 
     jti = Column(String, primary_key=True, index=True)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=False, default=utcnow, index=True)
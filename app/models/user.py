@@ -1,5 +1,5 @@
 # User model (ORM / Pydantic)
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Index, Integer, String, Boolean, func
 from app.db.database import Base
 
 class User(Base):
@@ -10,6 +10,14 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
+    # Bumped to invalidate every token issued to the user at once
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Usernames and emails are unique ignoring case, and login looks them up through these
+    __table_args__ = (
+        Index("ux_users_username_lower", func.lower(username), unique=True),
+        Index("ux_users_email_lower", func.lower(email), unique=True),
+    )
     
     def __repr__(self):
         return f"<User(id={self.id}, username={self.username}, email={self.email})>"
\ No newline at end of file
@@ -1,6 +1,10 @@
 # Pydantic schemas for request/response validation
-from pydantic import BaseModel, EmailStr, ConfigDict
-from typing import Optional
+import re
+from pydantic import BaseModel, EmailStr, ConfigDict, field_validator, model_validator
+from datetime import datetime
+from typing import List, Optional
+
+_BCRYPT_HASH = re.compile(r"^\$2[aby]\$\d\d\$[./A-Za-z0-9]{53}$")
 
 
 class UserBase(BaseModel):
@@ -8,12 +12,58 @@ class UserBase(BaseModel):
     username: str
     email: EmailStr
 
+    @field_validator("username")
+    @classmethod
+    def strip_username(cls, value: str) -> str:
+        # Logins accept a username or an email, so a username must never look like an email
+        value = value.strip()
+        if "@" in value:
+            raise ValueError("username must not contain '@'")
+        return value
+
 
 class UserCreate(UserBase):
     """Schema for creating a new user."""
     password: str
 
 
+class UserImport(UserBase):
+    """Schema for one row of a bulk user import.
+
+    Rows carry either a plaintext ``password`` or an existing bcrypt
+    ``password_hash`` migrated from another system.
+    """
+    password: Optional[str] = None
+    password_hash: Optional[str] = None
+
+    @field_validator("password_hash")
+    @classmethod
+    def check_password_hash(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None and not _BCRYPT_HASH.match(value):
+            raise ValueError("password_hash must be a bcrypt hash")
+        return value
+
+    @model_validator(mode="after")
+    def check_one_password(self):
+        if (self.password is None) == (self.password_hash is None):
+            raise ValueError("Provide exactly one of password or password_hash")
+        return self
+
+
+class UserImportError(BaseModel):
+    """Schema for a bulk import row that was not imported."""
+    line: int
+    username: Optional[str] = None
+    reason: str
+
+
+class UserImportResult(BaseModel):
+    """Schema for the outcome of a bulk user import."""
+    created: int = 0
+    failed: int = 0
+    errors: List[UserImportError] = []
+
+
 class UserCreateResponse(UserBase):
     """Schema for user creation response."""
     id: int
@@ -23,7 +73,7 @@ class UserCreateResponse(UserBase):
 
 
 class UserLogin(BaseModel):
-    """Schema for user login."""
+    """Schema for user login; ``username`` also accepts the email address, in any case."""
     username: str
     password: str
 
@@ -40,6 +90,35 @@ class TokenRefresh(BaseModel):
     refresh_token: str
 
 
+class SessionResponse(BaseModel):
+    """Schema for one of the user's login sessions."""
+    id: str
+    created_at: datetime
+    last_used_at: datetime
+    expires_at: datetime
+    current: bool = False
+
+
+class TokenIntrospectionRequest(BaseModel):
+    """Schema for a batch token introspection request."""
+    tokens: List[str]
+
+
+class TokenIntrospection(BaseModel):
+    """Schema for one introspected token; inactive tokens carry only ``active``."""
+    active: bool
+    sub: Optional[str] = None
+    user_id: Optional[int] = None
+    exp: Optional[int] = None
+    jti: Optional[str] = None
+    sid: Optional[str] = None
+
+
+class TokenIntrospectionResponse(BaseModel):
+    """Schema for a batch token introspection response, in request order."""
+    results: List[TokenIntrospection]
+
+
 class TokenData(BaseModel):
     """Schema for token data."""
     user_id: Optional[int] = None
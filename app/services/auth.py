@@ -1,47 +1,68 @@
 # Authentication service logic (signup, login, refresh, logout)
+import logging
+import secrets
 from datetime import timedelta, datetime, timezone
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.crud.user import get_user_by_username, get_user_by_email, create_user
-from app.utils.security import verify_password, create_access_token_wrapper, create_refresh_token_wrapper, decode_token_wrapper
-from shared_libs import SharedSettings
+from app.core.metrics import PASSWORD_REHASHES, REFRESH_TOKEN_REUSE
+from app.crud.session import create_refresh_session, get_refresh_session, rotate_refresh_session
+from app.crud.user import get_token_version, get_user_by_login, create_user, update_password_hash
+from app.db.routing import read_router
+from app.utils.security import create_access_token_wrapper, create_refresh_token_wrapper, decode_token_wrapper
+from app.config import settings
 from app.schemas.user import UserResponse, Token
 from fastapi import HTTPException, status
-from app.crud.token import add_token_to_blacklist, is_token_blacklisted
-from app.services.message_queue import message_queue_client
+from app.services.sessions import current_token_version, token_version_cache
+from app.services.revocation import end_session, revocation_cache, revoke_token
+from app.services.outbox import outbox_relay, record_user_created_event
+from app.services.hashing import password_hasher
+from app.services.rate_limit import login_rate_limiter
+from app.utils.time import utcnow
 
-# Load settings
-settings = SharedSettings()
+logger = logging.getLogger(__name__)
+
+def _issue_tokens(username: str, user_id: int, session_id: str, generation: int, token_version: int) -> Token:
+    """Create an access token and the refresh token for the given session generation."""
+    access_token = create_access_token_wrapper(
+        data={"sub": username, "user_id": user_id, "sid": session_id, "ver": token_version},
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    refresh_token = create_refresh_token_wrapper(
+        data={"sub": username, "user_id": user_id, "sid": session_id, "gen": generation, "ver": token_version},
+        expires_delta=timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+    )
+    return Token(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        token_type="bearer"
+    )
+
+async def _start_session(db: AsyncSession, username: str, user_id: int, token_version: int) -> Token:
+    expires_at = utcnow() + timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+    session = await create_refresh_session(db, user_id, expires_at, token_version)
+    return _issue_tokens(username, user_id, session.id, session.generation, token_version)
+
+# Verified against when the username does not exist, so unknown and known
+# usernames take the same time to reject; created on first use
+_dummy_hash: Optional[str] = None
+
+async def _get_dummy_hash() -> str:
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await password_hasher.hash(secrets.token_urlsafe(16))
+    return _dummy_hash
 
 async def signup(db: AsyncSession, username: str, email: str, password: str):
     """User signup service."""
-    # Check if user already exists
-    existing_user = await get_user_by_username(db, username)
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
+    # Duplicate usernames/emails are detected by the insert itself
+    user = await create_user(db, username, email, password)
 
-    # Check if email is already used
-    existing_email = await get_user_by_email(db, email)
-    if existing_email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
+    # Record the UserCreated event atomically with the user row; the outbox
+    # relay publishes it, so signup never waits on the message queue
+    record_user_created_event(db, user)
+    await db.commit()
+    outbox_relay.notify()
 
-    user = await create_user(db, username, email, password)
-    
-    # Prepare user data for the event
-    user_data = {
-        "id": user.id,
-        "username": user.username,
-        "email": user.email
-    }
-    
-    # Publish UserCreated event to message queue
-    await message_queue_client.publish_user_created_event(user_data)
-    
     return UserResponse(
         id=user.id,
         username=user.username,
@@ -49,43 +70,66 @@ async def signup(db: AsyncSession, username: str, email: str, password: str):
         is_active=user.is_active
     )
 
-async def login(db: AsyncSession, username: str, password: str):
-    """User login service."""
-    # Get user by username
-    user = await get_user_by_username(db, username)
-    if not user:
+async def login(db: AsyncSession, username: str, password: str, client_ip: Optional[str] = None):
+    """User login service; ``username`` may also be the user's email, in any case."""
+    username = username.strip()
+    # Throttled callers are rejected before any database or hashing work; the
+    # attempt holds its rate-limit slots from here on, so bursts can't overrun them
+    await login_rate_limiter.check(username, client_ip)
+
+    # Get user by username or email (from a read replica when configured). A
+    # replica miss is retried on the primary so users can log in right after
+    # signing up, despite replica lag; that second lookup for unknown names is
+    # bounded by the per-IP limit checked above.
+    try:
+        user = await read_router.read(db, get_user_by_login, username)
+
+        # Verify password (against a dummy hash for unknown users, to keep timing uniform)
+        hashed_password = user.hashed_password if user else await _get_dummy_hash()
+        verified = await password_hasher.verify(password, hashed_password)
+    except Exception:
+        # No verdict (e.g. a saturated hashing pool), so the attempt is not a failure
+        await login_rate_limiter.release(username)
+        raise
+
+    # Failures count against the account, whichever of its names was typed
+    logins = (user.username, user.email) if user else (username,)
+    if not verified or not user:
+        await login_rate_limiter.record(username, logins, success=False)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    # Verify password
-    if not verify_password(password, user.hashed_password):
+    await login_rate_limiter.record(username, logins, success=True)
+
+    # The plaintext is only available now, so upgrade hashes made under an older policy
+    if password_hasher.needs_update(user.hashed_password):
+        await _rehash_password(db, user, password)
+
+    # Neither the replica's row nor this worker's version cache may have seen a
+    # revoke-all, so stamp tokens with the primary's version and refresh the cache
+    token_version = await get_token_version(db, user.id)
+    if token_version is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    # Create tokens
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    refresh_token_expires = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
-    
-    access_token = create_access_token_wrapper(
-        data={"sub": user.username, "user_id": user.id},
-        expires_delta=access_token_expires
-    )
-    refresh_token = create_refresh_token_wrapper(
-        data={"sub": user.username, "user_id": user.id},
-        expires_delta=refresh_token_expires
-    )
-    
-    return Token(
-        access_token=access_token,
-        refresh_token=refresh_token,
-        token_type="bearer"
-    )
+    token_version_cache.set(user.id, token_version)
+
+    # Each login starts a new refresh-token family
+    return await _start_session(db, user.username, user.id, token_version)
+
+async def _rehash_password(db: AsyncSession, user, password: str):
+    """Store a hash made under the current policy; a failure here never fails the login."""
+    try:
+        new_hash = await password_hasher.hash(password)
+        if await update_password_hash(db, user.id, user.hashed_password, new_hash):
+            PASSWORD_REHASHES.labels(password_hasher.policy.scheme).inc()
+    except Exception as e:
+        await db.rollback()
+        logger.warning("Could not upgrade the password hash for user %s: %s", user.id, e)
 
 async def refresh_access_token(db: AsyncSession, refresh_token: str):
     """Refresh access token using refresh token."""
@@ -100,43 +144,66 @@ async def refresh_access_token(db: AsyncSession, refresh_token: str):
     if token_type != "refresh":
         raise credentials_exception
 
-    jti = payload.get("jti")
-    if not jti:
+    username = payload.get("sub")
+    user_id = payload.get("user_id")
+
+    if not username or not user_id:
         raise credentials_exception
 
-    if await is_token_blacklisted(db, jti):
+    # Tokens issued before the user's last revoke-all are dead, as is a deleted user's
+    token_version = await current_token_version(db, user_id)
+    if token_version is None or payload.get("ver", 0) != token_version:
         raise credentials_exception
 
-    username = payload.get("sub")
-    user_id = payload.get("user_id")
+    session_id = payload.get("sid")
+    if session_id is None:
+        return await _refresh_legacy_token(db, payload, token_version, credentials_exception)
 
-    if not username or not user_id:
+    generation = payload.get("gen")
+    if not isinstance(generation, int):
+        raise credentials_exception
+
+    # Rotate with a single conditional UPDATE; no blacklist row is written
+    now = utcnow()
+    expires_at = now + timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+    if await rotate_refresh_session(db, session_id, generation, now, expires_at):
+        return _issue_tokens(username, user_id, session_id, generation + 1, token_version)
+
+    # The session is revoked or expired, or an already-rotated token was
+    # replayed. A replay means the family leaked, so revoke the whole session.
+    session = await get_refresh_session(db, session_id)
+    if session is not None and session.revoked_at is None and session.generation > generation:
+        REFRESH_TOKEN_REUSE.inc()
+        logger.warning("Refresh token reuse detected for session %s (user %s); revoking it", session_id, user_id)
+        await end_session(db, session_id)
+    raise credentials_exception
+
+async def _refresh_legacy_token(
+    db: AsyncSession, payload: dict, token_version: int, credentials_exception: HTTPException
+) -> Token:
+    """Refresh a token issued before refresh sessions existed: blacklist it and move the client onto a session."""
+    jti = payload.get("jti")
+    if not jti:
+        raise credentials_exception
+
+    if await revocation_cache.is_revoked(db, jti, payload.get("exp")):
         raise credentials_exception
 
     # Blacklist the old refresh token
     exp = payload.get("exp")
     if exp:
         expires_at = datetime.fromtimestamp(exp, tz=timezone.utc)
-        await add_token_to_blacklist(db, jti, expires_at)
-
-    # Create new tokens
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    refresh_token_expires = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+        await revoke_token(db, jti, expires_at)
 
-    new_access_token = create_access_token_wrapper(
-        data={"sub": username, "user_id": user_id},
-        expires_delta=access_token_expires
-    )
-    new_refresh_token = create_refresh_token_wrapper(
-        data={"sub": username, "user_id": user_id},
-        expires_delta=refresh_token_expires
-    )
+    return await _start_session(db, payload["sub"], payload["user_id"], token_version)
 
-    return Token(
-        access_token=new_access_token,
-        refresh_token=new_refresh_token,
-        token_type="bearer"
-    )
-
-# Note: Logout is typically handled on the client side by removing the tokens
-# For server-side logout, we would need to maintain a token blacklist
\ No newline at end of file
+async def logout(db: AsyncSession, payload: dict):
+    """Log out: revoke the access token and, in O(1), the session it belongs to."""
+    jti = payload.get("jti")
+    exp = payload.get("exp")
+    if jti and exp:
+        expires_at = datetime.fromtimestamp(exp, tz=timezone.utc)
+        await revoke_token(db, jti, expires_at)
+    session_id = payload.get("sid")
+    if session_id:
+        await end_session(db, session_id)
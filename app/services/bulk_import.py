@@ -0,0 +1,196 @@
+# Bulk user import from NDJSON or CSV streams
+#
+# Served by POST /auth/admin/users/import, or run standalone:
+#   python -m app.services.bulk_import users.ndjson [--format csv] [--batch-size 1000]
+import argparse
+import asyncio
+import csv
+import json
+import logging
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, List, Tuple
+from pydantic import ValidationError
+from app.config import settings
+from app.core.metrics import BULK_IMPORT_ROWS, BULK_IMPORT_BATCH_SECONDS
+from app.crud.user import create_users, get_taken_usernames_and_emails
+from app.db.database import AsyncSessionLocal
+from app.schemas.user import UserImport, UserImportError, UserImportResult
+from app.services.hashing import PasswordHashingPool, password_hasher
+from app.services.outbox import outbox_relay, record_user_created_events
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Split a byte stream into lines without reading it all into memory; lines are decoded by the caller."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if buffer:
+        yield buffer.rstrip(b"\r")
+
+
+async def parse_records(chunks: AsyncIterable[bytes], fmt: str) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (line number, record) pairs; unparseable lines yield the error message instead of a dict.
+
+    CSV input needs a header row, and quoted fields may not contain newlines.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unknown import format: {fmt}")
+    header = None
+    line_no = 0
+    async for raw in iter_lines(chunks):
+        line_no += 1
+        try:
+            line = raw.decode()
+        except UnicodeDecodeError as e:
+            yield line_no, f"Invalid UTF-8: {e.reason} at byte {e.start}"
+            continue
+        if not line.strip():
+            continue
+        if fmt == "ndjson":
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                record = f"Invalid JSON: {e.msg}"
+            yield line_no, record if isinstance(record, (dict, str)) else "Expected a JSON object"
+        elif header is None:
+            header = next(csv.reader([line]))
+        else:
+            values = next(csv.reader([line]))
+            if len(values) != len(header):
+                yield line_no, f"Expected {len(header)} columns, got {len(values)}"
+            else:
+                yield line_no, {name: value for name, value in zip(header, values) if value != ""}
+
+
+class BulkUserImporter:
+    """Creates users in large batches.
+
+    Each batch hashes its plaintext passwords in parallel on the hashing pool,
+    inserts every row with one executemany, and stages the UserCreated events
+    in the same transaction. Rows that fail validation or collide with an
+    existing user are reported individually; the rest of the batch still
+    goes in.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        hasher: PasswordHashingPool = password_hasher,
+        batch_size: int = 1000,
+    ):
+        self.session_factory = session_factory
+        self.hasher = hasher
+        self.batch_size = batch_size
+
+    async def run(self, records: AsyncIterable[Tuple[int, Any]]) -> UserImportResult:
+        """Import every record, returning counts and per-row errors."""
+        result = UserImportResult()
+        batch: List[Tuple[int, UserImport]] = []
+        async for line, record in records:
+            if isinstance(record, str):
+                self._fail(result, line, None, record, "invalid")
+                continue
+            try:
+                batch.append((line, UserImport.model_validate(record)))
+            except ValidationError as e:
+                error = e.errors()[0]
+                field = ".".join(str(part) for part in error["loc"])
+                reason = f"{field}: {error['msg']}" if field else error["msg"]
+                self._fail(result, line, record.get("username"), reason, "invalid")
+                continue
+            if len(batch) >= self.batch_size:
+                await self._import_batch(batch, result)
+                batch = []
+        if batch:
+            await self._import_batch(batch, result)
+        return result
+
+    def _fail(self, result: UserImportResult, line: int, username, reason: str, kind: str):
+        result.failed += 1
+        result.errors.append(UserImportError(line=line, username=username, reason=reason))
+        BULK_IMPORT_ROWS.labels(kind).inc()
+
+    async def _import_batch(self, batch: List[Tuple[int, UserImport]], result: UserImportResult):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        # Duplicates inside the import itself, ignoring case: first occurrence wins
+        usernames, emails, unique = set(), set(), []
+        for line, user in batch:
+            if user.username.lower() in usernames or user.email.lower() in emails:
+                self._fail(result, line, user.username, "Duplicate username or email in import", "conflict")
+                continue
+            usernames.add(user.username.lower())
+            emails.add(user.email.lower())
+            unique.append((line, user))
+
+        plaintext = [user.password for _, user in unique if user.password is not None]
+        hashed = iter(await self.hasher.hash_many(plaintext))
+        rows: List[Dict[str, Any]] = [
+            {
+                "username": user.username,
+                "email": user.email,
+                "hashed_password": next(hashed) if user.password is not None else user.password_hash,
+            }
+            for _, user in unique
+        ]
+
+        async with self.session_factory() as db:
+            created = await create_users(db, rows)
+            await record_user_created_events(db, created)
+            await db.commit()
+
+            created_usernames = {row.username for row in created}
+            conflicts = [(line, user) for line, user in unique if user.username not in created_usernames]
+            if conflicts:
+                taken_usernames, _ = await get_taken_usernames_and_emails(
+                    db, [user.username for _, user in conflicts], [user.email for _, user in conflicts]
+                )
+                for line, user in conflicts:
+                    field = "Username" if user.username.lower() in taken_usernames else "Email"
+                    self._fail(result, line, user.username, f"{field} already registered", "conflict")
+
+        result.created += len(created)
+        BULK_IMPORT_ROWS.labels("created").inc(len(created))
+        BULK_IMPORT_BATCH_SECONDS.observe(loop.time() - start)
+        if created:
+            outbox_relay.notify()
+
+
+# Global instance
+bulk_user_importer = BulkUserImporter(batch_size=settings.BULK_IMPORT_BATCH_SIZE)
+
+
+async def _read_file(path: str, chunk_size: int = 1 << 16) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+async def _main():
+    parser = argparse.ArgumentParser(description="Import users from an NDJSON or CSV file.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=settings.BULK_IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    importer = BulkUserImporter(batch_size=args.batch_size)
+    try:
+        result = await importer.run(parse_records(_read_file(args.path), fmt))
+    finally:
+        importer.hasher.shutdown()
+    for error in result.errors:
+        print(f"line {error.line}: {error.reason}")
+    print(f"created={result.created} failed={result.failed}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -0,0 +1,124 @@
+# Background compaction of expired token_blacklist and refresh_sessions rows
+#
+# Runs inside the app on an interval, or standalone from cron:
+#   python -m app.services.compaction [--batch-size 5000] [--max-batches 0]
+import argparse
+import asyncio
+import datetime
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, Tuple
+from app.config import settings
+from app.core.metrics import BLACKLIST_ROWS_PURGED, BLACKLIST_COMPACTION_SECONDS, BLACKLIST_LAST_COMPACTION
+from app.crud.session import delete_expired_refresh_sessions
+from app.crud.token import delete_expired_tokens
+from app.db.database import AsyncSessionLocal
+from app.utils.tasks import cancel_task, run_forever
+from app.utils.time import utcnow
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CompactionResult:
+    rows_purged: int
+    batches: int
+    duration: float
+    sessions_purged: int = 0
+
+
+class BlacklistCompactor:
+    """Deletes expired blacklist rows, then expired refresh sessions, in small batches.
+
+    Each batch is its own short transaction so row locks are held only for
+    one batch, and the pause between batches leaves room for request traffic.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        batch_size: int = 5000,
+        batch_pause: float = 0.05,
+        interval: float = 3600.0,
+        max_batches: int = 0,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.interval = interval
+        self.max_batches = max_batches
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> CompactionResult:
+        """Purge every row that has expired, batch by batch."""
+        start = time.perf_counter()
+        now = utcnow()
+        rows_purged, batches = await self._purge(delete_expired_tokens, now)
+        BLACKLIST_ROWS_PURGED.inc(rows_purged)
+        sessions_purged, _ = await self._purge(delete_expired_refresh_sessions, now)
+
+        duration = time.perf_counter() - start
+        BLACKLIST_COMPACTION_SECONDS.observe(duration)
+        BLACKLIST_LAST_COMPACTION.set_to_current_time()
+        logger.info(
+            "Purged %d expired blacklist rows in %d batches and %d expired sessions (%.2fs)",
+            rows_purged, batches, sessions_purged, duration,
+        )
+        return CompactionResult(
+            rows_purged=rows_purged, batches=batches, duration=duration, sessions_purged=sessions_purged
+        )
+
+    async def _purge(self, delete_expired: Callable[..., Awaitable[int]], now: datetime.datetime) -> Tuple[int, int]:
+        rows_purged = 0
+        batches = 0
+        while not self.max_batches or batches < self.max_batches:
+            async with self.session_factory() as db:
+                deleted = await delete_expired(db, now, self.batch_size)
+            batches += 1
+            rows_purged += deleted
+            if deleted < self.batch_size:
+                break
+            await asyncio.sleep(self.batch_pause)
+        return rows_purged, batches
+
+    async def start(self):
+        """Start compacting on an interval; an interval of 0 disables the in-app job."""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(
+                run_forever(self.run_once, lambda: self.interval, logger, "Blacklist compaction failed: %s")
+            )
+
+    async def stop(self):
+        """Stop the background job."""
+        await cancel_task(self._task)
+        self._task = None
+
+
+# Global instance
+blacklist_compactor = BlacklistCompactor(
+    batch_size=settings.BLACKLIST_COMPACTION_BATCH_SIZE,
+    interval=settings.BLACKLIST_COMPACTION_INTERVAL_SECONDS,
+)
+
+
+async def _main():
+    parser = argparse.ArgumentParser(description="Delete expired token_blacklist and refresh_sessions rows.")
+    parser.add_argument("--batch-size", type=int, default=settings.BLACKLIST_COMPACTION_BATCH_SIZE)
+    parser.add_argument("--batch-pause", type=float, default=0.05, help="seconds to sleep between batches")
+    parser.add_argument("--max-batches", type=int, default=0, help="stop after this many batches (0 = no limit)")
+    args = parser.parse_args()
+
+    compactor = BlacklistCompactor(
+        batch_size=args.batch_size, batch_pause=args.batch_pause, max_batches=args.max_batches
+    )
+    result = await compactor.run_once()
+    print(
+        f"rows_purged={result.rows_purged} batches={result.batches} "
+        f"sessions_purged={result.sessions_purged} duration_seconds={result.duration:.3f}"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -0,0 +1,147 @@
+# Password hashing executor: keeps bcrypt/Argon2 work off the event loop
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, status
+from app.config import settings
+from app.core.metrics import (
+    PASSWORD_HASH_SECONDS,
+    PASSWORD_HASH_WAIT_SECONDS,
+    PASSWORD_HASH_IN_FLIGHT,
+    PASSWORD_HASH_REJECTED,
+)
+from app.services.password_policy import PasswordPolicy, create_password_policy
+
+
+def _timed_call(fn: Callable, *args) -> Tuple[object, float]:
+    """Run fn in the worker and report how long the computation itself took."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _hash_chunk(policy: PasswordPolicy, passwords: Sequence[str]) -> List[str]:
+    return [policy.hash(password) for password in passwords]
+
+
+class PasswordHashingPool:
+    def __init__(
+        self,
+        executor_kind: str = "process",
+        max_workers: int = 4,
+        max_queue: int = 64,
+        policy: Optional[PasswordPolicy] = None,
+    ):
+        if executor_kind not in ("process", "thread"):
+            raise ValueError(f"Unknown password hash executor: {executor_kind}")
+        self.policy = policy or PasswordPolicy()
+        self.executor_kind = executor_kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of calls running or waiting before new ones are rejected."""
+        return self.max_workers + self.max_queue
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def _run(self, operation: str, fn: Callable, *args):
+        # Reject instead of queueing unboundedly; a saturated pool means every
+        # queued caller would only wait longer.
+        if self._pending >= self.capacity:
+            PASSWORD_HASH_REJECTED.labels(operation).inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many concurrent authentication requests, please retry",
+                headers={"Retry-After": "1"},
+            )
+
+        self._pending += 1
+        PASSWORD_HASH_IN_FLIGHT.inc()
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            result, compute_time = await loop.run_in_executor(
+                self._get_executor(), _timed_call, fn, *args
+            )
+        finally:
+            self._pending -= 1
+            PASSWORD_HASH_IN_FLIGHT.dec()
+
+        total_time = time.perf_counter() - start
+        PASSWORD_HASH_SECONDS.labels(operation).observe(compute_time)
+        PASSWORD_HASH_WAIT_SECONDS.labels(operation).observe(max(total_time - compute_time, 0.0))
+        return result
+
+    def use_policy(self, policy: PasswordPolicy):
+        """Switch the policy for new hashes; it travels with each call, so workers need no restart."""
+        self.policy = policy
+
+    def needs_update(self, hashed_password: str) -> bool:
+        """Whether a stored hash is weaker than the current policy (cheap; runs inline)."""
+        return self.policy.needs_update(hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password in the worker pool."""
+        return await self._run("hash", self.policy.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash in the worker pool."""
+        return await self._run("verify", self.policy.verify, password, hashed_password)
+
+    async def hash_many(self, passwords: Sequence[str], chunk_size: int = 16,
+                        concurrency: Optional[int] = None) -> List[str]:
+        """Hash a batch of passwords for bulk jobs, preserving order.
+
+        Passwords go to the workers in chunks to cut per-task overhead. At most
+        ``concurrency`` chunks run at once (default: all workers but one) so
+        interactive logins still find a free worker. Batch work bypasses the
+        admission limit, which only guards request traffic.
+        """
+        if not passwords:
+            return []
+        limit = asyncio.Semaphore(concurrency or max(1, self.max_workers - 1))
+        loop = asyncio.get_running_loop()
+
+        async def run_chunk(chunk: Sequence[str]) -> List[str]:
+            async with limit:
+                hashed, compute_time = await loop.run_in_executor(
+                    self._get_executor(), _timed_call, _hash_chunk, self.policy, chunk
+                )
+            PASSWORD_HASH_SECONDS.labels("hash_many").observe(compute_time)
+            return hashed
+
+        chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+        results = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+        return [hashed for chunk in results for hashed in chunk]
+
+    def shutdown(self):
+        """Stop the worker pool, waiting for running calls to finish."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+# Global instance
+password_hasher = PasswordHashingPool(
+    executor_kind=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    policy=create_password_policy(settings),
+)
@@ -0,0 +1,175 @@
+# In-process stand-in for RabbitMQ, implementing the subset of aiormq used here
+import asyncio
+import itertools
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+
+@dataclass
+class DeliveredMessage:
+    body: bytes
+    exchange: str
+    routing_key: str
+    properties: Any = None
+    delivery_tag: int = 0
+
+
+@dataclass
+class DeclareOk:
+    queue: str
+
+
+@dataclass
+class _Queue:
+    name: str
+    messages: List[DeliveredMessage] = field(default_factory=list)
+    consumers: List[Callable] = field(default_factory=list)
+    auto_delete: bool = False
+
+
+class InMemoryBroker:
+    """A tiny exchange/queue router for tests and benchmarks.
+
+    Supports direct publishes to the default exchange, fanout exchanges and
+    push consumers. Use ``broker.connect`` wherever ``aiormq.connect`` is
+    expected. ``confirm_delay`` simulates the round-trip before the broker
+    confirms a publish.
+    """
+
+    def __init__(self, confirm_delay: float = 0.0):
+        self.confirm_delay = confirm_delay
+        self.exchanges: Dict[str, str] = {}
+        self.bindings: Dict[str, List[str]] = {}
+        self.queues: Dict[str, _Queue] = {}
+        self.connections: List["InMemoryConnection"] = []
+        self._names = itertools.count(1)
+        self._tags = itertools.count(1)
+
+    async def connect(self, url: str = "memory://", **kwargs) -> "InMemoryConnection":
+        connection = InMemoryConnection(self)
+        self.connections.append(connection)
+        return connection
+
+    def new_queue_name(self) -> str:
+        return f"amq.gen-{next(self._names)}"
+
+    def route(self, exchange: str, routing_key: str) -> List[_Queue]:
+        if not exchange:
+            queue = self.queues.get(routing_key)
+            return [queue] if queue else []
+        if self.exchanges.get(exchange) == "fanout":
+            return [self.queues[name] for name in self.bindings.get(exchange, []) if name in self.queues]
+        return []
+
+    def deliver(self, exchange: str, routing_key: str, body: bytes, properties: Any = None):
+        for queue in self.route(exchange, routing_key):
+            message = DeliveredMessage(body, exchange, routing_key, properties, next(self._tags))
+            if queue.consumers:
+                for consumer in queue.consumers:
+                    asyncio.get_running_loop().call_soon(_dispatch, consumer, message)
+            else:
+                queue.messages.append(message)
+
+    def drop_connections(self):
+        """Simulate the broker going away: close every open connection."""
+        for connection in list(self.connections):
+            connection.abort()
+
+
+def _dispatch(consumer: Callable, message: DeliveredMessage):
+    result = consumer(message)
+    if asyncio.iscoroutine(result):
+        asyncio.ensure_future(result)
+
+
+class InMemoryConnection:
+    def __init__(self, broker: InMemoryBroker):
+        self.broker = broker
+        self.closing: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.channels: List[InMemoryChannel] = []
+
+    @property
+    def is_closed(self) -> bool:
+        return self.closing.done()
+
+    async def channel(self) -> "InMemoryChannel":
+        channel = InMemoryChannel(self)
+        self.channels.append(channel)
+        return channel
+
+    def abort(self):
+        for channel in self.channels:
+            channel.release()
+        if self in self.broker.connections:
+            self.broker.connections.remove(self)
+        if not self.closing.done():
+            self.closing.set_result(None)
+
+    async def close(self):
+        self.abort()
+
+
+class InMemoryChannel:
+    def __init__(self, connection: InMemoryConnection):
+        self.connection = connection
+        self.broker = connection.broker
+        self._consumers: List[tuple] = []
+        self._exclusive_queues: List[str] = []
+
+    @property
+    def is_closed(self) -> bool:
+        return self.connection.is_closed
+
+    def _check_open(self):
+        if self.is_closed:
+            raise ConnectionError("Channel is closed")
+
+    async def exchange_declare(self, exchange: str, exchange_type: str = "direct", durable: bool = False, **kwargs):
+        self._check_open()
+        self.broker.exchanges.setdefault(exchange, exchange_type)
+
+    async def queue_declare(self, queue: str = "", durable: bool = False, exclusive: bool = False,
+                            auto_delete: bool = False, **kwargs) -> DeclareOk:
+        self._check_open()
+        name = queue or self.broker.new_queue_name()
+        self.broker.queues.setdefault(name, _Queue(name, auto_delete=auto_delete))
+        if exclusive:
+            self._exclusive_queues.append(name)
+        return DeclareOk(queue=name)
+
+    async def queue_bind(self, queue: str, exchange: str, routing_key: str = "", **kwargs):
+        self._check_open()
+        self.broker.bindings.setdefault(exchange, []).append(queue)
+
+    async def basic_consume(self, queue: str, consumer_callback: Callable, no_ack: bool = False, **kwargs):
+        self._check_open()
+        target = self.broker.queues[queue]
+        target.consumers.append(consumer_callback)
+        self._consumers.append((queue, consumer_callback))
+        backlog, target.messages = target.messages, []
+        for message in backlog:
+            asyncio.get_running_loop().call_soon(_dispatch, consumer_callback, message)
+
+    async def basic_publish(self, body: bytes, exchange: str = "", routing_key: str = "",
+                            properties: Any = None, **kwargs):
+        self._check_open()
+        self.broker.deliver(exchange, routing_key, body, properties)
+        if self.broker.confirm_delay:
+            await asyncio.sleep(self.broker.confirm_delay)
+
+    def release(self):
+        """Detach consumers and delete exclusive queues, as the broker does on disconnect."""
+        for queue, callback in self._consumers:
+            target = self.broker.queues.get(queue)
+            if target and callback in target.consumers:
+                target.consumers.remove(callback)
+        self._consumers = []
+        for name in self._exclusive_queues:
+            self.broker.queues.pop(name, None)
+            for bound in self.broker.bindings.values():
+                if name in bound:
+                    bound.remove(name)
+        self._exclusive_queues = []
+
+    async def close(self):
+        self.release()
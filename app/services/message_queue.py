@@ -1,43 +1,315 @@
 import asyncio
 import json
+import logging
+import time
+import uuid
+from collections import deque
 import aiormq
-from typing import Dict, Any
-from shared_libs.settings import SharedSettings
+from typing import Deque, Dict, Any, Callable, List, Optional, Protocol, Set, Tuple
+from app.config import settings
+from app.core.metrics import (
+    MQ_PUBLISH_QUEUE_DEPTH,
+    MQ_PUBLISH_IN_FLIGHT,
+    MQ_PUBLISH_FLUSH_SECONDS,
+    MQ_PUBLISH_BATCH_SIZE,
+    MQ_PUBLISH_CONFIRM_FAILURES,
+    MQ_PUBLISH_SECONDS,
+)
+from app.utils.tasks import cancel_task
+
+logger = logging.getLogger(__name__)
+
+_json_encoder = json.JSONEncoder(separators=(",", ":"))
+_PERSISTENT_JSON = aiormq.spec.Basic.Properties(
+    content_type="application/json",
+    delivery_mode=2  # Make message persistent
+)
+
+
+class RevocationListener(Protocol):
+    def on_revocation(self, jti: str, exp: float) -> None: ...
+    def on_session_revocation(self, session_id: str, until: float) -> None: ...
+    def on_subscribed(self) -> None: ...
+    def on_unsubscribed(self) -> None: ...
+
+
+class PublishBuffer:
+    """Batches confirmed publishes for a MessageQueueClient.
+
+    Events are queued in memory and flushed when ``batch_size`` are waiting or
+    ``flush_interval`` has passed since the first one arrived. Each flush
+    publishes its batch concurrently on the next channel of a small pool, so
+    confirms for many messages are awaited together instead of one round-trip
+    per message. At most ``max_in_flight`` messages await confirms at once;
+    beyond that, flushing waits, and beyond ``max_pending`` queued events
+    ``submit`` raises so callers can back off.
+    """
+
+    def __init__(
+        self,
+        client: "MessageQueueClient",
+        batch_size: int = 100,
+        flush_interval: float = 0.005,
+        max_in_flight: int = 1000,
+        pool_size: int = 4,
+        max_pending: int = 10000,
+    ):
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_in_flight = max_in_flight
+        self.pool_size = pool_size
+        self.max_pending = max_pending
+        self._pending: Deque[Tuple[str, bytes, asyncio.Future]] = deque()
+        self._has_items = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._in_flight = 0
+        self._window_open = asyncio.Event()
+        self._window_open.set()
+        self._channels: List[Any] = []
+        self._channels_connection = None
+        self._next_channel = 0
+        self._flushes: Set[asyncio.Task] = set()
+        self._force_flush = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def submit(self, routing_key: str, event: Dict[str, Any]) -> asyncio.Future:
+        """Queue an event; the returned future resolves once the broker confirms it."""
+        if len(self._pending) >= self.max_pending:
+            raise OverflowError("Message queue publish buffer is full")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((routing_key, _json_encoder.encode(event).encode(), future))
+        MQ_PUBLISH_QUEUE_DEPTH.set(len(self._pending))
+        self._has_items.set()
+        if len(self._pending) >= self.batch_size:
+            self._batch_full.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return future
+
+    async def publish(self, routing_key: str, event: Dict[str, Any]):
+        """Queue an event and wait for its confirm; raises if it was not confirmed."""
+        start = time.perf_counter()
+        try:
+            await self.submit(routing_key, event)
+        finally:
+            MQ_PUBLISH_SECONDS.observe(time.perf_counter() - start)
+
+    async def _run(self):
+        while True:
+            await self._has_items.wait()
+            if len(self._pending) < self.batch_size and not self._force_flush:
+                # Give the batch a short window to fill up
+                self._batch_full.clear()
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            while self._pending:
+                await self._window_open.wait()
+                room = min(self.batch_size, self.max_in_flight - self._in_flight)
+                batch = [self._pending.popleft() for _ in range(min(room, len(self._pending)))]
+                MQ_PUBLISH_QUEUE_DEPTH.set(len(self._pending))
+                self._track_in_flight(len(batch))
+                task = asyncio.get_running_loop().create_task(self._send(batch))
+                self._flushes.add(task)
+                task.add_done_callback(self._flushes.discard)
+            self._has_items.clear()
+
+    def _track_in_flight(self, delta: int):
+        self._in_flight += delta
+        MQ_PUBLISH_IN_FLIGHT.set(self._in_flight)
+        if self._in_flight >= self.max_in_flight:
+            self._window_open.clear()
+        else:
+            self._window_open.set()
+
+    async def _get_channel(self):
+        connection = self.client.connection
+        if connection is None or not self.client.channel:
+            raise ConnectionError("Message queue not available")
+        if connection is not self._channels_connection:
+            # Reconnected: the old pool belongs to a dead connection
+            self._channels = []
+            self._channels_connection = connection
+        self._channels = [channel for channel in self._channels if not getattr(channel, "is_closed", False)]
+        if len(self._channels) < self.pool_size:
+            channel = await connection.channel()
+            self._channels.append(channel)
+            return channel
+        self._next_channel = (self._next_channel + 1) % len(self._channels)
+        return self._channels[self._next_channel]
+
+    async def _send(self, batch: List[Tuple[str, bytes, asyncio.Future]]):
+        start = time.perf_counter()
+        try:
+            channel = await self._get_channel()
+            results = await asyncio.gather(
+                *(
+                    channel.basic_publish(body=body, routing_key=routing_key, properties=_PERSISTENT_JSON)
+                    for routing_key, body, _ in batch
+                ),
+                return_exceptions=True,
+            )
+        except Exception as e:
+            results = [e] * len(batch)
+        finally:
+            self._track_in_flight(-len(batch))
+
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                MQ_PUBLISH_CONFIRM_FAILURES.inc()
+                future.set_exception(result)
+            else:
+                future.set_result(None)
+        MQ_PUBLISH_BATCH_SIZE.observe(len(batch))
+        MQ_PUBLISH_FLUSH_SECONDS.observe(time.perf_counter() - start)
+
+    async def flush(self):
+        """Publish everything queued so far and wait for the confirms."""
+        self._force_flush = True
+        self._batch_full.set()
+        try:
+            waiting = [future for _, _, future in self._pending] + list(self._flushes)
+            if waiting:
+                await asyncio.gather(*waiting, return_exceptions=True)
+        finally:
+            self._force_flush = False
+
+    async def close(self):
+        """Flush pending events, then stop the flusher and drop the channel pool."""
+        if self._task is not None:
+            await self.flush()
+            await cancel_task(self._task)
+            self._task = None
+        self._channels = []
+        self._channels_connection = None
 
-# Load settings
-settings = SharedSettings()
 
 class MessageQueueClient:
-    def __init__(self):
+    def __init__(
+        self,
+        connect: Optional[Callable] = None,
+        reconnect_interval: float = 5.0,
+        publish_batch_size: int = 100,
+        publish_flush_interval: float = 0.005,
+        publish_max_in_flight: int = 1000,
+        publish_channel_pool_size: int = 4,
+    ):
         self.connection = None
         self.channel = None
         self.queue_name = "user_events"
-        
+        self.revocation_exchange = "token_revocations"
+        self.instance_id = uuid.uuid4().hex
+        self.reconnect_interval = reconnect_interval
+        self._connect = connect
+        self._revocation_listeners: List[RevocationListener] = []
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closed = False
+        self.publish_buffer = PublishBuffer(
+            self,
+            batch_size=publish_batch_size,
+            flush_interval=publish_flush_interval,
+            max_in_flight=publish_max_in_flight,
+            pool_size=publish_channel_pool_size,
+        )
+
     async def connect(self):
         """Connect to the message queue."""
+        self._closed = False
         try:
             # Connect to RabbitMQ
-            self.connection = await aiormq.connect(settings.RABBITMQ_URL)
+            connect = self._connect or aiormq.connect
+            self.connection = await connect(settings.RABBITMQ_URL)
             self.channel = await self.connection.channel()
             # Declare a queue for user events
             await self.channel.queue_declare(self.queue_name, durable=True)
+            # Declare the fanout exchange every instance receives revocations from
+            await self.channel.exchange_declare(
+                exchange=self.revocation_exchange, exchange_type="fanout", durable=True
+            )
+            if self._revocation_listeners:
+                await self._subscribe_revocations()
+            self._watch_connection()
         except Exception as e:
-            print(f"Failed to connect to message queue: {e}")
+            logger.warning("Failed to connect to message queue: %s", e)
             # We don't want to crash the service if the message queue is unavailable
             self.connection = None
             self.channel = None
-    
+            self._schedule_reconnect()
+
+    def _watch_connection(self):
+        closing = getattr(self.connection, "closing", None)
+        if isinstance(closing, asyncio.Future):
+            closing.add_done_callback(self._on_connection_lost)
+
+    def _on_connection_lost(self, _future):
+        self.connection = None
+        self.channel = None
+        for listener in self._revocation_listeners:
+            listener.on_unsubscribed()
+        if not self._closed:
+            logger.warning("Message queue connection lost, reconnecting")
+            self._schedule_reconnect()
+
+    def _schedule_reconnect(self):
+        # Only the revocation subscription needs a live connection; publishers
+        # connect lazily.
+        if self._closed or not self._revocation_listeners:
+            return
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect_later())
+
+    async def _reconnect_later(self):
+        await asyncio.sleep(self.reconnect_interval)
+        self._reconnect_task = None
+        if not self._closed and not self.channel:
+            # A failed attempt schedules the next one from connect()
+            await self.connect()
+
+    async def _subscribe_revocations(self):
+        declare_ok = await self.channel.queue_declare(exclusive=True, auto_delete=True)
+        await self.channel.queue_bind(declare_ok.queue, self.revocation_exchange)
+        await self.channel.basic_consume(declare_ok.queue, self._on_revocation_message, no_ack=True)
+        # Subscribed first, so listeners resyncing now cannot miss a revocation
+        for listener in self._revocation_listeners:
+            listener.on_subscribed()
+
+    async def _on_revocation_message(self, message):
+        try:
+            event = json.loads(message.body)
+        except ValueError:
+            logger.warning("Ignoring malformed token revocation message")
+            return
+        if event.get("origin") == self.instance_id:
+            return
+        for listener in self._revocation_listeners:
+            if "sid" in event:
+                listener.on_session_revocation(event["sid"], event["exp"])
+            else:
+                listener.on_revocation(event["jti"], event["exp"])
+
+    def add_revocation_listener(self, listener: RevocationListener):
+        """Deliver token revocations broadcast by every instance to listener."""
+        self._revocation_listeners.append(listener)
+
     async def publish_user_created_event(self, user_data: Dict[str, Any]):
         """Publish a UserCreated event to the message queue."""
         # If we're not connected to the message queue, try to connect
         if not self.connection or not self.channel:
             await self.connect()
-            
+
         # If we still can't connect, log and continue (don't block user creation)
         if not self.connection or not self.channel:
-            print("Warning: Message queue not available, UserCreated event not published")
+            logger.warning("Message queue not available, UserCreated event not published")
             return
-            
+
         try:
             # Create the event payload
             event = {
@@ -47,7 +319,7 @@ class MessageQueueClient:
                 "email": user_data["email"],
                 "timestamp": asyncio.get_event_loop().time()
             }
-            
+
             # Publish the event to the queue
             await self.channel.basic_publish(
                 body=json.dumps(event).encode(),
@@ -57,16 +329,59 @@ class MessageQueueClient:
                     delivery_mode=2  # Make message persistent
                 )
             )
-            print(f"Published UserCreated event for user {user_data['id']}")
+            logger.info("Published UserCreated event for user %s", user_data['id'])
         except Exception as e:
-            print(f"Failed to publish UserCreated event: {e}")
+            logger.warning("Failed to publish UserCreated event: %s", e)
             # We don't want to block user creation if the message queue fails
             # In a production system, you might want to implement retry logic or dead letter queues
 
+    async def publish_event(self, routing_key: str, event: Dict[str, Any]):
+        """Publish a persistent event through the publish buffer and wait for the broker's confirm.
+
+        Unlike publish_user_created_event, failures are raised so the caller
+        can retry; a nack or a lost connection raises too.
+        """
+        if not self.connection or not self.channel:
+            raise ConnectionError("Message queue not available")
+        await self.publish_buffer.publish(routing_key, event)
+
+    async def publish_token_revoked(self, jti: str, exp: float):
+        """Broadcast a revoked JTI to every instance's revocation cache."""
+        await self._publish_revocation({"jti": jti, "exp": exp})
+
+    async def publish_session_revoked(self, session_id: str, until: float):
+        """Broadcast a revoked session, whose access tokens all expire by until, to every instance."""
+        await self._publish_revocation({"sid": session_id, "exp": until})
+
+    async def _publish_revocation(self, event: Dict[str, Any]):
+        # Never connect on the request path; instances that miss the broadcast
+        # still pick the revocation up from the database on their next refresh.
+        if not self.channel:
+            return
+        try:
+            await self.channel.basic_publish(
+                body=json.dumps({**event, "origin": self.instance_id}).encode(),
+                exchange=self.revocation_exchange,
+                routing_key="",
+                properties=aiormq.spec.Basic.Properties(content_type="application/json"),
+            )
+        except Exception as e:
+            logger.warning("Failed to broadcast revocation: %s", e)
+
     async def close(self):
         """Close the connection to the message queue."""
+        self._closed = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        await self.publish_buffer.close()
         if self.connection:
             await self.connection.close()
 
 # Global instance
-message_queue_client = MessageQueueClient()
\ No newline at end of file
+message_queue_client = MessageQueueClient(
+    publish_batch_size=settings.MQ_PUBLISH_BATCH_SIZE,
+    publish_flush_interval=settings.MQ_PUBLISH_FLUSH_SECONDS,
+    publish_max_in_flight=settings.MQ_PUBLISH_MAX_IN_FLIGHT,
+    publish_channel_pool_size=settings.MQ_PUBLISH_CHANNEL_POOL_SIZE,
+)
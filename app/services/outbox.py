@@ -0,0 +1,134 @@
+# Relay from the transactional outbox to the message queue
+import asyncio
+import datetime
+import logging
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.core.metrics import OUTBOX_EVENTS_PUBLISHED, OUTBOX_PUBLISH_FAILURES, OUTBOX_DELIVERY_LAG_SECONDS
+from app.crud.outbox import add_outbox_event, add_outbox_events, claim_outbox_events, delete_outbox_events
+from app.db.database import AsyncSessionLocal
+from app.services.message_queue import MessageQueueClient, message_queue_client
+from app.utils.tasks import cancel_task, run_forever
+from app.utils.time import utcnow
+
+logger = logging.getLogger(__name__)
+
+
+def _user_created_payload(user) -> Dict[str, Any]:
+    return {
+        "event_id": uuid.uuid4().hex,
+        "event_type": "UserCreated",
+        "user_id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "timestamp": time.time(),
+    }
+
+
+def record_user_created_event(db: AsyncSession, user) -> None:
+    """Stage a UserCreated event in the transaction that creates the user."""
+    add_outbox_event(db, "UserCreated", message_queue_client.queue_name, _user_created_payload(user))
+
+
+async def record_user_created_events(db: AsyncSession, users: Iterable) -> None:
+    """Stage UserCreated events for a batch of new users in their transaction."""
+    await add_outbox_events(
+        db, "UserCreated", message_queue_client.queue_name, [_user_created_payload(user) for user in users]
+    )
+
+
+class OutboxRelay:
+    """Drains outbox_events to the broker in batches.
+
+    Each batch is published concurrently on the confirm-mode channel; events
+    the broker confirms are deleted, the rest are retried with exponential
+    backoff. Delivery is at-least-once, so consumers should de-duplicate on
+    ``event_id``.
+    """
+
+    def __init__(
+        self,
+        client: MessageQueueClient = message_queue_client,
+        session_factory: Callable = AsyncSessionLocal,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        max_backoff: float = 300.0,
+    ):
+        self.client = client
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self):
+        """Wake the relay after committing new events."""
+        self._wakeup.set()
+
+    async def relay_batch(self) -> int:
+        """Publish one batch of due events; returns how many were confirmed."""
+        if not self.client.channel:
+            await self.client.connect()
+            if not self.client.channel:
+                return 0
+
+        now = utcnow()
+        async with self.session_factory() as db:
+            events = await claim_outbox_events(db, now, self.batch_size)
+            if not events:
+                return 0
+
+            results = await asyncio.gather(
+                *(self.client.publish_event(event.routing_key, event.payload) for event in events),
+                return_exceptions=True,
+            )
+
+            confirmed = []
+            for event, result in zip(events, results):
+                if isinstance(result, BaseException):
+                    event.attempts += 1
+                    backoff = min(self.max_backoff, 2 ** event.attempts)
+                    event.available_at = now + datetime.timedelta(seconds=backoff)
+                    OUTBOX_PUBLISH_FAILURES.labels(event.event_type).inc()
+                    logger.warning("Failed to relay outbox event %s (attempt %d): %s", event.id, event.attempts, result)
+                else:
+                    confirmed.append(event.id)
+                    OUTBOX_EVENTS_PUBLISHED.labels(event.event_type).inc()
+                    OUTBOX_DELIVERY_LAG_SECONDS.observe((now - event.created_at).total_seconds())
+
+            await delete_outbox_events(db, confirmed)
+            await db.commit()
+            return len(confirmed)
+
+    async def drain(self) -> int:
+        """Relay batches until nothing due is left or a batch makes no progress."""
+        total = 0
+        while True:
+            relayed = await self.relay_batch()
+            total += relayed
+            if relayed < self.batch_size:
+                return total
+
+    async def start(self):
+        """Start relaying in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(
+                run_forever(self.drain, lambda: self.poll_interval, logger, "Outbox relay failed: %s", wakeup=self._wakeup)
+            )
+
+    async def stop(self):
+        """Stop the relay; undelivered events stay in the outbox for the next start."""
+        await cancel_task(self._task)
+        self._task = None
+
+
+# Global instance
+outbox_relay = OutboxRelay(
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    poll_interval=settings.OUTBOX_POLL_SECONDS,
+    max_backoff=settings.OUTBOX_MAX_BACKOFF_SECONDS,
+)
@@ -0,0 +1,114 @@
+# Password hashing policy: scheme and cost parameters, outdated-hash detection and calibration
+import math
+import time
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from passlib.hash import argon2, bcrypt
+
+SCHEMES = ("bcrypt", "argon2")
+
+
+@lru_cache(maxsize=None)
+def _argon2_hasher(time_cost: int, memory_cost: int, parallelism: int):
+    return argon2.using(type="ID", time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+
+
+@lru_cache(maxsize=None)
+def _bcrypt_hasher(rounds: int):
+    return bcrypt.using(rounds=rounds)
+
+
+def _scheme_of(hashed_password: str):
+    if hashed_password.startswith("$argon2"):
+        return "argon2"
+    if hashed_password.startswith(("$2a$", "$2b$", "$2y$")):
+        return "bcrypt"
+    return None
+
+
+@dataclass(frozen=True)
+class PasswordPolicy:
+    """How new password hashes are made, and which stored ones are too weak.
+
+    New hashes use ``scheme`` with the given cost. Hashes of either scheme
+    verify regardless of their cost; ``needs_update`` flags the ones made
+    with another scheme or a lower cost, so they can be replaced at the next
+    successful login. Instances are immutable and picklable, so they are
+    passed to process-pool workers with each call.
+    """
+    scheme: str = "bcrypt"
+    bcrypt_rounds: int = 12
+    argon2_time_cost: int = 2
+    argon2_memory_cost: int = 19456  # KiB
+    argon2_parallelism: int = 1
+
+    def __post_init__(self):
+        if self.scheme not in SCHEMES:
+            raise ValueError(f"Unknown password hash scheme: {self.scheme}")
+
+    def hash(self, password: str) -> str:
+        if self.scheme == "argon2":
+            hasher = _argon2_hasher(self.argon2_time_cost, self.argon2_memory_cost, self.argon2_parallelism)
+        else:
+            hasher = _bcrypt_hasher(self.bcrypt_rounds)
+        return hasher.hash(password)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        scheme = _scheme_of(hashed_password)
+        if scheme == "argon2":
+            return argon2.verify(password, hashed_password)
+        if scheme == "bcrypt":
+            return bcrypt.verify(password, hashed_password)
+        return False
+
+    def needs_update(self, hashed_password: str) -> bool:
+        """True if the hash uses another scheme or a lower cost than this policy."""
+        scheme = _scheme_of(hashed_password)
+        if scheme is None:
+            return False
+        if scheme != self.scheme:
+            return True
+        if scheme == "bcrypt":
+            return bcrypt.from_string(hashed_password).rounds < self.bcrypt_rounds
+        parsed = argon2.from_string(hashed_password)
+        return (
+            parsed.type != "id"
+            or parsed.rounds < self.argon2_time_cost
+            or parsed.memory_cost < self.argon2_memory_cost
+        )
+
+
+def _time_one_hash(policy: PasswordPolicy) -> float:
+    start = time.perf_counter()
+    policy.hash("calibration-password")
+    return time.perf_counter() - start
+
+
+def calibrate_policy(
+    policy: PasswordPolicy, target_seconds: float, max_bcrypt_rounds: int = 16, max_argon2_time_cost: int = 10
+) -> PasswordPolicy:
+    """Raise the policy's cost so one hash takes at most about target_seconds on this machine.
+
+    The configured cost is a floor: calibration never weakens hashing on
+    slow hardware, it only spends spare budget on fast hardware. bcrypt
+    time doubles per round; Argon2 time grows linearly with time_cost at a
+    fixed memory cost.
+    """
+    elapsed = _time_one_hash(policy)
+    if elapsed >= target_seconds:
+        return policy
+    if policy.scheme == "bcrypt":
+        extra = int(math.floor(math.log2(target_seconds / elapsed)))
+        return replace(policy, bcrypt_rounds=min(max_bcrypt_rounds, policy.bcrypt_rounds + extra))
+    time_cost = int(policy.argon2_time_cost * target_seconds / elapsed)
+    return replace(policy, argon2_time_cost=max(policy.argon2_time_cost, min(max_argon2_time_cost, time_cost)))
+
+
+def create_password_policy(settings) -> PasswordPolicy:
+    return PasswordPolicy(
+        scheme=settings.PASSWORD_HASH_SCHEME,
+        bcrypt_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+        argon2_time_cost=settings.PASSWORD_ARGON2_TIME_COST,
+        argon2_memory_cost=settings.PASSWORD_ARGON2_MEMORY_KIB,
+        argon2_parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+    )
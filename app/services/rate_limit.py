@@ -0,0 +1,155 @@
+# Sliding-window rate limiting for login attempts
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Iterable, Optional, Protocol
+from fastapi import HTTPException, status
+from app.config import settings
+from app.core.metrics import LOGIN_RATE_LIMITED
+
+
+class RateLimitBackend(Protocol):
+    """Storage for sliding-window event logs.
+
+    The in-memory backend limits each worker on its own; a shared backend
+    (e.g. Redis sorted sets) can implement the same calls to enforce limits
+    across the fleet. ``acquire`` must check and record in one atomic step
+    (a Lua script on Redis), or concurrent attempts all get through.
+    """
+
+    async def acquire(self, key: str, limit: int, window: float) -> float:
+        """Record an event for key if under the limit and return 0, else the seconds until a slot opens."""
+
+    async def record(self, key: str, limit: int, window: float) -> None:
+        """Record an event for key."""
+
+    async def release(self, key: str) -> None:
+        """Drop the newest event for key, undoing an ``acquire``."""
+
+    async def clear(self, key: str) -> None:
+        """Forget every event for key."""
+
+
+class InMemoryRateLimitBackend:
+    """Per-process sliding-window log.
+
+    Only the newest ``limit`` timestamps are kept per key, and the least
+    recently used keys are evicted beyond ``max_keys``, so memory stays
+    bounded under a flood of distinct usernames or addresses.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._events: "OrderedDict[str, Deque[float]]" = OrderedDict()
+
+    async def retry_after(self, key: str, limit: int, window: float) -> float:
+        events = self._events.get(key)
+        if events is None or len(events) < limit:
+            return 0.0
+        # The log is full; the next slot opens when its oldest event leaves the window
+        return max(0.0, events[0] + window - time.monotonic())
+
+    async def acquire(self, key: str, limit: int, window: float) -> float:
+        # No await between the check and the record, so this is atomic on the event loop
+        retry_after = await self.retry_after(key, limit, window)
+        if not retry_after:
+            await self.record(key, limit, window)
+        return retry_after
+
+    async def record(self, key: str, limit: int, window: float) -> None:
+        events = self._events.get(key)
+        if events is None:
+            events = self._events[key] = deque(maxlen=limit)
+            while len(self._events) > self.max_keys:
+                self._events.popitem(last=False)
+        else:
+            self._events.move_to_end(key)
+        events.append(time.monotonic())
+
+    async def release(self, key: str) -> None:
+        events = self._events.get(key)
+        if events:
+            events.pop()
+
+    async def clear(self, key: str) -> None:
+        self._events.pop(key, None)
+
+
+class LoginRateLimiter:
+    """Throttles login attempts per client IP and failed attempts per account.
+
+    ``check`` runs before any database or hashing work, so a throttled caller
+    costs only a dictionary lookup. It reserves the attempt's IP slot and a
+    pending failure for the typed name in the same step, so a burst of
+    concurrent guesses is cut off at the limit instead of all passing the
+    check before any of them is counted. ``record`` settles the reservation:
+    a success clears the account's failures, and a failure is also counted
+    under the account's other login name, so the username and email share one
+    budget. ``release`` hands the reservation back when an attempt ends
+    without a verdict, e.g. because the hashing pool was saturated.
+    """
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        ip_limit: int = 30,
+        ip_window: float = 60.0,
+        username_limit: int = 5,
+        username_window: float = 300.0,
+    ):
+        self.backend = backend
+        self.ip_limit = ip_limit
+        self.ip_window = ip_window
+        self.username_limit = username_limit
+        self.username_window = username_window
+
+    @staticmethod
+    def _username_key(username: str) -> str:
+        return f"login:user:{username.lower()}"
+
+    @staticmethod
+    def _ip_key(client_ip: str) -> str:
+        return f"login:ip:{client_ip}"
+
+    async def check(self, username: str, client_ip: Optional[str] = None):
+        """Reserve this attempt's IP slot and a pending username failure, or raise 429 if either is full."""
+        username_key = self._username_key(username)
+        retry_after = await self.backend.acquire(username_key, self.username_limit, self.username_window)
+        scope = "username"
+        if client_ip and not retry_after:
+            retry_after = await self.backend.acquire(self._ip_key(client_ip), self.ip_limit, self.ip_window)
+            scope = "ip"
+            if retry_after:
+                await self.backend.release(username_key)
+        if retry_after:
+            LOGIN_RATE_LIMITED.labels(scope).inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, please retry later",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    async def release(self, username: str):
+        """Give back the username failure ``check`` reserved, for an attempt that was never judged."""
+        await self.backend.release(self._username_key(username))
+
+    async def record(self, username: str, logins: Iterable[str], success: bool):
+        """Settle the attempt ``check`` reserved for ``username`` against each of the account's login names."""
+        reserved = self._username_key(username)
+        keys = {self._username_key(login) for login in logins}
+        if success:
+            for key in keys | {reserved}:
+                await self.backend.clear(key)
+        else:
+            for key in keys - {reserved}:
+                await self.backend.record(key, self.username_limit, self.username_window)
+
+
+# Global instance
+login_rate_limiter = LoginRateLimiter(
+    backend=InMemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS),
+    ip_limit=settings.LOGIN_RATE_LIMIT_IP_ATTEMPTS,
+    ip_window=settings.LOGIN_RATE_LIMIT_IP_WINDOW_SECONDS,
+    username_limit=settings.LOGIN_RATE_LIMIT_USERNAME_FAILURES,
+    username_window=settings.LOGIN_RATE_LIMIT_USERNAME_WINDOW_SECONDS,
+)
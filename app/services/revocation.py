@@ -0,0 +1,411 @@
+# Revoked-token cache so get_current_user can skip the blacklist query, and write-behind blacklist inserts
+import asyncio
+import datetime
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.core.metrics import (
+    BLACKLIST_WRITE_BATCH_SIZE,
+    BLACKLIST_WRITE_FAILURES,
+    BLACKLIST_WRITE_PENDING,
+    REVOCATION_LOOKUPS,
+    REVOCATION_LOOKUP_SECONDS,
+    REVOCATION_CACHE_FILTERS,
+)
+from app.crud.token import (
+    add_token_to_blacklist,
+    add_tokens_to_blacklist,
+    get_blacklisted_jtis,
+    get_blacklisted_tokens,
+    is_token_blacklisted,
+)
+from app.crud.session import get_revoked_session_ids, get_revoked_sessions, revoke_refresh_session
+from app.db.database import AsyncSessionLocal
+from app.services.message_queue import message_queue_client
+from app.utils.bloom import BloomFilter
+from app.utils.tasks import cancel_task, run_forever
+from app.utils.time import utcnow
+
+logger = logging.getLogger(__name__)
+
+
+def _timestamp(value: datetime.datetime) -> float:
+    """Epoch seconds for a datetime; naive values are stored as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
+
+
+class BlacklistWriter:
+    """Write-behind buffer for token_blacklist inserts.
+
+    Revocations from many requests are queued in memory and written with one
+    multi-row insert and commit once ``batch_size`` are waiting or
+    ``flush_interval`` has passed since the first one arrived. Until its row
+    is committed, a queued JTI is reported as revoked by the revocation cache
+    on this instance (``jti in writer``), and other instances learn of it
+    from the revocation broadcast. A failed insert is queued again after
+    ``retry_interval``. Beyond ``max_pending`` unwritten revocations, or with
+    ``flush_interval`` 0, ``enqueue`` declines and the caller writes the row
+    itself.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        batch_size: int = 500,
+        flush_interval: float = 0.005,
+        max_pending: int = 100000,
+        retry_interval: float = 1.0,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.retry_interval = retry_interval
+        self._unwritten: Dict[str, datetime.datetime] = {}
+        self._queue: List[Tuple[str, datetime.datetime]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._force_flush = False
+        self._task: Optional[asyncio.Task] = None
+
+    def __contains__(self, jti: str) -> bool:
+        return jti in self._unwritten
+
+    @property
+    def pending(self) -> int:
+        return len(self._unwritten)
+
+    def enqueue(self, jti: str, expires_at: datetime.datetime) -> bool:
+        """Queue a revocation; returns False if the caller must write it instead."""
+        if jti in self._unwritten:
+            return True
+        if self.flush_interval <= 0 or len(self._unwritten) >= self.max_pending:
+            return False
+        self._unwritten[jti] = expires_at
+        self._queue.append((jti, expires_at))
+        BLACKLIST_WRITE_PENDING.set(len(self._unwritten))
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            # The writer task runs while there is something to write and exits once idle
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        elif len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def _run(self):
+        while self._queue:
+            if len(self._queue) < self.batch_size and not self._force_flush:
+                # Give the batch a short window to fill up
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            batch = self._queue[: self.batch_size]
+            del self._queue[: len(batch)]
+            try:
+                async with self.session_factory() as db:
+                    await add_tokens_to_blacklist(db, batch)
+            except Exception as e:
+                BLACKLIST_WRITE_FAILURES.inc()
+                logger.warning("Failed to write %d revocations to the blacklist, retrying: %s", len(batch), e)
+                self._queue[:0] = batch
+                await asyncio.sleep(self.retry_interval)
+                continue
+            for jti, _ in batch:
+                self._unwritten.pop(jti, None)
+            BLACKLIST_WRITE_PENDING.set(len(self._unwritten))
+            BLACKLIST_WRITE_BATCH_SIZE.observe(len(batch))
+
+    async def flush(self):
+        """Write everything queued so far, without waiting out the batching window."""
+        self._force_flush = True
+        try:
+            while self._task is not None and not self._task.done():
+                self._wakeup.set()
+                await asyncio.shield(self._task)
+        finally:
+            self._force_flush = False
+
+    async def stop(self):
+        """Stop writing; anything still queued is dropped, so flush first."""
+        await cancel_task(self._task)
+        self._task = None
+
+
+class RevocationCache:
+    """In-memory view of token_blacklist used to answer "not revoked" without the DB.
+
+    Revoked JTIs go into bloom filters bucketed by token expiry. A lookup only
+    has to probe the bucket matching the token's ``exp`` claim, and a bucket is
+    dropped as a whole once every token in it has expired, which keeps memory
+    bounded by the number of live revocations. A bloom hit may be a false
+    positive, so it is always confirmed against the database.
+
+    Revoked refresh sessions are tracked the same way, so access tokens
+    carrying a revoked ``sid`` are rejected too. Their filters are bucketed
+    by when the session's last access token expires (``session_ttl`` after
+    the revocation); with buckets that wide only two or three are ever live,
+    and a lookup probes all of them.
+
+    JTIs broadcast by other instances are also kept in an exact set and
+    trusted without a database check: their rows may still be queued in the
+    sender's write-behind buffer. An entry stays until a refresh loads its
+    row or the token expires.
+
+    While subscribed to the revocation broadcast, revocations from other
+    instances arrive within milliseconds and polling drops to a slower
+    safety-net interval. Every (re)subscription triggers a full resync, which
+    bounds how stale the cache can be after a broker outage.
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: int = 3600,
+        bucket_capacity: int = 10000,
+        error_rate: float = 0.01,
+        refresh_interval: float = 5.0,
+        coherent_refresh_interval: float = 60.0,
+        watermark_overlap: float = 5.0,
+        writer: Optional[BlacklistWriter] = None,
+        session_ttl: float = 24 * 3600,
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.bucket_capacity = bucket_capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.coherent_refresh_interval = coherent_refresh_interval
+        self.watermark_overlap = datetime.timedelta(seconds=watermark_overlap)
+        self.writer = writer
+        self.session_ttl = session_ttl
+        self._buckets: Dict[int, List[BloomFilter]] = {}
+        self._session_buckets: Dict[int, List[BloomFilter]] = {}
+        self._broadcast: Dict[str, float] = {}
+        self._watermark: Optional[datetime.datetime] = None
+        self._last_refresh: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._resync_requested = False
+        self.coherent = False
+
+    @property
+    def current_refresh_interval(self) -> float:
+        return self.coherent_refresh_interval if self.coherent else self.refresh_interval
+
+    @property
+    def ready(self) -> bool:
+        """Whether the cache is fresh enough to answer negative lookups."""
+        if self._last_refresh is None:
+            return False
+        # If refreshes keep failing, stop trusting the cache rather than
+        # accepting tokens revoked on other workers indefinitely.
+        return time.monotonic() - self._last_refresh < self.current_refresh_interval * 3
+
+    def _bucket_key(self, expires_ts: float) -> int:
+        return int(expires_ts // self.bucket_seconds)
+
+    def add(self, jti: str, expires_at: datetime.datetime):
+        """Record a revoked JTI until its expiry passes."""
+        self.add_timestamp(jti, _timestamp(expires_at))
+
+    def add_timestamp(self, jti: str, expires_ts: float):
+        """Record a revoked JTI expiring at the given epoch time."""
+        if expires_ts > time.time():
+            self._add_to(self._buckets.setdefault(self._bucket_key(expires_ts), []), jti)
+
+    def add_session(self, session_id: str, revoked_at: datetime.datetime):
+        """Record a revoked session until every access token issued under it has expired."""
+        self.add_session_timestamp(session_id, _timestamp(revoked_at) + self.session_ttl)
+
+    def add_session_timestamp(self, session_id: str, until_ts: float):
+        """Record a revoked session whose access tokens all expire by the given epoch time."""
+        if until_ts > time.time():
+            self._add_to(self._session_buckets.setdefault(int(until_ts // self.session_ttl), []), session_id)
+
+    def _add_to(self, filters: List[BloomFilter], item: str):
+        if not filters or filters[-1].is_full:
+            filters.append(BloomFilter(self.bucket_capacity, self.error_rate))
+            REVOCATION_CACHE_FILTERS.inc()
+        filters[-1].add(item)
+
+    def might_be_revoked(self, jti: str, exp: float) -> bool:
+        """Return False only if the JTI is certainly not revoked."""
+        filters = self._buckets.get(self._bucket_key(exp))
+        return bool(filters) and any(jti in bloom for bloom in filters)
+
+    def session_might_be_revoked(self, session_id: str) -> bool:
+        """Return False only if the session is certainly not revoked."""
+        return any(session_id in bloom for filters in self._session_buckets.values() for bloom in filters)
+
+    def prune(self, now: Optional[float] = None):
+        """Drop buckets whose tokens have all expired."""
+        now = time.time() if now is None else now
+        for key in [key for key in self._buckets if (key + 1) * self.bucket_seconds <= now]:
+            REVOCATION_CACHE_FILTERS.dec(len(self._buckets.pop(key)))
+        for key in [key for key in self._session_buckets if (key + 1) * self.session_ttl <= now]:
+            REVOCATION_CACHE_FILTERS.dec(len(self._session_buckets.pop(key)))
+        for jti in [jti for jti, exp in self._broadcast.items() if exp <= now]:
+            del self._broadcast[jti]
+
+    def on_revocation(self, jti: str, exp: float):
+        """Handle a revocation broadcast by another instance."""
+        if exp > time.time():
+            self._broadcast[jti] = exp
+        self.add_timestamp(jti, exp)
+
+    def on_session_revocation(self, session_id: str, until: float):
+        """Handle a session revocation broadcast by another instance."""
+        self.add_session_timestamp(session_id, until)
+
+    def on_subscribed(self):
+        """Resync everything now that broadcasts will cover new revocations."""
+        self.coherent = True
+        self.request_resync()
+
+    def on_unsubscribed(self):
+        """Fall back to fast polling until the broadcast is back."""
+        self.coherent = False
+        self._wakeup.set()
+
+    def request_resync(self):
+        self._resync_requested = True
+        self._wakeup.set()
+
+    async def refresh(self, db: AsyncSession, full: bool = False):
+        """Load blacklist entries and revoked sessions since the last refresh (everything on first run)."""
+        if full:
+            self._watermark = None
+        now = utcnow()
+        since = None if self._watermark is None else self._watermark - self.watermark_overlap
+        for jti, expires_at, _revoked_at in await get_blacklisted_tokens(db, now, since):
+            self.add(jti, expires_at)
+            # Written now, so the database can confirm it from here on
+            self._broadcast.pop(jti, None)
+        revoked_after = now - datetime.timedelta(seconds=self.session_ttl)
+        for session_id, revoked_at in await get_revoked_sessions(db, revoked_after, since):
+            self.add_session(session_id, revoked_at)
+        self._watermark = now
+        self._last_refresh = time.monotonic()
+        self.prune()
+
+    async def is_revoked(self, db: AsyncSession, jti: str, exp: Optional[float]) -> bool:
+        """Check whether a token is revoked, consulting the database only when needed."""
+        start = time.perf_counter()
+        if exp is None or not self.ready or self.might_be_revoked(jti, exp):
+            if jti in self._broadcast or (self.writer is not None and jti in self.writer):
+                # Revoked here or on another instance, its row possibly not written yet
+                REVOCATION_LOOKUPS.labels("memory").inc()
+                REVOCATION_LOOKUP_SECONDS.labels("memory").observe(time.perf_counter() - start)
+                return True
+            REVOCATION_LOOKUPS.labels("database").inc()
+            revoked = await is_token_blacklisted(db, jti)
+            REVOCATION_LOOKUP_SECONDS.labels("database").observe(time.perf_counter() - start)
+            return revoked
+        REVOCATION_LOOKUPS.labels("memory").inc()
+        REVOCATION_LOOKUP_SECONDS.labels("memory").observe(time.perf_counter() - start)
+        return False
+
+    async def revoked_among(self, db: AsyncSession, tokens: Iterable[Tuple[str, Optional[float]]]) -> Set[str]:
+        """Return the revoked JTIs among (jti, exp) pairs, confirming every candidate in one query."""
+        start = time.perf_counter()
+        ready = self.ready
+        candidates = [jti for jti, exp in tokens if exp is None or not ready or self.might_be_revoked(jti, exp)]
+        unwritten = {
+            jti for jti in candidates if jti in self._broadcast or (self.writer is not None and jti in self.writer)
+        }
+        candidates = [jti for jti in candidates if jti not in unwritten]
+        if not candidates:
+            REVOCATION_LOOKUP_SECONDS.labels("memory").observe(time.perf_counter() - start)
+            return unwritten
+        REVOCATION_LOOKUPS.labels("database").inc(len(candidates))
+        revoked = unwritten | await get_blacklisted_jtis(db, candidates)
+        REVOCATION_LOOKUP_SECONDS.labels("database").observe(time.perf_counter() - start)
+        return revoked
+
+    async def is_session_revoked(self, db: AsyncSession, session_id: str) -> bool:
+        """Check whether a refresh session is revoked, consulting the database only when needed."""
+        return bool(await self.revoked_sessions_among(db, [session_id]))
+
+    async def revoked_sessions_among(self, db: AsyncSession, session_ids: Iterable[str]) -> Set[str]:
+        """Return the revoked sessions among session_ids, confirming every candidate in one query."""
+        start = time.perf_counter()
+        ready = self.ready
+        session_ids = set(session_ids)
+        candidates = [sid for sid in session_ids if not ready or self.session_might_be_revoked(sid)]
+        REVOCATION_LOOKUPS.labels("memory").inc(len(session_ids) - len(candidates))
+        if not candidates:
+            REVOCATION_LOOKUP_SECONDS.labels("memory").observe(time.perf_counter() - start)
+            return set()
+        REVOCATION_LOOKUPS.labels("database").inc(len(candidates))
+        revoked = await get_revoked_session_ids(db, candidates)
+        REVOCATION_LOOKUP_SECONDS.labels("database").observe(time.perf_counter() - start)
+        return revoked
+
+    async def _refresh_once(self):
+        full, self._resync_requested = self._resync_requested, False
+        try:
+            async with AsyncSessionLocal() as db:
+                await self.refresh(db, full=full)
+        except Exception:
+            self._resync_requested = self._resync_requested or full
+            raise
+
+    async def start(self):
+        """Start refreshing the cache in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(run_forever(
+                self._refresh_once, lambda: self.current_refresh_interval, logger,
+                "Failed to refresh revocation cache: %s", wakeup=self._wakeup,
+            ))
+
+    async def stop(self):
+        """Stop the background refresh."""
+        await cancel_task(self._task)
+        self._task = None
+
+
+async def revoke_token(db: AsyncSession, jti: str, expires_at: datetime.datetime):
+    """Blacklist a token and make the revocation visible to every instance.
+
+    The row is normally written behind, batched with other revocations; the
+    token is rejected on this instance from the moment it is queued.
+    """
+    if not blacklist_writer.enqueue(jti, expires_at):
+        await add_token_to_blacklist(db, jti, expires_at)
+    revocation_cache.add(jti, expires_at)
+    await message_queue_client.publish_token_revoked(jti, _timestamp(expires_at))
+
+
+async def end_session(db: AsyncSession, session_id: str, user_id: Optional[int] = None) -> bool:
+    """Revoke a refresh session and reject its access tokens on every instance.
+
+    Returns False if the session is already revoked, does not exist or, when
+    user_id is given, belongs to someone else.
+    """
+    now = utcnow()
+    if not await revoke_refresh_session(db, session_id, now, user_id=user_id):
+        return False
+    revocation_cache.add_session(session_id, now)
+    await message_queue_client.publish_session_revoked(session_id, _timestamp(now) + revocation_cache.session_ttl)
+    return True
+
+
+# Global instances
+blacklist_writer = BlacklistWriter(
+    batch_size=settings.BLACKLIST_WRITE_BATCH_SIZE,
+    flush_interval=settings.BLACKLIST_WRITE_BEHIND_SECONDS,
+    max_pending=settings.BLACKLIST_WRITE_MAX_PENDING,
+)
+revocation_cache = RevocationCache(
+    bucket_seconds=settings.REVOCATION_BUCKET_SECONDS,
+    bucket_capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    refresh_interval=settings.REVOCATION_CACHE_REFRESH_SECONDS,
+    coherent_refresh_interval=settings.REVOCATION_CACHE_COHERENT_REFRESH_SECONDS,
+    writer=blacklist_writer,
+    session_ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
@@ -0,0 +1,89 @@
+# Per-user session listing and revocation, and the cached token-version check
+from typing import Dict, Iterable, List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.core.metrics import TOKEN_VERSION_CACHE_REQUESTS
+from app.crud.session import get_active_refresh_sessions
+from app.crud.user import bump_token_version, get_token_version, get_token_versions
+from app.schemas.user import SessionResponse
+from app.services.revocation import end_session
+from app.utils.cache import TTLCache
+from app.utils.time import utcnow
+
+# Every authenticated request checks the user's token version, so it is
+# served from memory. Revocations on this worker update the cache at once;
+# the TTL bounds how long a revoke-all on another worker goes unnoticed.
+token_version_cache = TTLCache(
+    maxsize=settings.TOKEN_VERSION_CACHE_MAX_SIZE, ttl=settings.TOKEN_VERSION_CACHE_TTL_SECONDS
+)
+
+
+async def current_token_version(db: AsyncSession, user_id: int) -> Optional[int]:
+    """Get the user's token version, or None if the user does not exist."""
+    version = token_version_cache.get(user_id)
+    if version is not None:
+        TOKEN_VERSION_CACHE_REQUESTS.labels("hit").inc()
+        return version
+
+    TOKEN_VERSION_CACHE_REQUESTS.labels("miss").inc()
+    version = await get_token_version(db, user_id)
+    if version is not None:
+        token_version_cache.set(user_id, version)
+    return version
+
+
+async def current_token_versions(db: AsyncSession, user_ids: Iterable[int]) -> Dict[int, int]:
+    """Token versions for many users: cached ones from memory, the rest with one query."""
+    versions, missing = {}, []
+    for user_id in set(user_ids):
+        version = token_version_cache.get(user_id)
+        if version is None:
+            missing.append(user_id)
+        else:
+            versions[user_id] = version
+    TOKEN_VERSION_CACHE_REQUESTS.labels("hit").inc(len(versions))
+    if missing:
+        TOKEN_VERSION_CACHE_REQUESTS.labels("miss").inc(len(missing))
+        loaded = await get_token_versions(db, missing)
+        for user_id, version in loaded.items():
+            token_version_cache.set(user_id, version)
+        versions.update(loaded)
+    return versions
+
+
+async def list_sessions(db: AsyncSession, user_id: int, current_session_id: Optional[str] = None) -> List[SessionResponse]:
+    """List the user's live sessions, newest activity first."""
+    version = await current_token_version(db, user_id)
+    if version is None:
+        return []
+    sessions = await get_active_refresh_sessions(db, user_id, version, utcnow())
+    return [
+        SessionResponse(
+            id=session.id,
+            created_at=session.created_at,
+            last_used_at=session.last_used_at,
+            expires_at=session.expires_at,
+            current=session.id == current_session_id,
+        )
+        for session in sessions
+    ]
+
+
+async def revoke_session(db: AsyncSession, user_id: int, session_id: str):
+    """Revoke one of the user's sessions and its access tokens, raising 404 if it is not theirs or already ended."""
+    if not await end_session(db, session_id, user_id=user_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+
+
+async def revoke_all_sessions(db: AsyncSession, user_id: int) -> int:
+    """Invalidate every access and refresh token issued to the user.
+
+    This is one UPDATE of the user's token version, however many tokens or
+    sessions exist; tokens carrying an older version are rejected from then on.
+    """
+    version = await bump_token_version(db, user_id)
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    token_version_cache.set(user_id, version)
+    return version
@@ -0,0 +1,167 @@
+# Rotating ring of asymmetric JWT signing keys, shared through the database
+import asyncio
+import datetime
+import logging
+from typing import Callable, List, Optional
+import rsa
+from cryptography.fernet import Fernet, MultiFernet
+from ecdsa import NIST256p, NIST384p, NIST521p, SigningKey as EcdsaSigningKey
+from jose import jwk
+from jose.constants import ALGORITHMS
+from app.config import settings
+from app.crud.signing_key import add_signing_key, delete_expired_signing_keys, get_signing_keys
+from app.db.database import AsyncSessionLocal
+from app.models.signing_key import SigningKey
+from app.services.tokens import TokenEngine, jwk_thumbprint, token_engine
+from app.utils.tasks import cancel_task, run_forever
+from app.utils.time import utcnow
+
+logger = logging.getLogger(__name__)
+
+_EC_CURVES = {"ES256": NIST256p, "ES384": NIST384p, "ES512": NIST521p}
+_PEM_PREFIX = "-----BEGIN"
+
+
+def generate_private_key(algorithm: str) -> str:
+    """Generate a PEM private key for an RS* or ES* algorithm."""
+    if algorithm in _EC_CURVES:
+        return EcdsaSigningKey.generate(curve=_EC_CURVES[algorithm]).to_pem().decode()
+    if algorithm in ALGORITHMS.RSA:
+        _, private_key = rsa.newkeys(2048)
+        return private_key.save_pkcs1().decode()
+    raise ValueError(f"Cannot generate keys for {algorithm}")
+
+
+class KeyEncryptor:
+    """Encrypts private keys before they are written to the signing_keys table.
+
+    ``keys`` is a comma-separated list of Fernet key-encryption keys. The first
+    one seals new keys and any of them opens stored ones, so a new KEK can be
+    put in front while the old one stays until the keys it sealed expire.
+    Without KEKs keys are stored as plain PEM. Plain PEM rows written before
+    encryption was enabled keep loading either way.
+    """
+
+    def __init__(self, keys: Optional[str] = None):
+        keks = [key.strip() for key in (keys or "").split(",") if key.strip()]
+        self._fernet = MultiFernet([Fernet(key) for key in keks]) if keks else None
+
+    @property
+    def enabled(self) -> bool:
+        return self._fernet is not None
+
+    def seal(self, private_key: str) -> str:
+        """Return the value to store for a PEM private key."""
+        if self._fernet is None:
+            return private_key
+        return self._fernet.encrypt(private_key.encode()).decode()
+
+    def open(self, stored: str) -> str:
+        """Return the PEM private key for a stored value."""
+        if stored.startswith(_PEM_PREFIX):
+            return stored
+        if self._fernet is None:
+            raise RuntimeError("Signing key is encrypted but JWT_KEY_ENCRYPTION_KEYS is not set")
+        return self._fernet.decrypt(stored.encode()).decode()
+
+
+class SigningKeyRing:
+    """Keeps the token engine's keys in sync with the signing_keys table.
+
+    Every ``check_interval`` each worker reloads the ring, and the first to
+    notice the newest key is older than ``rotation_interval`` adds the next
+    one. A new key is published in the JWKS ``publish_ahead`` seconds before
+    it signs anything, so verifiers with a cached JWKS already know it. Old
+    keys stay published for ``retention`` seconds after being superseded so
+    tokens they signed keep verifying until they expire. Private keys are
+    stored sealed by ``encryptor``.
+    """
+
+    def __init__(
+        self,
+        engine: TokenEngine = token_engine,
+        session_factory: Callable = AsyncSessionLocal,
+        enabled: bool = True,
+        rotation_interval: float = 7 * 24 * 3600,
+        check_interval: float = 60.0,
+        publish_ahead: float = 360.0,
+        retention: float = 7 * 24 * 3600,
+        encryptor: Optional[KeyEncryptor] = None,
+    ):
+        self.engine = engine
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.rotation_interval = rotation_interval
+        self.check_interval = check_interval
+        self.publish_ahead = publish_ahead
+        self.retention = retention
+        self.encryptor = encryptor or KeyEncryptor()
+        self._task: Optional[asyncio.Task] = None
+
+    async def rotate(self, activates_at: datetime.datetime) -> bool:
+        """Add the next key, activating at ``activates_at``; False if another worker won the race."""
+        private_key = await asyncio.to_thread(generate_private_key, self.engine.algorithm)
+        public_jwk = jwk.construct(private_key, self.engine.algorithm).public_key().to_dict()
+        async with self.session_factory() as db:
+            keys = await get_signing_keys(db, utcnow())
+            key = SigningKey(
+                kid=jwk_thumbprint(public_jwk),
+                generation=keys[-1].generation + 1 if keys else 1,
+                algorithm=self.engine.algorithm,
+                private_key=self.encryptor.seal(private_key),
+                public_jwk=public_jwk,
+                activates_at=activates_at,
+            )
+            added = await add_signing_key(
+                db, key,
+                # Workers keep signing with the old key until their next reload
+                previous_expires_at=activates_at + datetime.timedelta(seconds=self.retention + self.check_interval),
+            )
+        if added:
+            logger.info("Added signing key %s (generation %d), active from %s", key.kid, key.generation, activates_at)
+        return added
+
+    def _apply(self, keys: List[SigningKey], now: datetime.datetime):
+        active = [key for key in keys if key.activates_at <= now] or keys[:1]
+        current = active[-1]
+        self.engine.use_keys(current.kid, self.encryptor.open(current.private_key), {key.kid: key.public_jwk for key in keys})
+
+    async def run_once(self):
+        """Rotate if due, drop expired keys and load the current ring into the engine."""
+        now = utcnow()
+        async with self.session_factory() as db:
+            keys = await get_signing_keys(db, now)
+        if not keys:
+            await self.rotate(activates_at=now)
+        elif keys[-1].created_at + datetime.timedelta(seconds=self.rotation_interval) <= now:
+            await self.rotate(activates_at=now + datetime.timedelta(seconds=self.publish_ahead))
+        async with self.session_factory() as db:
+            await delete_expired_signing_keys(db, now)
+            keys = await get_signing_keys(db, now)
+        self._apply(keys, now)
+
+    async def start(self):
+        """Load the ring (the app cannot issue tokens without it), then keep it fresh."""
+        if self.enabled and self._task is None:
+            if not self.encryptor.enabled:
+                logger.warning("JWT_KEY_ENCRYPTION_KEYS is not set; signing keys are stored unencrypted")
+            await self.run_once()
+            self._task = asyncio.create_task(run_forever(
+                self.run_once, lambda: self.check_interval, logger, "Signing key ring refresh failed: %s", run_first=False
+            ))
+
+    async def stop(self):
+        """Stop the background refresh."""
+        await cancel_task(self._task)
+        self._task = None
+
+
+# Global instance
+signing_key_ring = SigningKeyRing(
+    enabled=settings.ALGORITHM not in ALGORITHMS.HMAC and not settings.JWT_PRIVATE_KEY_PATH,
+    rotation_interval=settings.JWT_KEY_ROTATION_SECONDS,
+    check_interval=settings.JWT_KEY_CHECK_SECONDS,
+    publish_ahead=settings.JWT_KEY_CHECK_SECONDS + settings.JWKS_MAX_AGE_SECONDS,
+    retention=settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60,
+    encryptor=KeyEncryptor(settings.JWT_KEY_ENCRYPTION_KEYS),
+)
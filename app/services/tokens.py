@@ -0,0 +1,203 @@
+# JWT signing and verification with preloaded keys and a verified-token memo
+import base64
+import hashlib
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from fastapi import HTTPException, status
+from jose import jwk, jwt, JWTError
+from jose.constants import ALGORITHMS
+from app.config import settings
+from app.core.metrics import JWT_SECONDS, TOKEN_VERIFY_CACHE_REQUESTS
+from app.utils.cache import TTLCache
+
+_ENCODE_SECONDS = JWT_SECONDS.labels("encode")
+_DECODE_SECONDS = JWT_SECONDS.labels("decode")
+_CACHE_HITS = TOKEN_VERIFY_CACHE_REQUESTS.labels("hit")
+_CACHE_MISSES = TOKEN_VERIFY_CACHE_REQUESTS.labels("miss")
+
+# Members of each key type that make up its RFC 7638 thumbprint
+_THUMBPRINT_MEMBERS = {"EC": ("crv", "kty", "x", "y"), "RSA": ("e", "kty", "n")}
+
+
+def jwk_thumbprint(public_jwk: Dict[str, Any]) -> str:
+    """Compute the RFC 7638 SHA-256 thumbprint of a public JWK, used as its kid."""
+    members = {name: public_jwk[name] for name in _THUMBPRINT_MEMBERS[public_jwk["kty"]]}
+    digest = hashlib.sha256(json.dumps(members, separators=(",", ":"), sort_keys=True).encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+class TokenEngine:
+    """Creates and verifies the service's access and refresh tokens.
+
+    Key material is parsed once, up front, instead of on every call. With an
+    asymmetric algorithm (RS*/ES*) tokens carry a ``kid`` header and the
+    accepted public keys are published as a JWKS, so other services can
+    verify tokens locally. Successful
+    verifications are memoized by token hash for at most ``cache_ttl``
+    seconds and never past the token's own ``exp``; revocation is checked
+    separately by the caller.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        signing_key: Any = None,
+        verification_key: Any = None,
+        access_expire_minutes: int = 15,
+        refresh_expire_minutes: int = 60 * 24 * 7,
+        cache_size: int = 10000,
+        cache_ttl: float = 30.0,
+    ):
+        if algorithm not in ALGORITHMS.SUPPORTED:
+            raise ValueError(f"Unsupported JWT algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.access_expire_minutes = access_expire_minutes
+        self.refresh_expire_minutes = refresh_expire_minutes
+        self.cache_ttl = cache_ttl
+        self._signing_key = None
+        self._kid: Optional[str] = None
+        self._verification_keys: Dict[Optional[str], Any] = {}
+        self._verified = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.jwks_body = b'{"keys":[]}'
+        self.jwks_etag = _etag(self.jwks_body)
+        if signing_key is not None or verification_key is not None:
+            self.use_static_key(signing_key, verification_key)
+
+    @property
+    def kid(self) -> Optional[str]:
+        """The key id stamped on new tokens (None for HMAC)."""
+        return self._kid
+
+    @property
+    def verification_key(self):
+        """The preloaded key that verifies tokens signed by the active key."""
+        return self._verification_keys.get(self._kid)
+
+    def use_static_key(self, signing_key: Any, verification_key: Any = None):
+        """Sign and verify with a single key: the shared secret, or a configured key pair.
+
+        With an asymmetric algorithm ``signing_key`` may be None, giving an
+        engine that only verifies tokens with the public key.
+        """
+        if self.algorithm in ALGORITHMS.HMAC:
+            if signing_key is None:
+                raise ValueError("HMAC algorithms sign and verify with the shared secret; pass it as signing_key")
+            self.use_keys(None, signing_key, {None: signing_key})
+            return
+        if verification_key is None:
+            public_jwk = jwk.construct(signing_key, self.algorithm).public_key().to_dict()
+        else:
+            public_jwk = jwk.construct(verification_key, self.algorithm).to_dict()
+        kid = jwk_thumbprint(public_jwk)
+        self.use_keys(kid, signing_key, {kid: public_jwk})
+
+    def use_keys(self, kid: Optional[str], signing_key: Any, verification_keys: Dict[Optional[str], Any]):
+        """Switch to a new active key and set of accepted keys.
+
+        ``verification_keys`` maps kid to key material (PEM or JWK dict). For
+        asymmetric algorithms the public keys are also published as the JWKS.
+        ``signing_key`` may be None for an engine that only verifies.
+        """
+        keys = {key_id: jwk.construct(material, self.algorithm) for key_id, material in verification_keys.items()}
+        if keys.keys() != self._verification_keys.keys():
+            # A key may have been dropped; don't keep accepting tokens it signed.
+            self._verified.clear()
+        self._signing_key = None if signing_key is None else jwk.construct(signing_key, self.algorithm)
+        self._kid = kid
+        self._verification_keys = keys
+        if self.algorithm not in ALGORITHMS.HMAC:
+            published = [
+                dict(key.to_dict(), kid=key_id, use="sig", alg=self.algorithm) for key_id, key in keys.items()
+            ]
+            self.jwks_body = json.dumps({"keys": published}, separators=(",", ":"), sort_keys=True).encode()
+            self.jwks_etag = _etag(self.jwks_body)
+
+    def _create(self, data: dict, token_type: str, expires_delta: Optional[timedelta], default_minutes: int) -> str:
+        start = time.perf_counter()
+        claims = dict(data)
+        claims.update(
+            exp=datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=default_minutes)),
+            type=token_type,
+            jti=str(uuid.uuid4()),
+        )
+        if self._signing_key is None:
+            raise RuntimeError("No signing key has been loaded")
+        headers = {"kid": self._kid} if self._kid else None
+        token = jwt.encode(claims, self._signing_key, algorithm=self.algorithm, headers=headers)
+        _ENCODE_SECONDS.observe(time.perf_counter() - start)
+        return token
+
+    def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
+        """Create a signed access token carrying ``data`` plus exp, type and jti claims."""
+        return self._create(data, "access", expires_delta, self.access_expire_minutes)
+
+    def create_refresh_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
+        """Create a signed refresh token carrying ``data`` plus exp, type and jti claims."""
+        return self._create(data, "refresh", expires_delta, self.refresh_expire_minutes)
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        """Verify a token and return its claims; raises 401 if it is invalid or expired."""
+        start = time.perf_counter()
+        digest = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        payload = self._verified.get(digest)
+        if payload is not None:
+            _CACHE_HITS.inc()
+            _DECODE_SECONDS.observe(time.perf_counter() - start)
+            return dict(payload)
+
+        _CACHE_MISSES.inc()
+        try:
+            key = self._verification_keys[jwt.get_unverified_header(token).get("kid")]
+            payload = jwt.decode(token, key, algorithms=[self.algorithm])
+        except (JWTError, KeyError):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+            )
+        exp = payload.get("exp")
+        ttl = self.cache_ttl if exp is None else min(self.cache_ttl, exp - time.time())
+        if ttl > 0:
+            self._verified.set(digest, payload, ttl=ttl)
+        _DECODE_SECONDS.observe(time.perf_counter() - start)
+        return dict(payload)
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _read_key(path: Optional[str]) -> Optional[str]:
+    if not path:
+        return None
+    with open(path) as f:
+        return f.read()
+
+
+def create_token_engine(settings) -> TokenEngine:
+    """Build the engine from settings.
+
+    HMAC algorithms use SECRET_KEY. Asymmetric algorithms use the PEM files
+    when JWT_PRIVATE_KEY_PATH is set; otherwise the engine starts without keys
+    and the signing key ring loads them at startup.
+    """
+    if settings.ALGORITHM in ALGORITHMS.HMAC:
+        signing_key, verification_key = settings.SECRET_KEY, None
+    else:
+        signing_key = _read_key(settings.JWT_PRIVATE_KEY_PATH)
+        verification_key = _read_key(settings.JWT_PUBLIC_KEY_PATH)
+    return TokenEngine(
+        algorithm=settings.ALGORITHM,
+        signing_key=signing_key,
+        verification_key=verification_key,
+        access_expire_minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+        refresh_expire_minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES,
+        cache_size=settings.TOKEN_CACHE_SIZE,
+        cache_ttl=settings.TOKEN_CACHE_TTL_SECONDS,
+    )
+
+
+# Global instance
+token_engine = create_token_engine(settings)
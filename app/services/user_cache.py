@@ -0,0 +1,29 @@
+# Read-through cache of user profiles for /auth/me
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.core.metrics import USER_CACHE_REQUESTS
+from app.crud.user import get_user_by_id
+from app.db.routing import read_router
+from app.schemas.user import UserResponse
+from app.utils.cache import TTLCache
+
+# Profiles are small and nothing in this service edits them after signup;
+# the TTL alone bounds how long a change made elsewhere goes unnoticed.
+user_profile_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+
+async def get_user_profile(db: AsyncSession, user_id: int) -> Optional[UserResponse]:
+    """Get a user's public profile, from memory when possible."""
+    profile = user_profile_cache.get(user_id)
+    if profile is not None:
+        USER_CACHE_REQUESTS.labels("hit").inc()
+        return profile
+
+    USER_CACHE_REQUESTS.labels("miss").inc()
+    user = await read_router.read(db, get_user_by_id, user_id)
+    if user is None:
+        return None
+    profile = UserResponse.model_validate(user)
+    user_profile_cache.set(user_id, profile)
+    return profile
@@ -1,22 +1,27 @@
 # Password hashing, JWT creation & validation helpers
+import hmac
 from datetime import timedelta
 from typing import Optional
 from fastapi import HTTPException, status, Depends
+from fastapi.security import APIKeyHeader
 from shared_libs import (
     hash_password,
     verify_password,
-    create_access_token,
-    create_refresh_token,
-    decode_token,
     oauth2_scheme
 )
-from shared_libs.settings import SharedSettings
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
 from app.db.database import get_db
-from app.crud.token import is_token_blacklisted
+from app.services.revocation import revocation_cache
+from app.services.sessions import current_token_version
+from app.services.tokens import token_engine
 
-# Load settings
-settings = SharedSettings()
+internal_api_key_header = APIKeyHeader(name="X-Internal-Api-Key", auto_error=False)
+
+async def require_internal_api_key(api_key: Optional[str] = Depends(internal_api_key_header)):
+    """Allow only callers presenting INTERNAL_API_KEY; internal routes are closed while it is unset."""
+    if not settings.INTERNAL_API_KEY or api_key is None or not hmac.compare_digest(api_key, settings.INTERNAL_API_KEY):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> dict:
     """Get the current user from the token."""
@@ -26,39 +31,35 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = decode_token(token, settings.SECRET_KEY, settings.ALGORITHM)
+        payload = token_engine.decode(token)
         token_type = payload.get("type")
         if token_type != "access":
             raise credentials_exception
         jti = payload.get("jti")
         if jti is None:
             raise credentials_exception
-        if await is_token_blacklisted(db, jti):
+        if await revocation_cache.is_revoked(db, jti, payload.get("exp")):
+            raise credentials_exception
+        # Ending a session (logout, DELETE /auth/sessions/{id}, refresh reuse) ends its access tokens too
+        session_id = payload.get("sid")
+        if session_id is not None and await revocation_cache.is_session_revoked(db, session_id):
+            raise credentials_exception
+        # Revoke-all bumps the user's version; tokens without one predate it and count as 0
+        user_id = payload.get("user_id")
+        if user_id is None or payload.get("ver", 0) != await current_token_version(db, user_id):
             raise credentials_exception
         return payload
     except Exception as e:
         raise credentials_exception from e
 
 def create_access_token_wrapper(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Create a new access token using shared utility."""
-    return create_access_token(
-        data,
-        settings.SECRET_KEY,
-        settings.ALGORITHM,
-        expires_delta,
-        settings.ACCESS_TOKEN_EXPIRE_MINUTES
-    )
+    """Create a new access token."""
+    return token_engine.create_access_token(data, expires_delta)
 
 def create_refresh_token_wrapper(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Create a new refresh token using shared utility."""
-    return create_refresh_token(
-        data,
-        settings.SECRET_KEY,
-        settings.ALGORITHM,
-        expires_delta,
-        settings.REFRESH_TOKEN_EXPIRE_MINUTES
-    )
+    """Create a new refresh token."""
+    return token_engine.create_refresh_token(data, expires_delta)
 
 def decode_token_wrapper(token: str) -> dict:
-    """Decode a JWT token using shared utility."""
-    return decode_token(token, settings.SECRET_KEY, settings.ALGORITHM)
\ No newline at end of file
+    """Decode and verify a JWT token."""
+    return token_engine.decode(token)
\ No newline at end of file
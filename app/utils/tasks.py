@@ -0,0 +1,47 @@
+# Helpers for the long-running background tasks services start and stop
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+
+async def cancel_task(task: Optional[asyncio.Task]) -> None:
+    """Cancel a background task, if any, and wait until it has stopped."""
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+async def run_forever(
+    job: Callable[[], Awaitable[object]],
+    interval: Callable[[], float],
+    logger: logging.Logger,
+    failure_message: str,
+    wakeup: Optional[asyncio.Event] = None,
+    run_first: bool = True,
+):
+    """Run job until cancelled, pausing interval() seconds between runs.
+
+    A failed run is logged with ``failure_message % exc`` and retried after
+    the next pause. If wakeup is given, setting it ends the current pause
+    early.
+    """
+    while True:
+        if run_first:
+            if wakeup is not None:
+                wakeup.clear()
+            try:
+                await job()
+            except Exception as e:
+                logger.warning(failure_message, e)
+        run_first = True
+        if wakeup is None:
+            await asyncio.sleep(interval())
+            continue
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout=interval())
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,7 @@
+# Clock helpers shared by models and services
+import datetime
+
+
+def utcnow() -> datetime.datetime:
+    """Current UTC time as a naive datetime, matching how DateTime columns are stored."""
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
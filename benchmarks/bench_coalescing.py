@@ -0,0 +1,76 @@
+# Benchmark: concurrent get_user_by_id with and without lookup coalescing
+#
+# Usage: python -m benchmarks.bench_coalescing [--database-url URL] [--lookups 5000] [--concurrency 1 16 64]
+#            [--users 1000]
+#
+# "direct" runs one point query per lookup, as get_user_by_id did before
+# coalescing. "coalesced" is the current get_user_by_id. Each worker uses its
+# own session, as a request would. Two key patterns are measured: "hot",
+# where every worker asks for the same user (one busy client polling
+# /auth/me), and "spread", where keys are drawn from --users distinct users.
+# Reports throughput, p50/p99 and the number of queries actually executed.
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.crud.user import _USER_BY_ID, _fetch_user_record, get_user_by_id
+from app.db.database import Base
+from app.models.user import User
+from benchmarks.common import run_concurrently
+
+
+async def direct_get_user_by_id(db: AsyncSession, user_id: int):
+    """The lookup before coalescing."""
+    return await _fetch_user_record(db, _USER_BY_ID, user_id)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_async_engine(database_url, pool_size=max(args.concurrency), max_overflow=0)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with session_factory() as db:
+        db.add_all(User(username=f"bench-{i}", email=f"bench-{i}@example.com", hashed_password="x") for i in range(args.users))
+        await db.commit()
+
+    queries = [0]
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_query(*_):
+        queries[0] += 1
+
+    rng = random.Random(0)
+    report = {}
+    for pattern in ("hot", "spread"):
+        for mode, lookup in (("direct", direct_get_user_by_id), ("coalesced", get_user_by_id)):
+            for concurrency in args.concurrency:
+
+                async def call():
+                    user_id = 1 if pattern == "hot" else rng.randint(1, args.users)
+                    async with session_factory() as db:
+                        assert await lookup(db, user_id) is not None
+
+                await run_concurrently(call, 200, concurrency)  # warm the pool and statement cache
+                queries[0] = 0
+                result = await run_concurrently(call, args.lookups, concurrency)
+                result["queries"] = queries[0]
+                report.setdefault(pattern, {}).setdefault(mode, {})[str(concurrency)] = result
+    await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+# Benchmark: password hashing throughput and memory per policy configuration
+#
+# Usage: python -m benchmarks.bench_hashing [--hashes 20] [--target 0.25]
+#
+# Each configuration runs in a fresh interpreter on one core, reporting
+# hashes/sec, verify latency and how far one hash raises the process's
+# peak RSS (Argon2 allocates its memory cost per hash; bcrypt needs ~4 KiB).
+# With --target, also prints what startup calibration would pick for each
+# scheme on this machine.
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from app.services.password_policy import PasswordPolicy, calibrate_policy
+
+CONFIGURATIONS = {
+    "bcrypt-10": PasswordPolicy(bcrypt_rounds=10),
+    "bcrypt-12": PasswordPolicy(bcrypt_rounds=12),
+    "bcrypt-13": PasswordPolicy(bcrypt_rounds=13),
+    "argon2id-t2-m19MiB-p1": PasswordPolicy(scheme="argon2", argon2_time_cost=2, argon2_memory_cost=19456),
+    "argon2id-t1-m46MiB-p1": PasswordPolicy(scheme="argon2", argon2_time_cost=1, argon2_memory_cost=47104),
+    "argon2id-t3-m64MiB-p4": PasswordPolicy(
+        scheme="argon2", argon2_time_cost=3, argon2_memory_cost=65536, argon2_parallelism=4
+    ),
+}
+
+
+def child(name: str, hashes: int):
+    policy = CONFIGURATIONS[name]
+    policy.verify("warm-up", PasswordPolicy(bcrypt_rounds=4).hash("warm-up"))
+    baseline_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    hashed = [policy.hash(f"password-{i}") for i in range(hashes)]
+    hash_seconds = time.perf_counter() - start
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    assert all(policy.verify(f"password-{i}", h) for i, h in enumerate(hashed))
+    verify_seconds = time.perf_counter() - start
+    print(json.dumps({
+        "hashes_per_sec": round(hashes / hash_seconds, 2),
+        "hash_ms": round(hash_seconds / hashes * 1000, 1),
+        "verify_ms": round(verify_seconds / hashes * 1000, 1),
+        "peak_rss_increase_kib": peak_kib - baseline_kib,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hashes", type=int, default=20)
+    parser.add_argument("--configs", nargs="+", choices=sorted(CONFIGURATIONS), default=list(CONFIGURATIONS))
+    parser.add_argument("--target", type=float, help="also report calibration for this latency budget (seconds)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.hashes)
+        return
+
+    report = {}
+    for name in args.configs:
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_hashing", "--child", name, "--hashes", str(args.hashes)],
+            capture_output=True, text=True, check=True,
+        )
+        report[name] = json.loads(result.stdout.strip().splitlines()[-1])
+    if args.target:
+        report["calibrated"] = {
+            scheme: asdict(calibrate_policy(PasswordPolicy(scheme=scheme), args.target))
+            for scheme in ("bcrypt", "argon2")
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Benchmark: bulk user import throughput vs one signup at a time
+#
+# Usage: python -m benchmarks.bench_import [--database-url URL] [--users 100000] [--baseline-users 2000] [--hash-sample 64]
+#
+# Rows carry a pre-computed bcrypt hash so the database path is measured on
+# its own; bcrypt throughput is measured separately on --hash-sample
+# passwords and projected to --users. Defaults to a throwaway SQLite file.
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from shared_libs import hash_password
+from app.crud import user as user_crud
+from app.db.database import Base
+from app.services.bulk_import import BulkUserImporter
+from app.services.hashing import PasswordHashingPool
+from app.services.outbox import record_user_created_event
+
+
+async def records(count: int, prefix: str, password_hash: str):
+    for i in range(count):
+        yield i + 1, {"username": f"{prefix}-{i}", "email": f"{prefix}-{i}@example.com", "password_hash": password_hash}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--baseline-users", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--hash-sample", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    password_hash = hash_password("benchmark-password")
+    report = {}
+
+    # Baseline: the signup path, one user per transaction
+    start = time.perf_counter()
+    with patch.object(user_crud.password_hasher, "hash", AsyncMock(return_value=password_hash)):
+        for i in range(args.baseline_users):
+            async with session_factory() as db:
+                user = await user_crud.create_user(db, f"single-{i}", f"single-{i}@example.com", "unused")
+                record_user_created_event(db, user)
+                await db.commit()
+    elapsed = time.perf_counter() - start
+    report["signup_one_by_one"] = {"users": args.baseline_users, "rows_per_second": round(args.baseline_users / elapsed, 1)}
+
+    hasher = PasswordHashingPool(executor_kind="process", max_workers=args.workers, max_queue=0)
+    importer = BulkUserImporter(session_factory=session_factory, hasher=hasher, batch_size=args.batch_size)
+    start = time.perf_counter()
+    result = await importer.run(records(args.users, "bulk", password_hash))
+    elapsed = time.perf_counter() - start
+    report["bulk_import"] = {
+        "users": result.created,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(result.created / elapsed, 1),
+    }
+
+    start = time.perf_counter()
+    await hasher.hash_many([f"password-{i}" for i in range(args.hash_sample)], concurrency=args.workers)
+    hashes_per_second = args.hash_sample / (time.perf_counter() - start)
+    hasher.shutdown()
+    report["bcrypt"] = {
+        "workers": args.workers,
+        "hashes_per_second": round(hashes_per_second, 1),
+        "projected_seconds_for_users": round(args.users / hashes_per_second, 1),
+    }
+
+    await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
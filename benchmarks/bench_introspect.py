@@ -0,0 +1,101 @@
+# Benchmark: per-token /auth/me validation vs. batched /auth/introspect
+#
+# Usage: python -m benchmarks.bench_introspect [--tokens 2000] [--batch-sizes 1 10 100] [--concurrency 8]
+#            [--revoked-fraction 0.1]
+#
+# A gateway fronting many requests can validate their tokens one call at a
+# time or in batches. Both paths go through the full app in-process via httpx
+# against a throwaway SQLite file, with a fraction of the tokens revoked so
+# the blacklist is actually consulted. Reports validated tokens per second.
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import httpx
+from benchmarks.common import run_concurrently
+
+API_KEY = "bench-internal-key"
+
+
+async def run(args) -> dict:
+    # The app reads its settings at import time, so configure it first
+    from app import models  # noqa: F401  register every model on Base.metadata
+    from app.crud.token import add_token_to_blacklist
+    from app.db.database import AsyncSessionLocal, Base, engine
+    from app.main import app
+    from app.models.user import User
+    from app.services.memory_broker import InMemoryBroker
+    from app.services.message_queue import message_queue_client
+    from app.utils.security import create_access_token_wrapper, decode_token_wrapper
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    results = {}
+    with patch.object(message_queue_client, "_connect", InMemoryBroker().connect):
+        async with app.router.lifespan_context(app):
+            async with AsyncSessionLocal() as db:
+                db.add_all([
+                    User(id=i, username=f"user{i}", email=f"user{i}@example.com", hashed_password="unused")
+                    for i in range(1, 101)
+                ])
+                await db.commit()
+                tokens = [
+                    create_access_token_wrapper({"sub": f"user{i % 100 + 1}", "user_id": i % 100 + 1})
+                    for i in range(args.tokens)
+                ]
+                expires = datetime.utcnow() + timedelta(hours=1)
+                for token in tokens[: int(len(tokens) * args.revoked_fraction)]:
+                    await add_token_to_blacklist(db, decode_token_wrapper(token)["jti"], expires)
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                pending = iter(tokens)
+
+                async def me():
+                    await client.get("/auth/me", headers={"Authorization": f"Bearer {next(pending)}"})
+
+                summary = await run_concurrently(me, len(tokens), args.concurrency)
+                results["per_token_me"] = {"tokens_per_s": summary["throughput_rps"], "p50_ms": summary["p50_ms"]}
+
+                for batch_size in args.batch_sizes:
+                    batches = [tokens[i:i + batch_size] for i in range(0, len(tokens), batch_size)]
+                    pending_batches = iter(batches)
+
+                    async def introspect():
+                        response = await client.post(
+                            "/auth/introspect", json={"tokens": next(pending_batches)}, headers={"X-Internal-Api-Key": API_KEY}
+                        )
+                        response.raise_for_status()
+
+                    summary = await run_concurrently(introspect, len(batches), args.concurrency)
+                    results[f"introspect_batch_{batch_size}"] = {
+                        "tokens_per_s": round(summary["throughput_rps"] * len(tokens) / len(batches), 1),
+                        "p50_ms": summary["p50_ms"],
+                    }
+
+    await engine.dispose()
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--revoked-fraction", type=float, default=0.1)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ["INTERNAL_API_KEY"] = API_KEY
+    os.environ.setdefault("INTROSPECTION_MAX_TOKENS", str(max(args.batch_sizes)))
+
+    results = await run(args)
+    print(json.dumps({"tokens": args.tokens, "concurrency": args.concurrency, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+# Benchmark: login latency and throughput with inline vs pooled bcrypt
+#
+# Usage: python -m benchmarks.bench_login [--requests 200] [--concurrency 1 8 32 64]
+#
+# The user lookup is served from memory so that only password verification
+# and token creation are measured. "inline" reproduces the old behaviour of
+# verifying on the event loop; "thread"/"process" go through the hashing pool.
+import argparse
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+from shared_libs import hash_password, verify_password
+from app.services import auth
+from app.services.hashing import PasswordHashingPool
+from benchmarks.common import run_concurrently
+
+PASSWORD = "benchmark-password"
+
+
+class InlineHasher:
+    """Verifies on the calling coroutine, blocking the event loop."""
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return verify_password(password, hashed_password)
+
+    def shutdown(self):
+        pass
+
+
+async def bench_mode(mode: str, user, total: int, concurrency_levels, workers: int):
+    if mode == "inline":
+        hasher = InlineHasher()
+    else:
+        hasher = PasswordHashingPool(executor_kind=mode, max_workers=workers, max_queue=total)
+
+    async def lookup(db, username):
+        return user
+
+    results = {}
+    with patch.object(auth, "get_user_by_login", lookup), patch.object(auth, "password_hasher", hasher):
+        for concurrency in concurrency_levels:
+            results[concurrency] = await run_concurrently(
+                lambda: auth.login(None, user.username, PASSWORD), total, concurrency
+            )
+    hasher.shutdown()
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "process"])
+    args = parser.parse_args()
+
+    user = SimpleNamespace(id=1, username="bench", hashed_password=hash_password(PASSWORD), is_active=True)
+    report = {}
+    for mode in args.modes:
+        report[mode] = await bench_mode(mode, user, args.requests, args.concurrency, args.workers)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
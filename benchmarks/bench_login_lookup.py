@@ -0,0 +1,120 @@
+# Benchmark: the login lookup (username or email, any case) against a large users table
+#
+# Usage: python -m benchmarks.bench_login_lookup [--database-url URL] [--rows 10000000] [--lookups 2000]
+#
+# Fills users up to --rows rows (server-side, so 10M rows take minutes, not
+# hours; rows already there are kept, so later runs start immediately), then
+# prints the query plan of the login lookup and the exact-match username
+# lookup it replaced, and times both. Lookups use mixed-case usernames and
+# emails, half of them for users that don't exist. Exits non-zero if the
+# login lookup does not use the lower() indexes, which at 10M rows means a
+# full table scan per login. Point --database-url at Postgres to measure
+# the production planner; the SQLite default is fine for smaller --rows.
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.crud.user import _USER_BY_LOGIN, _USER_BY_USERNAME, get_user_by_login, get_user_by_username
+from app.db.database import Base
+from app.models.user import User
+from benchmarks.common import run_concurrently
+
+LOGIN_INDEXES = {"ux_users_username_lower", "ux_users_email_lower"}
+
+
+async def populate(conn, rows: int, chunk: int = 1_000_000):
+    have = await conn.scalar(select(func.coalesce(func.max(User.id), 0)))
+    postgres = conn.dialect.name == "postgresql"
+    for start in range(have + 1, rows + 1, chunk):
+        end = min(start + chunk - 1, rows)
+        if postgres:
+            series = f"generate_series({start}, {end}) AS g(n)"
+            prefix = ""
+        else:
+            prefix = f"WITH RECURSIVE g(n) AS (SELECT {start} UNION ALL SELECT n + 1 FROM g WHERE n < {end}) "
+            series = "g"
+        await conn.execute(text(
+            f"{prefix}INSERT INTO users (id, username, email, hashed_password, is_active, token_version) "
+            f"SELECT n, 'User' || n, 'user' || n || '@Example.com', 'x', true, 0 FROM {series}"
+        ))
+        await conn.commit()
+        print(f"populated {end}/{rows}", file=sys.stderr)
+    if postgres:
+        await conn.execute(text("ANALYZE users"))
+        await conn.commit()
+
+
+async def explain(conn, statement, value: str) -> dict:
+    sql = str(statement.params(value=value).compile(conn.sync_connection, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "postgresql":
+        plan = (await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"))).scalar()[0]
+        nodes, stack = [], [plan["Plan"]]
+        while stack:
+            node = stack.pop()
+            nodes.append(node["Node Type"] + (f" using {node['Index Name']}" if "Index Name" in node else ""))
+            stack.extend(node.get("Plans", []))
+        return {"plan": nodes, "execution_ms": plan["Execution Time"], "full_scan": any(n.startswith("Seq Scan") for n in nodes)}
+    rows = (await conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+    details = [row[-1] for row in rows]
+    return {"plan": details, "full_scan": any(d.startswith("SCAN") and "INDEX" not in d for d in details)}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with engine.connect() as conn:
+        await populate(conn, args.rows)
+        n = args.rows // 2
+        plans = {
+            "login_by_username": await explain(conn, _USER_BY_LOGIN, f"uSeR{n}"),
+            "login_by_email": await explain(conn, _USER_BY_LOGIN, f"USER{n}@example.COM"),
+            "exact_username": await explain(conn, _USER_BY_USERNAME, f"User{n}"),
+        }
+
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    rng = random.Random(0)
+    identifiers = {
+        # What users actually type; exact matching only finds the stored spelling
+        "exact_username": lambda i: f"User{i}",
+        "login": lambda i: rng.choice([f"user{i}", f"USER{i}", f"user{i}@example.com", f" User{i}@EXAMPLE.com "]),
+    }
+    latency = {}
+    for mode, lookup in (("exact_username", get_user_by_username), ("login", get_user_by_login)):
+        async def call():
+            # Half the lookups are for users that don't exist
+            i = rng.randint(1, args.rows * 2)
+            async with session_factory() as db:
+                await lookup(db, identifiers[mode](i))
+
+        await run_concurrently(call, 100, 1)
+        latency[mode] = await run_concurrently(call, args.lookups, 1)
+    await engine.dispose()
+
+    uses_indexes = not any(plans[k]["full_scan"] for k in ("login_by_username", "login_by_email"))
+    print(json.dumps({
+        "database": database_url.split(":", 1)[0],
+        "rows": args.rows,
+        "login_uses_indexes": uses_indexes,
+        "plans": plans,
+        "latency": latency,
+    }, indent=2))
+    if not uses_indexes:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
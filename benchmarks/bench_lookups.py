@@ -0,0 +1,95 @@
+# Benchmark: user lookups through the ORM vs the lean record path
+#
+# Usage: python -m benchmarks.bench_lookups [--database-url URL] [--lookups 5000] [--users 1000]
+#
+# "orm" is the previous implementation: a fresh select(User) per call,
+# hydrating a full User into the session's identity map. "record" is the
+# current get_user_by_username, which reuses a prebuilt column select and
+# returns a slotted UserRecord. Each lookup uses its own session, as a
+# request would. Reports wall time and process CPU time per lookup, and the
+# peak bytes allocated per lookup, traced by tracemalloc in a separate pass.
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.future import select
+from sqlalchemy.orm import sessionmaker
+from app.crud.user import get_user_by_username
+from app.db.database import Base
+from app.models.user import User
+
+
+async def orm_get_user_by_username(db: AsyncSession, username: str) -> User:
+    """The lookup this replaced."""
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalar_one_or_none()
+
+
+async def measure(session_factory, lookup, usernames, count: int) -> dict:
+    names = itertools.cycle(usernames)
+
+    async def run(n):
+        for _ in range(n):
+            async with session_factory() as db:
+                assert await lookup(db, next(names)) is not None
+
+    await run(200)  # warm the statement cache and connection pool
+    wall, cpu = time.perf_counter(), time.process_time()
+    await run(count)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    return {
+        "lookups": count,
+        "wall_us_per_lookup": round(wall / count * 1e6, 1),
+        "cpu_us_per_lookup": round(cpu / count * 1e6, 1),
+    }
+
+
+async def measure_peak_bytes(session_factory, lookup, usernames, count: int) -> int:
+    """Average peak memory allocated during one lookup, traced call by call."""
+    names = itertools.cycle(usernames)
+    tracemalloc.start()
+    total = 0
+    for _ in range(count):
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        async with session_factory() as db:
+            await lookup(db, next(names))
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - start
+    tracemalloc.stop()
+    return round(total / count)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    usernames = [f"bench-lookup-{i}" for i in range(args.users)]
+    async with session_factory() as db:
+        db.add_all(User(username=name, email=f"{name}@example.com", hashed_password="x") for name in usernames)
+        await db.commit()
+
+    report = {}
+    for mode, lookup in (("orm", orm_get_user_by_username), ("record", get_user_by_username)):
+        report[mode] = await measure(session_factory, lookup, usernames, args.lookups)
+        report[mode]["peak_bytes_per_lookup"] = await measure_peak_bytes(session_factory, lookup, usernames, 500)
+    await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
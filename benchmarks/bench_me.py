@@ -0,0 +1,62 @@
+# Benchmark: /auth/me handler with and without the user profile cache
+#
+# Usage: python -m benchmarks.bench_me [--database-url URL] [--requests 5000] [--users 100] [--concurrency 1 8 32]
+#
+# Calls the route handler directly with already-decoded claims so only the
+# profile lookup is measured. "uncached" disables the cache by setting its
+# size to zero, which forces a SELECT per request as before.
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import tempfile
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.api.routes import get_current_user_route
+from app.db.database import Base
+from app.models.user import User
+from app.services.user_cache import user_profile_cache
+from benchmarks.common import run_concurrently
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    async with session_factory() as db:
+        users = [User(username=f"bench-me-{i}", email=f"me-{i}@example.com", hashed_password="x") for i in range(args.users)]
+        db.add_all(users)
+        await db.commit()
+        user_ids = [user.id for user in users]
+    ids = itertools.cycle(user_ids)
+
+    async def me():
+        async with session_factory() as db:
+            await get_current_user_route(db, {"user_id": next(ids)})
+
+    maxsize = user_profile_cache.maxsize
+    report = {}
+    for mode, size in (("uncached", 0), ("cached", maxsize)):
+        user_profile_cache.maxsize = size
+        user_profile_cache.clear()
+        report[mode] = {}
+        for concurrency in args.concurrency:
+            report[mode][concurrency] = await run_concurrently(me, args.requests, concurrency)
+    user_profile_cache.maxsize = maxsize
+    await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+# Benchmark: cost of the request and query instrumentation
+#
+# Usage: python -m benchmarks.bench_metrics [--requests 5000] [--calls 200000]
+#
+# Compares a trivial route with and without RequestMetricsMiddleware (driven
+# in-process through httpx's ASGI transport), and a no-op coroutine with and
+# without @timed_query, reporting the added microseconds per request/call.
+# Runs alternate between variants and the fastest round of each is kept, to
+# filter out scheduler noise.
+import argparse
+import asyncio
+import json
+import time
+import httpx
+from fastapi import FastAPI
+from app.core.instrumentation import RequestMetricsMiddleware, timed_query
+
+
+def build_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(RequestMetricsMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def time_requests(app: FastAPI, total: int) -> float:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(100):
+            await client.get("/ping")
+        start = time.perf_counter()
+        for _ in range(total):
+            await client.get("/ping")
+        return (time.perf_counter() - start) / total
+
+
+async def time_calls(call, total: int) -> float:
+    start = time.perf_counter()
+    for _ in range(total):
+        await call(None)
+    return (time.perf_counter() - start) / total
+
+
+async def noop_query(db):
+    return None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    apps = {False: build_app(False), True: build_app(True)}
+    requests = {False: [], True: []}
+    calls = {False: [], True: []}
+    timed_noop = timed_query(noop_query)
+    for _ in range(args.rounds):
+        for instrumented in (False, True):
+            requests[instrumented].append(await time_requests(apps[instrumented], args.requests))
+            calls[instrumented].append(await time_calls(timed_noop if instrumented else noop_query, args.calls))
+    bare_request, instrumented_request = min(requests[False]), min(requests[True])
+    bare_call, timed_call = min(calls[False]), min(calls[True])
+
+    print(json.dumps({
+        "request": {
+            "bare_us": round(bare_request * 1e6, 2),
+            "instrumented_us": round(instrumented_request * 1e6, 2),
+            "overhead_us": round((instrumented_request - bare_request) * 1e6, 2),
+            "overhead_pct": round((instrumented_request / bare_request - 1) * 100, 2),
+        },
+        "crud_call": {
+            "bare_us": round(bare_call * 1e6, 3),
+            "timed_us": round(timed_call * 1e6, 3),
+            "overhead_us": round((timed_call - bare_call) * 1e6, 3),
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
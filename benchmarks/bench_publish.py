@@ -0,0 +1,67 @@
+# Benchmark: per-event publishing vs the batched publish buffer
+#
+# Usage: python -m benchmarks.bench_publish [--events 5000] [--confirm-delay 0.0005]
+#
+# Runs against the in-process broker stand-in; --confirm-delay simulates the
+# broker round-trip before each publisher confirm arrives.
+import argparse
+import asyncio
+import json
+import time
+import aiormq
+from app.services.memory_broker import InMemoryBroker
+from app.services.message_queue import MessageQueueClient
+
+
+def _event(n: int):
+    return {"event_type": "UserCreated", "user_id": n, "username": f"user{n}", "email": f"user{n}@example.com"}
+
+
+async def bench_sequential(events: int, confirm_delay: float) -> dict:
+    """The old path: one basic_publish per event on a single channel, awaited in turn."""
+    broker = InMemoryBroker(confirm_delay=confirm_delay)
+    connection = await broker.connect()
+    channel = await connection.channel()
+    await channel.queue_declare("user_events", durable=True)
+    start = time.perf_counter()
+    for n in range(events):
+        await channel.basic_publish(
+            body=json.dumps(_event(n)).encode(),
+            routing_key="user_events",
+            properties=aiormq.spec.Basic.Properties(content_type="application/json", delivery_mode=2),
+        )
+    elapsed = time.perf_counter() - start
+    return {"events": events, "events_per_second": round(events / elapsed, 1)}
+
+
+async def bench_buffered(events: int, confirm_delay: float, batch_size: int, pool_size: int) -> dict:
+    broker = InMemoryBroker(confirm_delay=confirm_delay)
+    client = MessageQueueClient(
+        connect=broker.connect, publish_batch_size=batch_size, publish_channel_pool_size=pool_size
+    )
+    await client.connect()
+    start = time.perf_counter()
+    await asyncio.gather(*(client.publish_event("user_events", _event(n)) for n in range(events)))
+    elapsed = time.perf_counter() - start
+    await client.close()
+    return {"events": events, "events_per_second": round(events / elapsed, 1)}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--confirm-delay", type=float, default=0.0005)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    report = {
+        "confirm_delay_seconds": args.confirm_delay,
+        "sequential": await bench_sequential(args.events, args.confirm_delay),
+        "buffered": await bench_buffered(args.events, args.confirm_delay, args.batch_size, args.pool_size),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
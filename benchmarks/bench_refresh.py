@@ -0,0 +1,104 @@
+# Benchmark: refresh-token rotation, blacklist-per-refresh vs session generations
+#
+# Usage: python -m benchmarks.bench_refresh [--database-url URL] [--requests 2000] [--concurrency 1 8 32]
+#
+# "blacklist" reproduces the previous rotation: a revocation check plus one
+# token_blacklist INSERT and commit per refresh (blacklist writes go through,
+# not behind). "sessions" is the current
+# refresh_access_token, which advances the session generation with one
+# conditional UPDATE. Each worker refreshes its own token chain, handing
+# every new refresh token to its next call. The report includes how many
+# blacklist rows each mode left behind.
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.database import Base
+from app.models.token import TokenBlacklist
+from app.models.user import User
+from app.services.auth import login, refresh_access_token
+from app.services.hashing import password_hasher
+from app.services.revocation import blacklist_writer, revocation_cache, revoke_token
+from app.utils.security import create_access_token_wrapper, create_refresh_token_wrapper, decode_token_wrapper
+from benchmarks.common import run_concurrently
+
+
+async def legacy_refresh(db: AsyncSession, refresh_token: str) -> str:
+    """The rotation this replaced: check and blacklist the old token's jti, issue fresh tokens."""
+    payload = decode_token_wrapper(refresh_token)
+    if await revocation_cache.is_revoked(db, payload["jti"], payload["exp"]):
+        raise RuntimeError("refresh token already revoked")
+    await revoke_token(db, payload["jti"], datetime.fromtimestamp(payload["exp"], tz=timezone.utc))
+    claims = {"sub": payload["sub"], "user_id": payload["user_id"]}
+    create_access_token_wrapper(claims, expires_delta=timedelta(minutes=15))
+    return create_refresh_token_wrapper(claims)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    async with session_factory() as db:
+        users = [User(username=f"bench-refresh-{i}", email=f"refresh-{i}@example.com", hashed_password="x")
+                 for i in range(max(args.concurrency))]
+        db.add_all(users)
+        await db.commit()
+
+    async def blacklist_tokens(n):
+        return [create_refresh_token_wrapper({"sub": u.username, "user_id": u.id}) for u in users[:n]]
+
+    async def session_tokens(n):
+        tokens = []
+        async with session_factory() as db:
+            with patch.object(password_hasher, "verify", AsyncMock(return_value=True)):
+                for user in users[:n]:
+                    tokens.append((await login(db, user.username, "x")).refresh_token)
+        return tokens
+
+    async def session_refresh(db, token):
+        return (await refresh_access_token(db, token)).refresh_token
+
+    report = {}
+    blacklist_writer.session_factory = session_factory
+    blacklist_writer.flush_interval = 0
+    for mode, issue, refresh in (
+        ("blacklist", blacklist_tokens, legacy_refresh),
+        ("sessions", session_tokens, session_refresh),
+    ):
+        async with session_factory() as db:
+            rows_before = await db.scalar(select(func.count()).select_from(TokenBlacklist))
+        report[mode] = {}
+        for concurrency in args.concurrency:
+            tokens = deque(await issue(concurrency))
+
+            async def call():
+                async with session_factory() as db:
+                    tokens.append(await refresh(db, tokens.popleft()))
+
+            report[mode][concurrency] = await run_concurrently(call, args.requests, concurrency)
+        async with session_factory() as db:
+            rows_after = await db.scalar(select(func.count()).select_from(TokenBlacklist))
+        report[mode]["blacklist_rows_added"] = rows_after - rows_before
+
+    await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+# Benchmark: logout and legacy-refresh revocations, written through vs written behind
+#
+# Usage: python -m benchmarks.bench_revoke [--database-url URL] [--requests 2000] [--concurrency 1 8 32]
+#
+# "write_through" is the previous behaviour: each revocation inserts and
+# commits its own token_blacklist row inside the request. "write_behind" is
+# the current revoke_token, which queues the row for blacklist_writer to
+# insert with other revocations in one multi-row statement. Two operations
+# are measured: logout with an access token, and refresh with a refresh
+# token issued before sessions existed (the only refresh that still
+# blacklists). Reports throughput, latency percentiles and the commits the
+# database saw, after waiting for every queued row to be written.
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+from unittest.mock import patch
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.database import Base
+from app.models.token import TokenBlacklist
+from app.models.user import User
+from app.services.auth import logout, refresh_access_token
+from app.services.revocation import blacklist_writer
+from app.utils.security import create_access_token_wrapper, create_refresh_token_wrapper, decode_token_wrapper
+from benchmarks.common import run_concurrently
+
+OPERATIONS = ("logout", "legacy_refresh")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with session_factory() as db:
+        db.add(User(id=1, username="bench-revoke", email="bench-revoke@example.com", hashed_password="x"))
+        await db.commit()
+
+    commits = [0]
+
+    @event.listens_for(engine.sync_engine, "commit")
+    def count_commit(*_):
+        commits[0] += 1
+
+    claims = {"sub": "bench-revoke", "user_id": 1}
+    report = {}
+    blacklist_writer.session_factory = session_factory
+    for mode, flush_interval in (("write_through", 0), ("write_behind", blacklist_writer.flush_interval)):
+        report[mode] = {}
+        with patch.object(blacklist_writer, "flush_interval", flush_interval):
+            for operation in OPERATIONS:
+                report[mode][operation] = {}
+                for concurrency in args.concurrency:
+                    if operation == "logout":
+                        tokens = iter([decode_token_wrapper(create_access_token_wrapper(claims))
+                                       for _ in range(args.requests)])
+
+                        async def call():
+                            async with session_factory() as db:
+                                await logout(db, next(tokens))
+                    else:
+                        tokens = iter([create_refresh_token_wrapper(claims) for _ in range(args.requests)])
+
+                        async def call():
+                            async with session_factory() as db:
+                                await refresh_access_token(db, next(tokens))
+
+                    commits[0] = 0
+                    result = await run_concurrently(call, args.requests, concurrency)
+                    await blacklist_writer.flush()
+                    result["commits"] = commits[0]
+                    report[mode][operation][str(concurrency)] = result
+    await blacklist_writer.stop()
+
+    async with session_factory() as db:
+        rows = await db.scalar(select(func.count()).select_from(TokenBlacklist))
+    report["blacklist_rows"] = rows
+    await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,174 @@
+# Benchmark suite: every /auth route through the full app
+#
+# Usage: python -m benchmarks.bench_routes [--database-url URL] [--routes signup login refresh logout me]
+#            [--concurrency 1 8 32] [--requests 200] [--fast-hashing] [--output results.json]
+#
+# Requests go through the real ASGI app in-process via httpx (no sockets),
+# with the app's startup/shutdown hooks running around the suite and
+# RabbitMQ replaced by the in-process broker. Defaults to a throwaway SQLite
+# file; pass a Postgres URL to measure against a local server. bcrypt
+# dominates signup and login; --fast-hashing swaps it for SHA-256 to measure
+# everything else. Save results with --output and diff two runs with
+# python -m benchmarks.compare.
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import uuid
+from collections import deque
+from contextlib import ExitStack
+from unittest.mock import patch
+import httpx
+from benchmarks.common import run_concurrently
+
+ROUTES = ("signup", "login", "refresh", "logout", "me")
+PASSWORD = "benchmark-password"
+
+
+async def fast_hash(password: str) -> str:
+    return "sha256$" + hashlib.sha256(password.encode()).hexdigest()
+
+
+async def fast_verify(password: str, hashed_password: str) -> bool:
+    return hashed_password == await fast_hash(password)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def checked(response: httpx.Response) -> httpx.Response:
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.method} {response.request.url.path} -> {response.status_code}: {response.text}")
+    return response
+
+
+async def run_suite(args) -> dict:
+    # The app reads its settings at import time, so configure it first
+    from app import models  # noqa: F401  register every model on Base.metadata
+    from app.db.database import Base, engine
+    from app.main import app
+    from app.services.hashing import password_hasher
+    from app.services.memory_broker import InMemoryBroker
+    from app.services.message_queue import message_queue_client
+    from app.utils.security import create_access_token_wrapper, create_refresh_token_wrapper
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    run_id = uuid.uuid4().hex[:8]
+    counter = itertools.count()
+    results = {}
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(message_queue_client, "_connect", InMemoryBroker().connect))
+        if args.fast_hashing:
+            stack.enter_context(patch.object(password_hasher, "hash", fast_hash))
+            stack.enter_context(patch.object(password_hasher, "verify", fast_verify))
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                # One user per worker at the highest concurrency level
+                users = []
+                for _ in range(max(args.concurrency)):
+                    n = next(counter)
+                    response = checked(await client.post("/auth/signup", json={
+                        "username": f"bench-{run_id}-{n}", "email": f"bench-{run_id}-{n}@example.com", "password": PASSWORD,
+                    }))
+                    users.append(response.json())
+
+                def claims(user):
+                    return {"sub": user["username"], "user_id": user["id"]}
+
+                for route in args.routes:
+                    results[route] = {}
+                    for concurrency in args.concurrency:
+                        pool = itertools.cycle(users[:concurrency])
+
+                        if route == "signup":
+                            async def call():
+                                n = next(counter)
+                                checked(await client.post("/auth/signup", json={
+                                    "username": f"bench-{run_id}-{n}", "email": f"bench-{run_id}-{n}@example.com",
+                                    "password": PASSWORD,
+                                }))
+                        elif route == "login":
+                            async def call():
+                                user = next(pool)
+                                checked(await client.post("/auth/login", json={"username": user["username"], "password": PASSWORD}))
+                        elif route == "refresh":
+                            # Each refresh rotates its token, so workers hand the new one back
+                            tokens = deque(create_refresh_token_wrapper(claims(user)) for user in users[:concurrency])
+
+                            async def call():
+                                response = checked(await client.post("/auth/refresh", json={"refresh_token": tokens.popleft()}))
+                                tokens.append(response.json()["refresh_token"])
+                        elif route == "logout":
+                            # Logout revokes its token, so each call needs a fresh one
+                            tokens = deque(create_access_token_wrapper(claims(next(pool))) for _ in range(args.requests))
+
+                            async def call():
+                                headers = {"Authorization": f"Bearer {tokens.popleft()}"}
+                                checked(await client.post("/auth/logout", headers=headers))
+                        else:
+                            tokens = itertools.cycle([create_access_token_wrapper(claims(user)) for user in users[:concurrency]])
+
+                            async def call():
+                                checked(await client.get("/auth/me", headers={"Authorization": f"Bearer {next(tokens)}"}))
+
+                        results[route][str(concurrency)] = await run_concurrently(call, args.requests, concurrency)
+
+    await engine.dispose()
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=list(ROUTES))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requests per route and concurrency level")
+    parser.add_argument("--fast-hashing", action="store_true", help="replace bcrypt with SHA-256")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    # Every request comes from the same client address; don't let the login limiter cap the run
+    os.environ.setdefault("LOGIN_RATE_LIMIT_IP_ATTEMPTS", str(10 ** 9))
+
+    started = time.time()
+    results = await run_suite(args)
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": started,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "database": database_url.split(":", 1)[0],
+            "fast_hashing": args.fast_hashing,
+            "requests": args.requests,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
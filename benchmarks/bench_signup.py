@@ -0,0 +1,71 @@
+# Benchmark: signup database work, old select-select-insert path vs single upsert
+#
+# Usage: python -m benchmarks.bench_signup [--database-url URL] [--requests 2000] [--concurrency 1 8]
+#
+# Password hashing is replaced by a constant so only database round-trips are
+# compared. Defaults to a throwaway SQLite file; pass a Postgres URL to
+# measure against a local server (tables are created if missing).
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import tempfile
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.crud import user as user_crud
+from app.db.database import Base
+from app.models.user import User
+from benchmarks.common import run_concurrently
+
+
+async def legacy_signup(db: AsyncSession, username: str, email: str, hashed_password: str):
+    """The pre-upsert path: two existence checks, then add/commit/refresh."""
+    if await user_crud.get_user_by_username(db, username):
+        raise ValueError("Username already registered")
+    if await user_crud.get_user_by_email(db, email):
+        raise ValueError("Email already registered")
+    db_user = User(username=username, email=email, hashed_password=hashed_password)
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    counter = itertools.count()
+
+    async def old_path():
+        n = next(counter)
+        async with session_factory() as db:
+            await legacy_signup(db, f"bench-old-{n}", f"old-{n}@example.com", "hashed")
+
+    async def new_path():
+        n = next(counter)
+        async with session_factory() as db:
+            await user_crud.create_user(db, f"bench-new-{n}", f"new-{n}@example.com", "unused")
+            await db.commit()
+
+    report = {"database": engine.dialect.name, "old": {}, "new": {}}
+    with patch.object(user_crud.password_hasher, "hash", AsyncMock(return_value="hashed")):
+        for concurrency in args.concurrency:
+            report["old"][concurrency] = await run_concurrently(old_path, args.requests, concurrency)
+            report["new"][concurrency] = await run_concurrently(new_path, args.requests, concurrency)
+    await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
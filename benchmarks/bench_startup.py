@@ -0,0 +1,105 @@
+# Benchmark: cold start and time to first request
+#
+# Usage: python -m benchmarks.bench_startup [--database-url URL] [--runs 5] [--warmup 0 5]
+#
+# Each run is a fresh interpreter, so imports are cold. The child imports
+# app.main, runs the lifespan startup (with the in-process broker in place
+# of RabbitMQ), sends two authenticated GET /auth/me requests and shuts
+# down. Runs are repeated for each DB_POOL_WARMUP_CONNECTIONS value, so the
+# first request's latency can be compared with and without pool warm-up;
+# against Postgres the connect cost it saves is much larger than on SQLite.
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+async def child():
+    start = time.perf_counter()
+    from unittest.mock import patch
+    import httpx
+    from app.main import app
+    from app.services.memory_broker import InMemoryBroker
+    from app.services.message_queue import message_queue_client
+    from app.utils.security import create_access_token_wrapper
+    imported = time.perf_counter()
+
+    headers = {"Authorization": f"Bearer {create_access_token_wrapper({'sub': 'bench-startup', 'user_id': 1})}"}
+    timings = {"import_s": imported - start}
+    with patch.object(message_queue_client, "_connect", InMemoryBroker().connect):
+        lifespan = app.router.lifespan_context(app)
+        await lifespan.__aenter__()
+        ready = time.perf_counter()
+        timings["startup_s"] = ready - imported
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for name in ("first_request_ms", "second_request_ms"):
+                request_start = time.perf_counter()
+                response = await client.get("/auth/me", headers=headers)
+                timings[name] = (time.perf_counter() - request_start) * 1000
+                if response.status_code != 200:
+                    raise RuntimeError(f"/auth/me -> {response.status_code}: {response.text}")
+        timings["ready_to_first_response_s"] = time.perf_counter() - ready
+        shutdown_start = time.perf_counter()
+        await lifespan.__aexit__(None, None, None)
+        timings["shutdown_s"] = time.perf_counter() - shutdown_start
+    print(json.dumps(timings))
+
+
+async def seed(database_url: str):
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app import models  # noqa: F401  register every model on Base.metadata
+    from app.db.database import Base
+    from app.models.user import User
+
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with engine.begin() as conn:
+        await conn.execute(User.__table__.delete().where(User.id == 1))
+        await conn.execute(User.__table__.insert().values(
+            id=1, username="bench-startup", email="bench-startup@example.com", hashed_password="x"
+        ))
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", type=int, nargs="+", default=[0, 5], help="DB_POOL_WARMUP_CONNECTIONS values")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        asyncio.run(child())
+        return
+
+    database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    env = dict(os.environ, DATABASE_URL=database_url)
+    asyncio.run(seed(database_url))
+
+    report = {}
+    for warmup in args.warmup:
+        runs = []
+        for _ in range(args.runs):
+            spawned = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+                env=dict(env, DB_POOL_WARMUP_CONNECTIONS=str(warmup)),
+                capture_output=True, text=True, check=True,
+            )
+            timings = json.loads(result.stdout.strip().splitlines()[-1])
+            timings["process_total_s"] = time.perf_counter() - spawned
+            runs.append(timings)
+        report[f"warmup_{warmup}"] = {
+            key: round(statistics.median(run[key] for run in runs), 4) for key in runs[0]
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Benchmark: token encode/decode operations per second
+#
+# Usage: python -m benchmarks.bench_tokens [--iterations 5000] [--algorithms HS256 ES256 RS256]
+#
+# "legacy" calls python-jose with the raw key on every call, as the old
+# wrappers did; "engine" uses preloaded keys; "engine_memo" decodes the same
+# token repeatedly so it is served from the verified-token memo.
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+import rsa
+from ecdsa import NIST256p, SigningKey
+from jose import jwt
+from app.services.tokens import TokenEngine
+
+CLAIMS = {"sub": "bench", "user_id": 1}
+
+
+def ops_per_second(call: Callable, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call()
+    return round(iterations / (time.perf_counter() - start), 1)
+
+
+def legacy_encode(key: str, algorithm: str) -> str:
+    """Build the same claims as the engine, passing the raw key to python-jose."""
+    claims = dict(CLAIMS, type="access", jti=str(uuid.uuid4()), exp=datetime.now(timezone.utc) + timedelta(minutes=15))
+    return jwt.encode(claims, key, algorithm=algorithm)
+
+
+def private_key_for(algorithm: str) -> str:
+    if algorithm.startswith("HS"):
+        return "benchmark-secret"
+    if algorithm.startswith("ES"):
+        return SigningKey.generate(curve=NIST256p).to_pem().decode()
+    _, private_key = rsa.newkeys(2048)
+    return private_key.save_pkcs1().decode()
+
+
+def bench_algorithm(algorithm: str, iterations: int):
+    key = private_key_for(algorithm)
+    engine = TokenEngine(algorithm, key, cache_size=0)
+    memo_engine = TokenEngine(algorithm, key)
+    verification_key = key if algorithm.startswith("HS") else engine.verification_key.to_pem().decode()
+    token = engine.create_access_token(CLAIMS)
+    # Asymmetric signing is slow in the pure-Python backends; sign fewer times.
+    sign_iterations = iterations if algorithm.startswith("HS") else max(1, iterations // 20)
+
+    return {
+        "encode_ops": {
+            "legacy": ops_per_second(lambda: legacy_encode(key, algorithm), sign_iterations),
+            "engine": ops_per_second(lambda: engine.create_access_token(CLAIMS), sign_iterations),
+        },
+        "decode_ops": {
+            "legacy": ops_per_second(lambda: jwt.decode(token, verification_key, algorithms=[algorithm]), sign_iterations),
+            "engine": ops_per_second(lambda: engine.decode(token), sign_iterations),
+            "engine_memo": ops_per_second(lambda: memo_engine.decode(token), iterations),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--algorithms", nargs="+", default=["HS256", "ES256", "RS256"])
+    args = parser.parse_args()
+    print(json.dumps({alg: bench_algorithm(alg, args.iterations) for alg in args.algorithms}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Compare two bench_routes reports and flag regressions
+#
+# Usage: python -m benchmarks.compare BASELINE.json CANDIDATE.json [--threshold 10]
+#
+# Prints throughput and p99 for every route and concurrency level present in
+# both reports, and exits with status 1 if any throughput dropped or any p99
+# grew by more than --threshold percent.
+import argparse
+import json
+import sys
+
+
+def change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline {baseline['meta']['commit']} vs candidate {candidate['meta']['commit']}")
+    print(f"{'route':<8} {'conc':>5} {'rps old':>10} {'rps new':>10} {'Δ%':>7} {'p99 old':>9} {'p99 new':>9} {'Δ%':>7}")
+    regressions = []
+    for route, levels in baseline["results"].items():
+        for concurrency, old in levels.items():
+            new = candidate["results"].get(route, {}).get(concurrency)
+            if new is None:
+                continue
+            rps_change = change(old["throughput_rps"], new["throughput_rps"])
+            p99_change = change(old["p99_ms"], new["p99_ms"])
+            flagged = rps_change < -args.threshold or p99_change > args.threshold
+            if flagged:
+                regressions.append(f"{route}@{concurrency}")
+            print(
+                f"{route:<8} {concurrency:>5} {old['throughput_rps']:>10.1f} {new['throughput_rps']:>10.1f} "
+                f"{rps_change:>+7.1f} {old['p99_ms']:>9.2f} {new['p99_ms']:>9.2f} {p99_change:>+7.1f}"
+                + ("  <- regression" if flagged else "")
+            )
+
+    if regressions:
+        print(f"Regressions beyond {args.threshold}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
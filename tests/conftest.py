@@ -0,0 +1,15 @@
+# Shared fixtures for tests that need a real (SQLite) database
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.database import Base
+import app.models  # noqa: F401  register every model on Base.metadata
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    """A sessionmaker bound to a fresh SQLite database with all tables created."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    await engine.dispose()
@@ -75,17 +75,12 @@ async def test_token_expiration():
     assert "exp" in refresh_decoded
 
 @pytest.mark.asyncio
-async def test_signup_publishes_user_created_event():
-    """Test that signup publishes a UserCreated event to the message queue."""
+async def test_signup_records_user_created_event():
+    """Test that signup stages a UserCreated event in the outbox with the user row."""
     # Mock the database session and CRUD functions
-    with patch('app.services.auth.get_user_by_username') as mock_get_by_username, \
-         patch('app.services.auth.get_user_by_email') as mock_get_by_email, \
-         patch('app.services.auth.create_user') as mock_create_user, \
-         patch('app.services.auth.message_queue_client') as mock_mq_client:
-        
-        # Configure mocks
-        mock_get_by_username.return_value = None
-        mock_get_by_email.return_value = None
+    with patch('app.services.auth.create_user') as mock_create_user, \
+         patch('app.services.auth.record_user_created_event') as mock_record_event, \
+         patch('app.services.auth.outbox_relay') as mock_relay:
         
         # Mock user object
         mock_user = AsyncMock()
@@ -97,9 +92,6 @@ async def test_signup_publishes_user_created_event():
         
         mock_create_user.return_value = mock_user
         
-        # Mock the message queue client
-        mock_mq_client.publish_user_created_event = AsyncMock()
-        
         # Create a mock database session
         mock_db = AsyncMock(spec=AsyncSession)
         
@@ -115,9 +107,7 @@ async def test_signup_publishes_user_created_event():
         # Verify that the user was created
         mock_create_user.assert_called_once_with(mock_db, "testuser", "test@example.com", "password123")
         
-        # Verify that the UserCreated event was published
-        mock_mq_client.publish_user_created_event.assert_called_once()
-        call_args = mock_mq_client.publish_user_created_event.call_args[0][0]
-        assert call_args["id"] == 1
-        assert call_args["username"] == "testuser"
-        assert call_args["email"] == "test@example.com"
\ No newline at end of file
+        # Verify that the event was staged before the single commit and the relay woken
+        mock_record_event.assert_called_once_with(mock_db, mock_user)
+        mock_db.commit.assert_awaited_once()
+        mock_relay.notify.assert_called_once()
@@ -0,0 +1,87 @@
+# Tests for bulk user import
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import func, select
+from shared_libs import hash_password, verify_password
+from app.api import routes
+from app.models.outbox import OutboxEvent
+from app.models.user import User
+from app.services.bulk_import import BulkUserImporter, parse_records
+from app.services.hashing import PasswordHashingPool
+
+async def _stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+async def _collect(records):
+    return [record async for record in records]
+
+@pytest.mark.asyncio
+async def test_parse_records_handles_split_lines_and_bad_rows():
+    """Test that records split across chunks are parsed and bad lines become errors."""
+    ndjson = await _collect(parse_records(_stream(b'{"username": "a"}\n{"user', b'name": "b"}\nnot json\n'), "ndjson"))
+    assert ndjson[0] == (1, {"username": "a"})
+    assert ndjson[1] == (2, {"username": "b"})
+    assert ndjson[2][0] == 3 and ndjson[2][1].startswith("Invalid JSON")
+
+    mixed = await _collect(parse_records(_stream(b'{"username": "\xff"}\n{"username": "e"}\n'), "ndjson"))
+    assert mixed[0][0] == 1 and mixed[0][1].startswith("Invalid UTF-8")
+    assert mixed[1] == (2, {"username": "e"})
+
+    rows = await _collect(parse_records(_stream(b"username,email\r\nc,c@example.com\r\nd\r\n"), "csv"))
+    assert rows == [(2, {"username": "c", "email": "c@example.com"}), (3, "Expected 2 columns, got 1")]
+
+@pytest.mark.asyncio
+async def test_importer_creates_users_and_reports_each_failed_row(session_factory):
+    """Test that valid rows are created with outbox events while conflicts and invalid rows are reported."""
+    existing_hash = hash_password("existing-password")
+    async with session_factory() as db:
+        db.add(User(username="taken", email="taken@example.com", hashed_password=existing_hash))
+        await db.commit()
+
+    records = [
+        (1, {"username": "alice", "email": "alice@example.com", "password": "alice-password"}),
+        (2, {"username": "bob", "email": "bob@example.com", "password_hash": existing_hash}),
+        (3, {"username": "taken", "email": "new@example.com", "password_hash": existing_hash}),
+        (4, {"username": "carol", "email": "taken@example.com", "password_hash": existing_hash}),
+        (5, {"username": "alice", "email": "alice2@example.com", "password_hash": existing_hash}),
+        (6, {"username": "dave", "email": "not-an-email", "password_hash": existing_hash}),
+        (7, {"username": "erin", "email": "erin@example.com"}),
+        (8, {"username": "alice@example.com", "email": "frank@example.com", "password_hash": existing_hash}),
+    ]
+    hasher = PasswordHashingPool(executor_kind="thread", max_workers=2, max_queue=0)
+    try:
+        importer = BulkUserImporter(session_factory=session_factory, hasher=hasher, batch_size=3)
+        result = await importer.run(_stream(*records))
+    finally:
+        hasher.shutdown()
+
+    assert result.created == 2
+    assert result.failed == 6
+    reasons = {error.line: error.reason for error in result.errors}
+    assert reasons[3] == "Username already registered"
+    assert reasons[4] == "Email already registered"
+    assert reasons[5] == "Username already registered"
+    assert reasons[6].startswith("email:")
+    assert "exactly one of password or password_hash" in reasons[7]
+    assert "must not contain '@'" in reasons[8]
+
+    async with session_factory() as db:
+        alice = (await db.execute(select(User).where(User.username == "alice"))).scalar_one()
+        events = await db.scalar(select(func.count()).select_from(OutboxEvent))
+    assert verify_password("alice-password", alice.hashed_password)
+    assert events == 2
+
+@pytest.mark.asyncio
+async def test_import_route_requires_internal_api_key(monkeypatch):
+    """Test that the import endpoint rejects callers without the internal API key."""
+    monkeypatch.setattr(routes.settings, "INTERNAL_API_KEY", "internal-key")
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/auth")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        missing = await client.post("/auth/admin/users/import", content=b"")
+        wrong = await client.post("/auth/admin/users/import", content=b"", headers={"X-Internal-Api-Key": "nope"})
+    assert missing.status_code == 403
+    assert wrong.status_code == 403
@@ -0,0 +1,24 @@
+# Tests for expired token blacklist compaction
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import func, select
+from app.models.token import TokenBlacklist
+from app.services.compaction import BlacklistCompactor
+
+@pytest.mark.asyncio
+async def test_compactor_purges_only_expired_rows_in_batches(session_factory):
+    """Test that expired rows are deleted in batches and live rows are kept."""
+    now = datetime.utcnow()
+    async with session_factory() as db:
+        db.add_all(TokenBlacklist(jti=f"expired-{i}", expires_at=now - timedelta(hours=1)) for i in range(25))
+        db.add_all(TokenBlacklist(jti=f"live-{i}", expires_at=now + timedelta(hours=1)) for i in range(5))
+        await db.commit()
+
+    compactor = BlacklistCompactor(session_factory=session_factory, batch_size=10, batch_pause=0)
+    result = await compactor.run_once()
+
+    assert result.rows_purged == 25
+    assert result.batches == 3
+    async with session_factory() as db:
+        remaining = await db.scalar(select(func.count()).select_from(TokenBlacklist))
+    assert remaining == 5
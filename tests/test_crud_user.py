@@ -0,0 +1,73 @@
+# Tests for user CRUD operations against SQLite
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import HTTPException
+from app.crud.user import (
+    UserRecord, create_user, get_user_by_email, get_user_by_id, get_user_by_login, get_user_by_username,
+)
+
+@pytest.fixture(autouse=True)
+def fast_hasher():
+    with patch("app.crud.user.password_hasher") as mock_hasher:
+        mock_hasher.hash = AsyncMock(return_value="hashed")
+        yield mock_hasher
+
+@pytest.mark.asyncio
+async def test_create_user_inserts_and_returns_user(session_factory):
+    """Test that create_user inserts the row and returns its generated id."""
+    async with session_factory() as db:
+        user = await create_user(db, "alice", "alice@example.com", "password123")
+        await db.commit()
+        assert user.id is not None
+        assert user.is_active is True
+
+        stored = await get_user_by_username(db, "alice")
+        assert stored.id == user.id
+        assert stored.hashed_password == "hashed"
+
+@pytest.mark.asyncio
+async def test_lookups_return_records_outside_the_identity_map(session_factory):
+    """Test that user lookups return slotted records and leave the session empty."""
+    async with session_factory() as db:
+        user = await create_user(db, "alice", "alice@example.com", "password123")
+        await db.commit()
+
+    async with session_factory() as db:
+        by_id = await get_user_by_id(db, user.id)
+        assert by_id == await get_user_by_email(db, "alice@example.com")
+        assert by_id == UserRecord(user.id, "alice", "alice@example.com", "hashed", True, 0)
+        assert not hasattr(by_id, "__dict__")
+        assert len(db.identity_map) == 0
+        assert await get_user_by_username(db, "nobody") is None
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("username,email,detail", [
+    ("alice", "other@example.com", "Username already registered"),
+    ("bob", "alice@example.com", "Email already registered"),
+    ("ALICE", "other@example.com", "Username already registered"),
+    ("bob", "Alice@Example.com", "Email already registered"),
+])
+async def test_create_user_reports_which_field_collided(session_factory, username, email, detail):
+    """Test that a duplicate signup reports the colliding field."""
+    async with session_factory() as db:
+        await create_user(db, "alice", "alice@example.com", "password123")
+        await db.commit()
+        with pytest.raises(HTTPException) as exc_info:
+            await create_user(db, username, email, "password123")
+
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == detail
+
+@pytest.mark.asyncio
+async def test_get_user_by_login_matches_username_or_email_ignoring_case(session_factory):
+    """Test that login lookups accept either identifier in any case."""
+    async with session_factory() as db:
+        alice = await create_user(db, "Alice", "alice@example.com", "password123")
+        bob = await create_user(db, "bob", "BOB@example.com", "password123")
+        await db.commit()
+
+        assert (await get_user_by_login(db, "  aLiCe ")).id == alice.id
+        assert (await get_user_by_login(db, "ALICE@EXAMPLE.COM")).id == alice.id
+        assert (await get_user_by_login(db, "bob@example.com")).id == bob.id
+        assert (await get_user_by_login(db, "Bob")).id == bob.id
+        assert await get_user_by_login(db, "carol") is None
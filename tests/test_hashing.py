@@ -0,0 +1,83 @@
+# Unit tests for the password hashing executor
+import pytest
+from fastapi import HTTPException
+from app.services.hashing import PasswordHashingPool
+from app.services.password_policy import PasswordPolicy, calibrate_policy
+
+class _TaggingPolicy:
+    def hash(self, password):
+        return f"hashed:{password}"
+
+@pytest.mark.asyncio
+async def test_hashing_pool_hash_and_verify():
+    """Test that the pool hashes and verifies passwords off the event loop."""
+    pool = PasswordHashingPool(executor_kind="thread", max_workers=2, max_queue=2)
+    try:
+        hashed = await pool.hash("testpassword123")
+        assert hashed != "testpassword123"
+        assert await pool.verify("testpassword123", hashed)
+        assert not await pool.verify("wrongpassword", hashed)
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_hashing_pool_rejects_when_saturated():
+    """Test that a saturated pool rejects new calls with 429 instead of queueing."""
+    pool = PasswordHashingPool(executor_kind="thread", max_workers=1, max_queue=0)
+    pool._pending = pool.capacity
+
+    with pytest.raises(HTTPException) as exc_info:
+        await pool.verify("password", "hash")
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers["Retry-After"] == "1"
+
+def test_hashing_pool_rejects_unknown_executor():
+    """Test that only process and thread executors are accepted."""
+    with pytest.raises(ValueError):
+        PasswordHashingPool(executor_kind="fiber")
+
+@pytest.mark.asyncio
+async def test_hash_many_preserves_order():
+    """Test that batch hashing returns one hash per password, in input order."""
+    pool = PasswordHashingPool(executor_kind="thread", max_workers=3, max_queue=0, policy=_TaggingPolicy())
+    try:
+        passwords = [f"password-{i}" for i in range(50)]
+        assert await pool.hash_many(passwords, chunk_size=7) == [f"hashed:{p}" for p in passwords]
+    finally:
+        pool.shutdown()
+
+def test_policy_verifies_both_schemes_and_flags_weaker_hashes():
+    """Test that bcrypt and Argon2id hashes verify under any policy and outdated ones need an update."""
+    weak_bcrypt = PasswordPolicy(bcrypt_rounds=4)
+    bcrypt_policy = PasswordPolicy(bcrypt_rounds=5)
+    argon2_policy = PasswordPolicy(scheme="argon2", argon2_time_cost=1, argon2_memory_cost=1024)
+
+    old = weak_bcrypt.hash("secret")
+    new = argon2_policy.hash("secret")
+    assert new.startswith("$argon2id$")
+    for policy in (weak_bcrypt, bcrypt_policy, argon2_policy):
+        assert policy.verify("secret", old) and policy.verify("secret", new)
+        assert not policy.verify("wrong", new)
+    assert not bcrypt_policy.verify("secret", "not-a-hash")
+
+    assert bcrypt_policy.needs_update(old)
+    assert not weak_bcrypt.needs_update(bcrypt_policy.hash("secret"))
+    assert argon2_policy.needs_update(old)
+    assert not argon2_policy.needs_update(new)
+    assert PasswordPolicy(scheme="argon2", argon2_time_cost=2, argon2_memory_cost=1024).needs_update(new)
+
+def test_calibration_only_raises_cost():
+    """Test that calibration spends spare budget but never goes below the configured cost."""
+    floor = PasswordPolicy(bcrypt_rounds=4)
+    assert calibrate_policy(floor, target_seconds=0.0) == floor
+    assert calibrate_policy(floor, target_seconds=10.0, max_bcrypt_rounds=6).bcrypt_rounds == 6
+
+    argon2_floor = PasswordPolicy(scheme="argon2", argon2_time_cost=1, argon2_memory_cost=1024)
+    assert calibrate_policy(argon2_floor, target_seconds=10.0, max_argon2_time_cost=3).argon2_time_cost == 3
+
+def test_unknown_scheme_is_rejected():
+    """Test that only bcrypt and argon2 policies can be built."""
+    with pytest.raises(ValueError):
+        PasswordPolicy(scheme="md5")
@@ -0,0 +1,48 @@
+# Tests for request and query instrumentation
+import httpx
+import pytest
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+from app.core.instrumentation import RequestMetricsMiddleware, metrics_response, timed_query
+
+def _count(name, labels):
+    return REGISTRY.get_sample_value(f"{name}_count", labels) or 0
+
+@pytest.mark.asyncio
+async def test_middleware_labels_requests_by_route_template_and_status():
+    """Test that requests are timed under their route template, not the raw path."""
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/metrics")
+    def metrics():
+        return metrics_response()
+
+    labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+    before = _count("auth_http_request_seconds", labels)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        await client.get("/items/1")
+        await client.get("/items/2")
+        await client.get("/missing")
+        scrape = await client.get("/metrics")
+
+    assert _count("auth_http_request_seconds", labels) == before + 2
+    assert _count("auth_http_request_seconds", {"method": "GET", "route": "unmatched", "status": "404"}) >= 1
+    assert scrape.headers["content-type"].startswith("text/plain")
+    assert b"auth_http_request_seconds_bucket" in scrape.content
+
+@pytest.mark.asyncio
+async def test_timed_query_records_failures_too():
+    """Test that CRUD timing is recorded even when the query raises."""
+    @timed_query
+    async def _failing_query(db):
+        raise RuntimeError("boom")
+
+    before = _count("auth_db_query_seconds", {"operation": "failing_query"})
+    with pytest.raises(RuntimeError):
+        await _failing_query(None)
+    assert _count("auth_db_query_seconds", {"operation": "failing_query"}) == before + 1
@@ -0,0 +1,75 @@
+# Tests for batch token introspection
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from unittest.mock import patch
+from app.crud import token as token_crud
+from app.crud.session import create_refresh_session, revoke_refresh_session
+from app.crud.token import add_token_to_blacklist
+from app.crud.user import bump_token_version
+from app.models.user import User
+from app.services.introspection import introspect_tokens
+from app.services.sessions import token_version_cache
+from app.utils.security import create_access_token_wrapper, create_refresh_token_wrapper, decode_token_wrapper
+
+@pytest.fixture(autouse=True)
+def _clear_token_versions():
+    token_version_cache.clear()
+    yield
+    token_version_cache.clear()
+
+async def _add_users(session_factory):
+    async with session_factory() as db:
+        db.add(User(id=1, username="alice", email="alice@example.com", hashed_password="unused"))
+        db.add(User(id=2, username="bob", email="bob@example.com", hashed_password="unused"))
+        await db.commit()
+
+@pytest.mark.asyncio
+async def test_introspect_reports_each_token_in_order(session_factory):
+    """Test that valid, revoked, ended-session, malformed, refresh and stale-version tokens are told apart."""
+    await _add_users(session_factory)
+    alice = {"sub": "alice", "user_id": 1}
+    valid = create_access_token_wrapper({**alice, "sid": "s1"})
+    revoked = create_access_token_wrapper(alice)
+    refresh = create_refresh_token_wrapper(alice)
+    stale = create_access_token_wrapper({"sub": "bob", "user_id": 2})
+
+    async with session_factory() as db:
+        await add_token_to_blacklist(db, decode_token_wrapper(revoked)["jti"], datetime.utcnow() + timedelta(hours=1))
+        await bump_token_version(db, 2)
+        ended = await create_refresh_session(db, 1, datetime.utcnow() + timedelta(days=1))
+        await revoke_refresh_session(db, ended.id, datetime.utcnow())
+        logged_out = create_access_token_wrapper({**alice, "sid": ended.id})
+        results = await introspect_tokens(db, [valid, revoked, "not-a-jwt", refresh, stale, logged_out])
+
+    payload = decode_token_wrapper(valid)
+    assert results[0] == {
+        "active": True, "sub": "alice", "user_id": 1, "exp": payload["exp"], "jti": payload["jti"], "sid": "s1",
+    }
+    assert [result["active"] for result in results] == [True, False, False, False, False, False]
+    assert results[1] == {"active": False}
+
+@pytest.mark.asyncio
+async def test_introspect_checks_revocation_with_one_query(session_factory):
+    """Test that a batch confirms all of its JTIs with a single blacklist query."""
+    await _add_users(session_factory)
+    tokens = [create_access_token_wrapper({"sub": "alice", "user_id": 1}) for _ in range(20)]
+
+    async with session_factory() as db:
+        with patch("app.services.revocation.is_token_blacklisted") as single, \
+                patch("app.services.revocation.get_blacklisted_jtis", wraps=token_crud.get_blacklisted_jtis) as batch:
+            results = await introspect_tokens(db, tokens)
+
+    assert all(result["active"] for result in results)
+    assert batch.await_count == 1
+    assert len(batch.await_args.args[1]) == 20
+    single.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_introspect_rejects_oversized_batches(session_factory):
+    """Test that a batch above INTROSPECTION_MAX_TOKENS is refused before any work."""
+    async with session_factory() as db:
+        with patch("app.services.introspection.settings.INTROSPECTION_MAX_TOKENS", 2):
+            with pytest.raises(HTTPException) as exc:
+                await introspect_tokens(db, ["a", "b", "c"])
+    assert exc.value.status_code == 400
@@ -0,0 +1,64 @@
+# Tests for startup warm-up and graceful request draining
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.lifecycle import InFlightRequests, RequestDrainMiddleware
+from app.db.database import warm_up_pool
+from app.main import create_app
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_running_requests_and_rejects_new_ones():
+    """Test that draining lets in-flight requests finish while new ones get 503."""
+    release = asyncio.Event()
+    tracker = InFlightRequests()
+    app = FastAPI()
+    app.add_middleware(RequestDrainMiddleware, tracker=tracker)
+
+    @app.get("/slow")
+    async def slow():
+        await release.wait()
+        return {"done": True}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        running = asyncio.create_task(client.get("/slow"))
+        while tracker.count == 0:
+            await asyncio.sleep(0)
+        drain = asyncio.create_task(tracker.drain(timeout=5))
+        await asyncio.sleep(0)
+
+        rejected = await client.get("/slow")
+        assert rejected.status_code == 503
+        assert rejected.headers["connection"] == "close"
+        assert not drain.done()
+
+        release.set()
+        assert (await running).json() == {"done": True}
+        assert await drain is True
+
+@pytest.mark.asyncio
+async def test_drain_times_out_on_stuck_requests():
+    """Test that drain gives up after its timeout."""
+    tracker = InFlightRequests()
+    tracker.enter()
+    assert await tracker.drain(timeout=0.01) is False
+
+@pytest.mark.asyncio
+async def test_warm_up_pool_opens_connections_up_to_pool_size(tmp_path):
+    """Test that warm-up leaves the requested number of idle connections in the pool."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'warm.db'}", poolclass=AsyncAdaptedQueuePool, pool_size=3)
+    assert await warm_up_pool(engine, 0) == 0
+    assert engine.pool.checkedin() == 0
+    assert await warm_up_pool(engine, 10) == 3
+    assert engine.pool.checkedin() == 3
+    assert engine.pool.checkedout() == 0
+    await engine.dispose()
+
+def test_create_app_builds_independent_apps():
+    """Test that the factory returns a fully routed app with its own request tracker."""
+    first, second = create_app(), create_app()
+    assert first is not second
+    assert first.state.in_flight is not second.state.in_flight
+    assert "/auth/sessions" in first.openapi()["paths"]
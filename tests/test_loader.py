@@ -0,0 +1,99 @@
+# Tests for coalescing concurrent point lookups
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+from app.crud import token as token_crud, user as user_crud
+from app.crud.loader import BatchLoader
+from app.crud.token import add_token_to_blacklist, is_token_blacklisted
+from app.crud.user import get_user_by_id
+from app.models.user import User
+
+class _Counting:
+    """batch_fn that records each batch and answers key -> key * 10."""
+
+    def __init__(self, delay: float = 0):
+        self.batches = []
+        self.delay = delay
+
+    async def __call__(self, db, keys):
+        self.batches.append(list(keys))
+        await asyncio.sleep(self.delay)
+        return {key: key * 10 for key in keys if key >= 0}
+
+class _Session:
+    bind = "primary"
+
+@pytest.mark.asyncio
+async def test_identical_and_distinct_keys_in_one_tick_share_a_query():
+    """Test that duplicates wait on one fetch and distinct keys go out as a single batch."""
+    fetch = _Counting()
+    loader = BatchLoader("test", fetch)
+    results = await asyncio.gather(*(loader.load(_Session(), key) for key in [1, 2, 1, 3, 1, -1]))
+    assert results == [10, 20, 10, 30, 10, None]
+    assert fetch.batches == [[1, 2, 3, -1]]
+
+@pytest.mark.asyncio
+async def test_lookups_join_a_fetch_already_in_flight():
+    """Test that a key requested while its query runs waits for it instead of querying again."""
+    fetch = _Counting(delay=0.05)
+    loader = BatchLoader("test", fetch)
+    first = asyncio.ensure_future(loader.load(_Session(), 1))
+    await asyncio.sleep(0.01)
+    assert await loader.load(_Session(), 1) == 10
+    assert await first == 10
+    assert fetch.batches == [[1]]
+
+@pytest.mark.asyncio
+async def test_batches_are_split_by_engine_and_size():
+    """Test that keys for different engines never share a query and batches respect max_batch_size."""
+    class _Replica:
+        bind = "replica"
+
+    fetch = _Counting()
+    loader = BatchLoader("test", fetch, max_batch_size=2)
+    await asyncio.gather(loader.load(_Session(), 1), loader.load(_Replica(), 2), loader.load(_Session(), 3),
+                         loader.load(_Session(), 4))
+    assert sorted(fetch.batches) == [[1, 3], [2], [4]]
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter_and_cancelled_leaders_hand_over():
+    """Test that a failed query fails the whole batch, while a cancelled leader makes waiters retry."""
+    loader = BatchLoader("test", AsyncMock(side_effect=RuntimeError("db down")))
+    results = await asyncio.gather(loader.load(_Session(), 1), loader.load(_Session(), 2), return_exceptions=True)
+    assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+
+    fetch = _Counting(delay=0.05)
+    loader = BatchLoader("test", fetch)
+    leader = asyncio.ensure_future(loader.load(_Session(), 1))
+    follower = asyncio.ensure_future(loader.load(_Session(), 1))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    assert await follower == 10
+    assert fetch.batches == [[1], [1]]
+
+@pytest.mark.asyncio
+async def test_crud_lookups_are_coalesced_across_sessions(session_factory):
+    """Test that concurrent get_user_by_id and is_token_blacklisted calls each run one query."""
+    async with session_factory() as db:
+        db.add_all([User(id=i, username=f"u{i}", email=f"u{i}@example.com", hashed_password="x") for i in (1, 2)])
+        await db.commit()
+        await add_token_to_blacklist(db, "revoked", datetime.utcnow() + timedelta(hours=1))
+
+    user_loader, blacklist_loader = user_crud._user_by_id_loader, token_crud._blacklist_loader
+    sessions = [session_factory() for _ in range(6)]
+    try:
+        with patch.object(user_loader, "batch_fn", wraps=user_loader.batch_fn) as user_fetch, \
+                patch.object(blacklist_loader, "batch_fn", wraps=blacklist_loader.batch_fn) as blacklist_fetch:
+            users = await asyncio.gather(*(get_user_by_id(db, i % 3) for i, db in enumerate(sessions)))
+            revoked = await asyncio.gather(
+                *(is_token_blacklisted(db, jti) for db, jti in zip(sessions, ["revoked", "live"] * 3))
+            )
+    finally:
+        for db in sessions:
+            await db.close()
+
+    assert [user and user.username for user in users] == [None, "u1", "u2"] * 2
+    assert revoked == [True, False] * 3
+    assert user_fetch.await_count == blacklist_fetch.await_count == 1
+    assert sorted(user_fetch.await_args.args[1]) == [0, 1, 2]
@@ -0,0 +1,64 @@
+# Tests for the transactional outbox relay
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from sqlalchemy import func, select
+from app.models.outbox import OutboxEvent
+from app.services.memory_broker import InMemoryBroker
+from app.services.message_queue import MessageQueueClient
+from app.services.outbox import OutboxRelay, record_user_created_event
+
+async def _stage_users(session_factory, count):
+    async with session_factory() as db:
+        for i in range(count):
+            record_user_created_event(db, SimpleNamespace(id=i, username=f"user{i}", email=f"user{i}@example.com"))
+        await db.commit()
+
+async def _outbox_size(session_factory):
+    async with session_factory() as db:
+        return await db.scalar(select(func.count()).select_from(OutboxEvent))
+
+@pytest.mark.asyncio
+async def test_relay_publishes_and_removes_events(session_factory):
+    """Test that confirmed events are published in order and deleted from the outbox."""
+    broker = InMemoryBroker()
+    client = MessageQueueClient(connect=broker.connect)
+    await _stage_users(session_factory, 5)
+
+    relay = OutboxRelay(client=client, session_factory=session_factory, batch_size=2)
+    assert await relay.drain() == 5
+
+    messages = broker.queues[client.queue_name].messages
+    assert [json.loads(m.body)["user_id"] for m in messages] == [0, 1, 2, 3, 4]
+    assert json.loads(messages[0].body)["event_type"] == "UserCreated"
+    assert await _outbox_size(session_factory) == 0
+
+@pytest.mark.asyncio
+async def test_relay_keeps_events_when_publish_fails(session_factory):
+    """Test that unconfirmed events stay in the outbox with a backoff instead of being lost."""
+    client = MessageQueueClient()
+    client.connection = AsyncMock()
+    client.channel = AsyncMock()
+    client.connection.channel.return_value.basic_publish.side_effect = ConnectionError("nack")
+    await _stage_users(session_factory, 2)
+
+    relay = OutboxRelay(client=client, session_factory=session_factory)
+    assert await relay.drain() == 0
+
+    async with session_factory() as db:
+        events = (await db.execute(select(OutboxEvent))).scalars().all()
+    assert len(events) == 2
+    assert all(event.attempts == 1 and event.available_at > event.created_at for event in events)
+    # Rescheduled events are not due yet, so nothing is retried immediately
+    assert await relay.relay_batch() == 0
+
+@pytest.mark.asyncio
+async def test_relay_waits_while_broker_is_down(session_factory):
+    """Test that a broker outage leaves events untouched for later delivery."""
+    client = MessageQueueClient(connect=AsyncMock(side_effect=ConnectionError("down")))
+    await _stage_users(session_factory, 1)
+
+    relay = OutboxRelay(client=client, session_factory=session_factory)
+    assert await relay.relay_batch() == 0
+    assert await _outbox_size(session_factory) == 1
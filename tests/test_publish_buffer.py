@@ -0,0 +1,68 @@
+# Tests for batched, confirmed publishing in MessageQueueClient
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock
+from app.services.memory_broker import InMemoryBroker
+from app.services.message_queue import MessageQueueClient
+
+@pytest.mark.asyncio
+async def test_publish_buffer_batches_events_across_channel_pool():
+    """Test that concurrent publishes are flushed in batches over pooled channels."""
+    broker = InMemoryBroker()
+    client = MessageQueueClient(connect=broker.connect, publish_batch_size=10, publish_channel_pool_size=2)
+    await client.connect()
+
+    await asyncio.gather(*(client.publish_event("user_events", {"n": i}) for i in range(25)))
+
+    bodies = [json.loads(m.body)["n"] for m in broker.queues["user_events"].messages]
+    assert sorted(bodies) == list(range(25))
+    assert len(client.publish_buffer._channels) == 2
+    assert client.publish_buffer.pending == 0
+    await client.close()
+
+@pytest.mark.asyncio
+async def test_publish_buffer_bounds_in_flight_messages():
+    """Test that no more than max_in_flight messages await confirms at once."""
+    broker = InMemoryBroker(confirm_delay=0.01)
+    client = MessageQueueClient(connect=broker.connect, publish_batch_size=50, publish_max_in_flight=8)
+    await client.connect()
+    peak = 0
+
+    async def sample():
+        nonlocal peak
+        while True:
+            peak = max(peak, client.publish_buffer._in_flight)
+            await asyncio.sleep(0.001)
+
+    sampler = asyncio.create_task(sample())
+    await asyncio.gather(*(client.publish_event("user_events", {"n": i}) for i in range(40)))
+    sampler.cancel()
+
+    assert 0 < peak <= 8
+    assert len(broker.queues["user_events"].messages) == 40
+    await client.close()
+
+@pytest.mark.asyncio
+async def test_publish_buffer_reports_unconfirmed_messages():
+    """Test that a failed confirm is raised to the publisher."""
+    client = MessageQueueClient()
+    client.connection = AsyncMock()
+    client.channel = AsyncMock()
+    client.connection.channel.return_value.basic_publish.side_effect = ConnectionError("nack")
+
+    with pytest.raises(ConnectionError):
+        await client.publish_event("user_events", {"n": 1})
+
+@pytest.mark.asyncio
+async def test_close_flushes_pending_events():
+    """Test that closing the client publishes events still sitting in the buffer."""
+    broker = InMemoryBroker()
+    client = MessageQueueClient(connect=broker.connect, publish_flush_interval=10)
+    await client.connect()
+
+    futures = [client.publish_buffer.submit("user_events", {"n": i}) for i in range(3)]
+    await client.close()
+
+    assert all(future.done() and future.exception() is None for future in futures)
+    assert len(broker.queues["user_events"].messages) == 3
@@ -0,0 +1,144 @@
+# Tests for login rate limiting
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+import pytest
+from fastapi import HTTPException
+from app.services import auth
+from app.services.rate_limit import InMemoryRateLimitBackend, LoginRateLimiter
+
+@pytest.mark.asyncio
+async def test_sliding_window_frees_slots_as_events_age_out(monkeypatch):
+    """Test that a full window reports when the oldest event expires."""
+    now = [1000.0]
+    monkeypatch.setattr("app.services.rate_limit.time.monotonic", lambda: now[0])
+    backend = InMemoryRateLimitBackend()
+    for offset in (0, 10, 20):
+        now[0] = 1000.0 + offset
+        await backend.record("key", limit=3, window=60)
+
+    assert await backend.retry_after("key", limit=3, window=60) == 40
+    now[0] = 1061.0
+    assert await backend.retry_after("key", limit=3, window=60) == 0
+
+@pytest.mark.asyncio
+async def test_in_memory_backend_evicts_least_recently_used_keys():
+    """Test that the backend keeps at most max_keys keys."""
+    backend = InMemoryRateLimitBackend(max_keys=2)
+    for key in ("a", "b", "c"):
+        await backend.record(key, limit=1, window=60)
+    assert await backend.retry_after("a", limit=1, window=60) == 0
+    assert await backend.retry_after("c", limit=1, window=60) > 0
+
+@pytest.mark.asyncio
+async def test_login_is_throttled_before_database_and_hashing():
+    """Test that repeated failures for a username are rejected without a lookup or verify."""
+    limiter = LoginRateLimiter(InMemoryRateLimitBackend(), username_limit=2, username_window=60)
+    user = SimpleNamespace(id=1, username="testuser", email="test@example.com", hashed_password="hash")
+    lookup = AsyncMock(return_value=user)
+    hasher = AsyncMock()
+    hasher.verify.return_value = False
+    with patch.object(auth, "login_rate_limiter", limiter), \
+         patch.object(auth, "get_user_by_login", lookup), \
+         patch.object(auth, "password_hasher", hasher):
+        for _ in range(2):
+            with pytest.raises(HTTPException) as exc_info:
+                await auth.login(None, "testuser", "wrong", "10.0.0.1")
+            assert exc_info.value.status_code == 401
+
+        with pytest.raises(HTTPException) as exc_info:
+            await auth.login(None, "TestUser", "wrong", "10.0.0.2")
+
+    assert exc_info.value.status_code == 429
+    assert int(exc_info.value.headers["Retry-After"]) > 0
+    assert lookup.await_count == 2
+    assert hasher.verify.await_count == 2
+
+@pytest.mark.asyncio
+async def test_concurrent_burst_is_cut_off_at_the_limits():
+    """Test that concurrent guesses reserve their slots before hashing, so only the limit reaches verify."""
+    limiter = LoginRateLimiter(InMemoryRateLimitBackend(), ip_limit=30, username_limit=5)
+    user = SimpleNamespace(id=1, username="testuser", email="test@example.com", hashed_password="hash")
+    hasher = AsyncMock()
+
+    async def slow_verify(password, hashed):
+        await asyncio.sleep(0.01)
+        return False
+
+    hasher.verify.side_effect = slow_verify
+
+    async def attempt(login, client_ip):
+        try:
+            await auth.login(None, login, "wrong", client_ip)
+        except HTTPException as e:
+            return e.status_code
+
+    with patch.object(auth, "login_rate_limiter", limiter), \
+         patch.object(auth, "get_user_by_login", AsyncMock(return_value=user)), \
+         patch.object(auth, "password_hasher", hasher):
+        # One account from many addresses: the username budget caps it
+        codes = await asyncio.gather(*(attempt("testuser", f"10.0.0.{i}") for i in range(200)))
+        assert codes.count(401) == 5 and codes.count(429) == 195
+        assert hasher.verify.await_count == 5
+
+        # Many accounts from one address: the IP budget caps it
+        hasher.verify.reset_mock()
+        codes = await asyncio.gather(*(attempt(f"user{i}", "10.0.1.1") for i in range(200)))
+        assert codes.count(401) == 30 and codes.count(429) == 170
+        assert hasher.verify.await_count == 30
+
+@pytest.mark.asyncio
+async def test_attempt_without_a_verdict_gives_its_reservation_back():
+    """Test that a login failing before the password is judged does not count as a failure."""
+    limiter = LoginRateLimiter(InMemoryRateLimitBackend(), username_limit=1)
+    user = SimpleNamespace(id=1, username="testuser", email="test@example.com", hashed_password="hash")
+    hasher = AsyncMock()
+    hasher.verify.side_effect = HTTPException(status_code=429, detail="busy")
+    with patch.object(auth, "login_rate_limiter", limiter), \
+         patch.object(auth, "get_user_by_login", AsyncMock(return_value=user)), \
+         patch.object(auth, "password_hasher", hasher):
+        for _ in range(3):
+            with pytest.raises(HTTPException) as exc_info:
+                await auth.login(None, "testuser", "password")
+            assert exc_info.value.detail == "busy"
+
+    assert hasher.verify.await_count == 3
+
+@pytest.mark.asyncio
+async def test_username_and_email_share_one_failure_budget():
+    """Test that failures typed as the username also throttle logins by email, and vice versa."""
+    limiter = LoginRateLimiter(InMemoryRateLimitBackend(), username_limit=2, username_window=60)
+    user = SimpleNamespace(id=1, username="testuser", email="test@example.com", hashed_password="hash")
+    hasher = AsyncMock()
+    hasher.verify.return_value = False
+    with patch.object(auth, "login_rate_limiter", limiter), \
+         patch.object(auth, "get_user_by_login", AsyncMock(return_value=user)), \
+         patch.object(auth, "password_hasher", hasher):
+        for login in ("testuser", "TEST@example.com"):
+            with pytest.raises(HTTPException) as exc_info:
+                await auth.login(None, login, "wrong")
+            assert exc_info.value.status_code == 401
+
+        for login in ("testuser", "test@example.com"):
+            with pytest.raises(HTTPException) as exc_info:
+                await auth.login(None, login, "wrong")
+            assert exc_info.value.status_code == 429
+
+    assert hasher.verify.await_count == 2
+
+@pytest.mark.asyncio
+async def test_unknown_username_still_verifies_a_hash():
+    """Test that unknown usernames cost one verify against a dummy hash."""
+    limiter = LoginRateLimiter(InMemoryRateLimitBackend())
+    hasher = AsyncMock()
+    hasher.hash.return_value = "dummy-hash"
+    hasher.verify.return_value = True
+    with patch.object(auth, "login_rate_limiter", limiter), \
+         patch.object(auth, "get_user_by_login", AsyncMock(return_value=None)), \
+         patch.object(auth, "password_hasher", hasher), \
+         patch.object(auth, "_dummy_hash", None):
+        with pytest.raises(HTTPException) as exc_info:
+            await auth.login(None, "ghost", "password")
+
+    assert exc_info.value.status_code == 401
+    hasher.verify.assert_awaited_once_with("password", "dummy-hash")
@@ -0,0 +1,161 @@
+# Unit tests for the revoked-token cache and write-behind blacklist inserts
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import func, select
+from unittest.mock import AsyncMock, patch
+from app.crud.session import create_refresh_session, get_revoked_session_ids, revoke_refresh_session
+from app.crud.token import add_tokens_to_blacklist
+from app.models.token import TokenBlacklist
+from app.models.user import User
+from app.services.revocation import BlacklistWriter, RevocationCache
+from app.utils.bloom import BloomFilter
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test that every added item is reported as present."""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    assert bloom.is_full
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+def test_revocation_cache_buckets_by_expiry_and_prunes():
+    """Test that revoked JTIs are found in their expiry bucket and dropped after expiry."""
+    cache = RevocationCache(bucket_seconds=60)
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=5)
+    cache.add("revoked-jti", expires_at)
+
+    assert cache.might_be_revoked("revoked-jti", expires_at.timestamp())
+    assert not cache.might_be_revoked("revoked-jti", expires_at.timestamp() + 3600)
+
+    cache.prune(now=expires_at.timestamp() + 120)
+    assert not cache.might_be_revoked("revoked-jti", expires_at.timestamp())
+
+@pytest.mark.asyncio
+async def test_revocation_cache_answers_negative_lookups_from_memory():
+    """Test that unrevoked tokens skip the database once the cache is loaded."""
+    cache = RevocationCache()
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=5)
+    rows = [("revoked-jti", expires_at.replace(tzinfo=None), datetime.now())]
+
+    with patch("app.services.revocation.get_blacklisted_tokens", AsyncMock(return_value=rows)), \
+         patch("app.services.revocation.get_revoked_sessions", AsyncMock(return_value=[])), \
+         patch("app.services.revocation.is_token_blacklisted", AsyncMock(return_value=True)) as mock_lookup:
+        mock_db = AsyncMock()
+        # Before the first refresh every lookup goes to the database
+        assert await cache.is_revoked(mock_db, "other-jti", expires_at.timestamp())
+        assert mock_lookup.await_count == 1
+
+        await cache.refresh(mock_db)
+        assert not await cache.is_revoked(mock_db, "other-jti", expires_at.timestamp())
+        assert mock_lookup.await_count == 1
+
+        assert await cache.is_revoked(mock_db, "revoked-jti", expires_at.timestamp())
+        assert mock_lookup.await_count == 2
+
+@pytest.mark.asyncio
+async def test_revocation_cache_tracks_revoked_sessions(session_factory):
+    """Test that revoked sessions are loaded and broadcast into memory, and live ones skip the database."""
+    now = datetime.utcnow()
+    async with session_factory() as db:
+        db.add(User(id=1, username="alice", email="alice@example.com", hashed_password="x"))
+        live, revoked, broadcast = [(await create_refresh_session(db, 1, now + timedelta(days=1))).id for _ in range(3)]
+        await revoke_refresh_session(db, revoked, now)
+
+    cache = RevocationCache(session_ttl=3600)
+    async with session_factory() as db:
+        await cache.refresh(db)
+        with patch("app.services.revocation.get_revoked_session_ids", wraps=get_revoked_session_ids) as lookup:
+            assert not await cache.is_session_revoked(db, live)
+            assert lookup.await_count == 0
+            assert await cache.revoked_sessions_among(db, [live, revoked]) == {revoked}
+            assert lookup.await_count == 1
+
+    cache.on_session_revocation(broadcast, time.time() + 3600)
+    assert cache.session_might_be_revoked(broadcast)
+    cache.prune(now=time.time() + 3 * 3600)
+    assert not cache.session_might_be_revoked(revoked)
+    assert not cache.session_might_be_revoked(broadcast)
+
+@pytest.mark.asyncio
+async def test_revocation_cache_falls_back_when_stale():
+    """Test that a cache whose refreshes stopped is no longer trusted."""
+    cache = RevocationCache(refresh_interval=1.0)
+    with patch("app.services.revocation.get_blacklisted_tokens", AsyncMock(return_value=[])), \
+         patch("app.services.revocation.get_revoked_sessions", AsyncMock(return_value=[])):
+        await cache.refresh(AsyncMock())
+    assert cache.ready
+
+    cache._last_refresh = time.monotonic() - 10
+    assert not cache.ready
+
+@pytest.mark.asyncio
+async def test_blacklist_writer_groups_revocations_and_enforces_them_before_commit(session_factory):
+    """Test that queued revocations are rejected at once and written with one insert per batch."""
+    writer = BlacklistWriter(session_factory=session_factory, batch_size=100, flush_interval=0.05)
+    cache = RevocationCache(writer=writer)
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+
+    with patch("app.services.revocation.add_tokens_to_blacklist", wraps=add_tokens_to_blacklist) as insert:
+        for i in range(30):
+            assert writer.enqueue(f"jti-{i}", expires_at)
+        assert writer.enqueue("jti-0", expires_at)
+        async with session_factory() as db:
+            assert await cache.is_revoked(db, "jti-3", None)
+            assert await cache.revoked_among(db, [("jti-4", None), ("live", None)]) == {"jti-4"}
+        await writer.flush()
+
+    assert insert.await_count == 1
+    assert writer.pending == 0 and "jti-3" not in writer
+    async with session_factory() as db:
+        assert await db.scalar(select(func.count()).select_from(TokenBlacklist)) == 30
+        assert await cache.is_revoked(db, "jti-3", None)
+    await writer.stop()
+
+@pytest.mark.asyncio
+async def test_blacklist_writer_retries_failed_inserts_and_declines_when_full(session_factory):
+    """Test that a failed insert keeps its revocations queued, and enqueue declines past max_pending."""
+    writer = BlacklistWriter(session_factory=session_factory, flush_interval=0.001, max_pending=2, retry_interval=0.01)
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+
+    failing = AsyncMock(side_effect=[ConnectionError("db down"), None])
+    with patch("app.services.revocation.add_tokens_to_blacklist", failing):
+        assert writer.enqueue("a", expires_at) and writer.enqueue("b", expires_at)
+        assert not writer.enqueue("c", expires_at)
+        await asyncio.sleep(0.005)
+        assert "a" in writer
+        await writer.flush()
+
+    assert failing.await_count == 2
+    assert failing.await_args.args[1] == [("a", expires_at), ("b", expires_at)]
+    assert writer.pending == 0
+    assert not BlacklistWriter(flush_interval=0).enqueue("d", expires_at)
+    await writer.stop()
+
+@pytest.mark.asyncio
+async def test_broadcast_revocations_are_trusted_before_their_row_is_written(session_factory):
+    """Test that another instance rejects a broadcast JTI while the sender's row is still queued."""
+    writer = BlacklistWriter(session_factory=session_factory, flush_interval=60)
+    sender, receiver = RevocationCache(writer=writer), RevocationCache()
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    exp = expires_at.replace(tzinfo=timezone.utc).timestamp()
+    async with session_factory() as db:
+        await receiver.refresh(db)
+
+        assert writer.enqueue("jti", expires_at)
+        sender.add("jti", expires_at)
+        receiver.on_revocation("jti", exp)
+        assert await receiver.is_revoked(db, "jti", exp)
+        assert await receiver.revoked_among(db, [("jti", exp), ("live", exp)]) == {"jti"}
+
+        await writer.flush()
+        await receiver.refresh(db)
+    assert "jti" not in receiver._broadcast
+    async with session_factory() as db:
+        assert await receiver.is_revoked(db, "jti", exp)
+    await writer.stop()
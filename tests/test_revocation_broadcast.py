@@ -0,0 +1,70 @@
+# Tests for cross-instance revocation broadcast over the in-memory broker
+import asyncio
+import time
+import pytest
+from app.services.memory_broker import InMemoryBroker
+from app.services.message_queue import MessageQueueClient
+from app.services.revocation import RevocationCache
+
+async def _settle():
+    # Let the broker dispatch queued deliveries
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+@pytest.mark.asyncio
+async def test_revocation_is_broadcast_to_other_instances():
+    """Test that a JTI or session revoked on one instance reaches every other instance's cache."""
+    broker = InMemoryBroker()
+    instances = []
+    for _ in range(3):
+        client = MessageQueueClient(connect=broker.connect)
+        cache = RevocationCache()
+        client.add_revocation_listener(cache)
+        await client.connect()
+        instances.append((client, cache))
+
+    exp = time.time() + 300
+    publisher, _ = instances[0]
+    await publisher.publish_token_revoked("revoked-jti", exp)
+    await publisher.publish_session_revoked("revoked-sid", exp)
+    await _settle()
+
+    for _, cache in instances[1:]:
+        assert cache.coherent
+        assert cache.might_be_revoked("revoked-jti", exp)
+        assert cache.session_might_be_revoked("revoked-sid")
+    # The publisher records its own revocations locally, not via the broadcast
+    assert not instances[0][1].might_be_revoked("revoked-jti", exp)
+
+@pytest.mark.asyncio
+async def test_reconnect_requests_full_resync():
+    """Test that losing the broker drops coherence and reconnecting triggers a resync."""
+    broker = InMemoryBroker()
+    client = MessageQueueClient(connect=broker.connect, reconnect_interval=0.01)
+    cache = RevocationCache()
+    client.add_revocation_listener(cache)
+    await client.connect()
+    cache._resync_requested = False
+
+    broker.drop_connections()
+    await asyncio.sleep(0)
+    assert not cache.coherent
+    assert client.channel is None
+
+    await asyncio.sleep(0.05)
+    assert cache.coherent
+    assert cache._resync_requested
+    await client.close()
+
+@pytest.mark.asyncio
+async def test_publish_token_revoked_skips_when_disconnected():
+    """Test that revocation broadcasts never connect on the request path."""
+    connect_calls = []
+
+    async def connect(url):
+        connect_calls.append(url)
+        raise ConnectionError("broker down")
+
+    client = MessageQueueClient(connect=connect)
+    await client.publish_token_revoked("jti", time.time() + 60)
+    assert connect_calls == []
@@ -0,0 +1,178 @@
+# Tests for login sessions (rotation, reuse detection, logout, revoke-all, rehash on login)
+from datetime import datetime, timedelta
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from unittest.mock import AsyncMock, patch
+from app.crud.session import create_refresh_session, rotate_refresh_session
+from app.models.session import RefreshSession
+from app.models.token import TokenBlacklist
+from app.models.user import User
+from app.services.auth import login, logout, refresh_access_token
+from app.services.compaction import BlacklistCompactor
+from app.services.hashing import PasswordHashingPool, password_hasher
+from app.services.password_policy import PasswordPolicy
+from app.services.revocation import blacklist_writer
+from app.services.sessions import list_sessions, revoke_all_sessions, revoke_session, token_version_cache
+from app.utils.security import create_refresh_token_wrapper, decode_token_wrapper, get_current_user
+
+@pytest.fixture(autouse=True)
+def _clear_token_versions():
+    token_version_cache.clear()
+    yield
+    token_version_cache.clear()
+
+@pytest_asyncio.fixture(autouse=True)
+async def _blacklist_writer(session_factory, monkeypatch):
+    monkeypatch.setattr(blacklist_writer, "session_factory", session_factory)
+    yield blacklist_writer
+    await blacklist_writer.flush()
+    await blacklist_writer.stop()
+
+async def _login(session_factory):
+    async with session_factory() as db:
+        db.add(User(id=1, username="alice", email="alice@example.com", hashed_password="unused"))
+        await db.commit()
+        with patch.object(password_hasher, "verify", AsyncMock(return_value=True)):
+            return await login(db, "alice", "password")
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_session_without_blacklist_rows(session_factory):
+    """Test that each refresh bumps the session generation instead of blacklisting the old token."""
+    tokens = await _login(session_factory)
+    session_id = decode_token_wrapper(tokens.refresh_token)["sid"]
+    assert decode_token_wrapper(tokens.access_token)["sid"] == session_id
+
+    async with session_factory() as db:
+        for _ in range(3):
+            tokens = await refresh_access_token(db, tokens.refresh_token)
+
+    payload = decode_token_wrapper(tokens.refresh_token)
+    assert (payload["sid"], payload["gen"]) == (session_id, 3)
+    async with session_factory() as db:
+        session = await db.get(RefreshSession, session_id)
+        assert session.generation == 3 and session.revoked_at is None
+        assert await db.scalar(select(func.count()).select_from(TokenBlacklist)) == 0
+
+@pytest.mark.asyncio
+async def test_refresh_token_reuse_revokes_the_whole_family(session_factory):
+    """Test that replaying a rotated refresh token revokes the session and its newest token."""
+    first = await _login(session_factory)
+    async with session_factory() as db:
+        second = await refresh_access_token(db, first.refresh_token)
+
+        with pytest.raises(HTTPException) as exc:
+            await refresh_access_token(db, first.refresh_token)
+        assert exc.value.status_code == 401
+
+        with pytest.raises(HTTPException):
+            await refresh_access_token(db, second.refresh_token)
+        session = await db.get(RefreshSession, decode_token_wrapper(first.refresh_token)["sid"])
+        assert session.revoked_at is not None
+
+@pytest.mark.asyncio
+async def test_logout_revokes_the_session(session_factory):
+    """Test that logging out with an access token ends its refresh session."""
+    tokens = await _login(session_factory)
+    async with session_factory() as db:
+        await logout(db, decode_token_wrapper(tokens.access_token))
+        with pytest.raises(HTTPException):
+            await refresh_access_token(db, tokens.refresh_token)
+
+@pytest.mark.asyncio
+async def test_legacy_refresh_token_moves_onto_a_session(session_factory):
+    """Test that a refresh token without a session is blacklisted once and exchanged for a session token."""
+    legacy = create_refresh_token_wrapper({"sub": "alice", "user_id": 1})
+    async with session_factory() as db:
+        db.add(User(id=1, username="alice", email="alice@example.com", hashed_password="unused"))
+        await db.commit()
+        tokens = await refresh_access_token(db, legacy)
+        assert decode_token_wrapper(tokens.refresh_token)["gen"] == 0
+        await blacklist_writer.flush()
+        assert await db.scalar(select(func.count()).select_from(TokenBlacklist)) == 1
+
+@pytest.mark.asyncio
+async def test_expired_sessions_cannot_rotate_and_are_compacted(session_factory):
+    """Test that an expired session fails the conditional update and is purged by compaction."""
+    now = datetime.utcnow()
+    async with session_factory() as db:
+        db.add(User(id=1, username="alice", email="alice@example.com", hashed_password="unused"))
+        await db.commit()
+        expired = await create_refresh_session(db, 1, now - timedelta(minutes=1))
+        live = await create_refresh_session(db, 1, now + timedelta(days=1))
+        assert not await rotate_refresh_session(db, expired.id, 0, now, now + timedelta(days=1))
+
+    result = await BlacklistCompactor(session_factory=session_factory, batch_pause=0).run_once()
+
+    assert result.sessions_purged == 1
+    async with session_factory() as db:
+        assert await db.get(RefreshSession, expired.id) is None
+        assert await db.get(RefreshSession, live.id) is not None
+
+@pytest.mark.asyncio
+async def test_revoke_all_sessions_invalidates_every_token_with_one_update(session_factory):
+    """Test that bumping the token version rejects existing access and refresh tokens."""
+    first = await _login(session_factory)
+    async with session_factory() as db:
+        with patch.object(password_hasher, "verify", AsyncMock(return_value=True)):
+            second = await login(db, "alice", "password")
+        assert len(await list_sessions(db, 1)) == 2
+        assert (await get_current_user(first.access_token, db))["user_id"] == 1
+
+        await revoke_all_sessions(db, 1)
+
+        for tokens in (first, second):
+            with pytest.raises(HTTPException):
+                await get_current_user(tokens.access_token, db)
+            with pytest.raises(HTTPException):
+                await refresh_access_token(db, tokens.refresh_token)
+        assert await list_sessions(db, 1) == []
+
+        with patch.object(password_hasher, "verify", AsyncMock(return_value=True)):
+            fresh = await login(db, "alice", "password")
+        assert (await get_current_user(fresh.access_token, db))["ver"] == 1
+
+@pytest.mark.asyncio
+async def test_list_and_revoke_single_session(session_factory):
+    """Test that users see their sessions and can revoke only their own."""
+    tokens = await _login(session_factory)
+    session_id = decode_token_wrapper(tokens.access_token)["sid"]
+    async with session_factory() as db:
+        sessions = await list_sessions(db, 1, current_session_id=session_id)
+        assert [(s.id, s.current) for s in sessions] == [(session_id, True)]
+        rotated = await refresh_access_token(db, tokens.refresh_token)
+
+        with pytest.raises(HTTPException) as exc:
+            await revoke_session(db, 2, session_id)
+        assert exc.value.status_code == 404
+        assert (await get_current_user(tokens.access_token, db))["sid"] == session_id
+
+        await revoke_session(db, 1, session_id)
+        assert await list_sessions(db, 1) == []
+        with pytest.raises(HTTPException):
+            await refresh_access_token(db, rotated.refresh_token)
+        # Every access token issued under the session dies with it, not just the newest
+        for access_token in (tokens.access_token, rotated.access_token):
+            with pytest.raises(HTTPException):
+                await get_current_user(access_token, db)
+
+@pytest.mark.asyncio
+async def test_login_upgrades_outdated_password_hash(session_factory):
+    """Test that a successful login rehashes a password stored under a weaker policy."""
+    old_hash = PasswordPolicy(bcrypt_rounds=4).hash("password")
+    hasher = PasswordHashingPool(executor_kind="thread", max_workers=1, policy=PasswordPolicy(scheme="argon2", argon2_time_cost=1, argon2_memory_cost=1024))
+    try:
+        async with session_factory() as db:
+            db.add(User(id=1, username="alice", email="alice@example.com", hashed_password=old_hash))
+            await db.commit()
+            with patch("app.services.auth.password_hasher", hasher):
+                await login(db, "alice", "password")
+                stored = (await db.get(User, 1, populate_existing=True)).hashed_password
+                assert stored.startswith("$argon2id$")
+                assert hasher.policy.verify("password", stored)
+
+                await login(db, "alice", "password")
+                assert (await db.get(User, 1, populate_existing=True)).hashed_password == stored
+    finally:
+        hasher.shutdown()
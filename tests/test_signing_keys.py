@@ -0,0 +1,95 @@
+# Tests for the JWT signing key ring and the JWKS endpoint
+import datetime
+import httpx
+import pytest
+from ecdsa import NIST256p, SigningKey as EcdsaSigningKey
+from fastapi import FastAPI
+from jose import jwt
+from app.api import routes
+from app.crud.signing_key import add_signing_key
+from app.models.signing_key import SigningKey
+from cryptography.fernet import Fernet
+from sqlalchemy import select
+from app.services.signing_keys import KeyEncryptor, SigningKeyRing
+from app.services.tokens import TokenEngine
+
+def _ring(session_factory, **kwargs):
+    return SigningKeyRing(engine=TokenEngine("ES256"), session_factory=session_factory, **kwargs)
+
+@pytest.mark.asyncio
+async def test_key_ring_bootstraps_and_signs_with_kid(session_factory):
+    """Test that an empty ring creates a key, stamps its kid and publishes it."""
+    ring = _ring(session_factory)
+    await ring.run_once()
+
+    token = ring.engine.create_access_token({"sub": "testuser"})
+    assert ring.engine.decode(token)["sub"] == "testuser"
+    assert jwt.get_unverified_header(token)["kid"] == ring.engine.kid
+    assert ring.engine.jwks_body.count(ring.engine.kid.encode()) == 1
+
+@pytest.mark.asyncio
+async def test_rotation_prepublishes_then_activates_and_keeps_old_keys(session_factory):
+    """Test that a rotated key is published before it signs, and old tokens keep verifying."""
+    ring = _ring(session_factory, rotation_interval=0, publish_ahead=3600)
+    await ring.run_once()
+    first_kid = ring.engine.kid
+    old_token = ring.engine.create_access_token({"sub": "testuser"})
+
+    await ring.run_once()
+    assert ring.engine.kid == first_kid
+    assert ring.engine.jwks_body.count(b'"kid"') == 2
+
+    ring.publish_ahead = 0
+    await ring.run_once()
+    assert ring.engine.kid != first_kid
+    assert ring.engine.decode(old_token)["sub"] == "testuser"
+
+@pytest.mark.asyncio
+async def test_private_keys_are_stored_encrypted_and_old_keks_still_open(session_factory):
+    """Test that stored keys are sealed, open under a rotated KEK list, and legacy PEM rows still load."""
+    old_kek, new_kek = Fernet.generate_key().decode(), Fernet.generate_key().decode()
+    ring = _ring(session_factory, encryptor=KeyEncryptor(old_kek))
+    await ring.run_once()
+    async with session_factory() as db:
+        stored = (await db.scalars(select(SigningKey.private_key))).one()
+    assert not stored.startswith("-----BEGIN")
+
+    rotated = _ring(session_factory, encryptor=KeyEncryptor(f"{new_kek},{old_kek}"))
+    await rotated.run_once()
+    assert rotated.engine.kid == ring.engine.kid
+    assert rotated.engine.decode(ring.engine.create_access_token({"sub": "testuser"}))["sub"] == "testuser"
+
+    pem = EcdsaSigningKey.generate(curve=NIST256p).to_pem().decode()
+    assert KeyEncryptor(new_kek).open(pem) == pem
+    with pytest.raises(RuntimeError):
+        KeyEncryptor().open(stored)
+
+@pytest.mark.asyncio
+async def test_concurrent_rotation_keeps_one_key_per_generation(session_factory):
+    """Test that a second key for the same generation is rejected."""
+    now = datetime.datetime.utcnow()
+    def key(kid):
+        return SigningKey(kid=kid, generation=1, algorithm="ES256", private_key="pem", public_jwk={}, activates_at=now)
+
+    async with session_factory() as db:
+        assert await add_signing_key(db, key("a"), previous_expires_at=now) is True
+    async with session_factory() as db:
+        assert await add_signing_key(db, key("b"), previous_expires_at=now) is False
+
+@pytest.mark.asyncio
+async def test_jwks_route_supports_conditional_requests(monkeypatch):
+    """Test that the JWKS is served with an ETag and revalidates with 304."""
+    engine = TokenEngine("ES256", EcdsaSigningKey.generate(curve=NIST256p).to_pem().decode())
+    monkeypatch.setattr(routes, "token_engine", engine)
+    app = FastAPI()
+    app.include_router(routes.well_known_router)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.get("/.well-known/jwks.json")
+        assert first.status_code == 200
+        assert first.json()["keys"][0]["kid"] == engine.kid
+        assert "max-age" in first.headers["cache-control"]
+
+        second = await client.get("/.well-known/jwks.json", headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 304
+        assert second.content == b""
@@ -0,0 +1,26 @@
+# Tests for the background task helpers
+import asyncio
+import logging
+import pytest
+from app.utils.tasks import cancel_task, run_forever
+
+@pytest.mark.asyncio
+async def test_run_forever_survives_failures_and_wakes_early():
+    """Test that a failing run is logged and retried, and setting wakeup cuts the pause short."""
+    runs = []
+
+    async def job():
+        runs.append(len(runs))
+        if len(runs) == 1:
+            raise RuntimeError("boom")
+
+    wakeup = asyncio.Event()
+    task = asyncio.create_task(run_forever(job, lambda: 60, logging.getLogger(__name__), "failed: %s", wakeup=wakeup))
+    await asyncio.sleep(0.01)
+    wakeup.set()
+    await asyncio.sleep(0.01)
+    await cancel_task(task)
+
+    assert runs == [0, 1]
+    assert task.cancelled()
+    await cancel_task(None)
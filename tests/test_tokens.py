@@ -0,0 +1,52 @@
+# Tests for the JWT token engine
+from datetime import timedelta
+from unittest.mock import patch
+import pytest
+from ecdsa import NIST256p, SigningKey
+from fastapi import HTTPException
+from jose import jwt
+from app.services.tokens import TokenEngine
+
+def test_tokens_carry_type_jti_and_exp_claims():
+    """Test that created tokens round-trip with the expected claims."""
+    engine = TokenEngine("HS256", "secret")
+    access = engine.decode(engine.create_access_token({"sub": "testuser", "user_id": 1}))
+    refresh = engine.decode(engine.create_refresh_token({"sub": "testuser", "user_id": 1}))
+
+    assert access["type"] == "access" and refresh["type"] == "refresh"
+    assert access["sub"] == "testuser" and access["user_id"] == 1
+    assert access["jti"] != refresh["jti"]
+    assert refresh["exp"] > access["exp"]
+
+def test_decode_memoizes_verified_tokens():
+    """Test that a token is only verified once while it is in the memo."""
+    engine = TokenEngine("HS256", "secret")
+    token = engine.create_access_token({"sub": "testuser"})
+    with patch("app.services.tokens.jwt.decode", wraps=jwt.decode) as mock_decode:
+        first = engine.decode(token)
+        first["sub"] = "mutated"
+        second = engine.decode(token)
+    assert mock_decode.call_count == 1
+    assert second["sub"] == "testuser"
+
+def test_decode_rejects_expired_and_tampered_tokens():
+    """Test that invalid tokens raise 401 and are not memoized."""
+    engine = TokenEngine("HS256", "secret")
+    expired = engine.create_access_token({"sub": "testuser"}, expires_delta=timedelta(seconds=-1))
+    forged = TokenEngine("HS256", "other").create_access_token({"sub": "testuser"})
+    for token in (expired, forged):
+        with pytest.raises(HTTPException) as exc:
+            engine.decode(token)
+        assert exc.value.status_code == 401
+
+def test_asymmetric_tokens_verify_with_public_key_only():
+    """Test that an ES256 token can be verified by an engine holding only the public key."""
+    private_key = SigningKey.generate(curve=NIST256p)
+    signer = TokenEngine("ES256", private_key.to_pem().decode())
+    verifier = TokenEngine("ES256", verification_key=private_key.get_verifying_key().to_pem().decode())
+    token = signer.create_access_token({"sub": "testuser"})
+    assert verifier.decode(token)["sub"] == "testuser"
+    assert signer.decode(token)["sub"] == "testuser"
+    assert verifier.kid == signer.kid
+    with pytest.raises(RuntimeError):
+        verifier.create_access_token({"sub": "testuser"})
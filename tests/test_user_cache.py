@@ -0,0 +1,46 @@
+# Tests for the /auth/me user profile cache
+import pytest
+from app.models.user import User
+from app.services import user_cache
+from app.utils.cache import TTLCache
+
+def test_ttl_cache_expires_and_evicts_least_recently_used(monkeypatch):
+    """Test that entries expire after the TTL and the LRU entry is evicted when full."""
+    now = [100.0]
+    monkeypatch.setattr("app.utils.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    now[0] += 11
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+@pytest.mark.asyncio
+async def test_get_user_profile_reads_through_until_the_ttl_expires(session_factory, monkeypatch):
+    """Test that profiles are cached after the first read and reloaded once the TTL has passed."""
+    now = [100.0]
+    monkeypatch.setattr("app.utils.cache.time.monotonic", lambda: now[0])
+    monkeypatch.setattr(user_cache, "user_profile_cache", TTLCache(maxsize=10, ttl=60))
+    async with session_factory() as db:
+        user = User(username="cached", email="cached@example.com", hashed_password="x")
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+
+    async with session_factory() as db:
+        profile = await user_cache.get_user_profile(db, user_id)
+    assert profile.username == "cached"
+
+    async with session_factory() as db:
+        await db.delete(await db.get(User, user_id))
+        await db.commit()
+
+    async with session_factory() as db:
+        assert (await user_cache.get_user_profile(db, user_id)).username == "cached"
+        now[0] += 61
+        assert await user_cache.get_user_profile(db, user_id) is None